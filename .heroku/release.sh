@@ -9,4 +9,7 @@ else
      python manage.py migrate --noinput
 fi
 
+# Register (or update) the periodic jobs run by rqscheduler
+python manage.py schedule_periodic_jobs
+
 echo "Done."
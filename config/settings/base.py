@@ -229,6 +229,13 @@ ADMIN_API_ALLOWED_SUBNETS = env(
 GITHUB_HOOK_SECRET = env(
     "GITHUB_HOOK_SECRET", default="", type_=lambda x: bytes(x, encoding="utf-8")
 )
+# Store webhook deliveries and process them on the "hooks" queue, instead of
+# while GitHub waits for a response:
+GITHUB_HOOK_QUEUE = env("GITHUB_HOOK_QUEUE", default=False, type_=boolish)
+# How long to remember webhook delivery IDs, to ignore GitHub's redeliveries:
+GITHUB_HOOK_DELIVERY_TTL = env(
+    "GITHUB_HOOK_DELIVERY_TTL", default=60 * 60 * 24, type_=int
+)
 # The username of the user that GitHub webhook actions should authenticate as:
 GITHUB_USER_NAME = env("GITHUB_USER_NAME", default="GitHub user")
 GITHUB_APP_ID = env("GITHUB_APP_ID", default=0, type_=int)
@@ -310,6 +317,11 @@ DAYS_BEFORE_ORG_EXPIRY_TO_ALERT = env(
     "DAYS_BEFORE_ORG_EXPIRY_TO_ALERT", default=3, type_=int
 )
 ORG_RECHECK_MINUTES = env("ORG_RECHECK_MINUTES", default=5, type_=int)
+# Pre-provisioned scratch orgs older than this are recycled, so that claimed
+# orgs still have most of their lifetime left:
+SCRATCH_ORG_POOL_MAX_AGE_DAYS = env(
+    "SCRATCH_ORG_POOL_MAX_AGE_DAYS", default=3, type_=int
+)
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/1.11/howto/static-files/
@@ -375,6 +387,12 @@ if not SFDX_CLIENT_ID:
 if not SFDX_HUB_KEY:
     raise ImproperlyConfigured("Missing environment variable: SFDX_HUB_KEY.")
 
+# Seconds to reuse a Dev Hub JWT access token before exchanging a new one; keep
+# this below the Dev Hub's session timeout. 0 disables the cache:
+DEVHUB_TOKEN_CACHE_TTL = env("DEVHUB_TOKEN_CACHE_TTL", type_=int, default=600)
+# Same for scratch org access tokens, keyed by org ID:
+ORG_TOKEN_CACHE_TTL = env("ORG_TOKEN_CACHE_TTL", type_=int, default=600)
+
 # CCI expects these env vars to be set to refresh org oauth tokens
 environ["SFDX_CLIENT_ID"] = SFDX_CLIENT_ID
 environ["SFDX_HUB_KEY"] = SFDX_HUB_KEY
@@ -415,9 +433,26 @@ RQ_QUEUES = {
         "URL": REDIS_LOCATION,
         "DEFAULT_TIMEOUT": env("REDIS_JOB_TIMEOUT", type_=int, default=3600),
         "DEFAULT_RESULT_TTL": 720,
-    }
+    },
+    # GitHub webhook deliveries, when GITHUB_HOOK_QUEUE is set:
+    "hooks": {
+        "URL": REDIS_LOCATION,
+        "DEFAULT_TIMEOUT": env("REDIS_JOB_TIMEOUT", type_=int, default=3600),
+        "DEFAULT_RESULT_TTL": 720,
+    },
 }
 RQ = {"WORKER_CLASS": "metecho.rq_worker.ConnectionClosingWorker"}
+# Management commands rqscheduler runs on a schedule, as cron strings (UTC). An
+# empty string disables one. `manage.py schedule_periodic_jobs` registers them:
+PERIODIC_JOBS = {
+    "populate_project_repo_ids": env(
+        "POPULATE_PROJECT_REPO_IDS_CRON", default="*/5 * * * *"
+    ),
+    "refresh_github_branches": env("REFRESH_GITHUB_BRANCHES_CRON", default="0 3 * * *"),
+    "fill_scratch_org_pools": env(
+        "FILL_SCRATCH_ORG_POOLS_CRON", default="*/15 * * * *"
+    ),
+}
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
@@ -525,6 +560,13 @@ API_PAGE_SIZE = env("API_PAGE_SIZE", type_=int, default=50)
 
 GITHUB_ISSUE_LIMIT = env("GITHUB_ISSUE_LIMIT", type_=int, default=1000)
 
+# Worker-local cache of extracted repository archives, keyed by repo and commit.
+# Disabled unless a directory is configured:
+CHECKOUT_CACHE_DIR = env("CHECKOUT_CACHE_DIR", default=None)
+CHECKOUT_CACHE_MAX_BYTES = env(
+    "CHECKOUT_CACHE_MAX_BYTES", type_=int, default=2 * 1024 * 1024 * 1024
+)
+
 # New feature branch prefix:
 BRANCH_PREFIX = env("BRANCH_PREFIX", default=None)
 
@@ -2,7 +2,7 @@ from django import forms
 from django.contrib import admin
 from django.contrib.sites.admin import SiteAdmin
 from django.contrib.sites.models import Site
-from django.db.models import JSONField
+from django.db.models import Count, JSONField, Q
 from django.forms.widgets import Textarea
 from django.utils.translation import gettext_lazy as _
 from parler.admin import TranslatableAdmin
@@ -13,9 +13,12 @@ from .models import (
     EpicSlug,
     GitHubIssue,
     GitHubRepository,
+    GitHubWebhook,
     Project,
     ProjectSlug,
     ScratchOrg,
+    ScratchOrgPool,
+    ScratchOrgRevisionSnapshot,
     SiteProfile,
     Task,
     TaskSlug,
@@ -94,11 +97,16 @@ class ProjectAdmin(admin.ModelAdmin):
     search_fields = ("name", "repo_owner", "repo_name")
 
     def save_model(self, request, obj, form, change):
-        if not obj.repo_image_url:
-            from .jobs import get_social_image_job
+        from .jobs import get_social_image_job, populate_project_repo_ids_job
 
+        if not obj.repo_image_url:
             get_social_image_job.delay(project=obj)
-        return super().save_model(request, obj, form, change)
+        super().save_model(request, obj, form, change)
+        if not change:
+            obj.queue_refresh_github_branches()
+        if obj.repo_id is None:
+            # Look it up now rather than at the next scheduled run:
+            populate_project_repo_ids_job.delay()
 
 
 @admin.register(ProjectSlug)
@@ -126,6 +134,21 @@ class GitHubIssueAdmin(admin.ModelAdmin):
     search_fields = ("number", "title")
 
 
+@admin.register(GitHubWebhook)
+class GitHubWebhookAdmin(admin.ModelAdmin):
+    date_hierarchy = "created_at"
+    list_display = (
+        "event",
+        "delivery_id",
+        "repo_id",
+        "status",
+        "created_at",
+        "processing_time",
+    )
+    list_filter = ("event", "status")
+    search_fields = ("delivery_id", "repo_id")
+
+
 @admin.register(Epic)
 class EpicAdmin(admin.ModelAdmin):
     list_display = ("name", "status", "project", "created_at", "deleted_at")
@@ -153,7 +176,7 @@ class TaskAdmin(admin.ModelAdmin):
         ("project", "epic"),
         ("issue", "description"),
         ("branch_name", "org_config_name"),
-        ("commits", "get_all_users_in_commits"),
+        ("commit_count", "get_all_users_in_commits"),
         "origin_sha",
         "metecho_commits",
         "has_unmerged_commits",
@@ -167,7 +190,7 @@ class TaskAdmin(admin.ModelAdmin):
         ("assigned_dev", "assigned_qa"),
     )
     readonly_fields = (
-        "commits",
+        "commit_count",
         "reviewers",
         "get_all_users_in_commits",
     )
@@ -182,6 +205,11 @@ class TaskSlugAdmin(admin.ModelAdmin):
     search_fields = ("slug",)
 
 
+class ScratchOrgRevisionSnapshotInline(admin.StackedInline):
+    model = ScratchOrgRevisionSnapshot
+    formfield_overrides = {JSONField: {"widget": JSONWidget}}
+
+
 @admin.register(ScratchOrg)
 class ScratchOrgAdmin(admin.ModelAdmin):
     list_display = (
@@ -193,9 +221,65 @@ class ScratchOrgAdmin(admin.ModelAdmin):
         "created_at",
         "deleted_at",
     )
-    list_filter = (SoftDeletedListFilter, "owner", "org_type")
+    list_filter = (SoftDeletedListFilter, "owner", "org_type", "pool")
     search_fields = ("project__name", "epic__name", "task__name")
     formfield_overrides = {JSONField: {"widget": JSONWidget}}
+    inlines = (ScratchOrgRevisionSnapshotInline,)
+
+
+@admin.register(ScratchOrgPool)
+class ScratchOrgPoolAdmin(admin.ModelAdmin):
+    list_display = (
+        "project",
+        "org_config_name",
+        "size",
+        "ready_count",
+        "provisioning_count",
+        "hits",
+        "misses",
+        "hit_rate",
+        "recycled",
+        "last_filled_at",
+    )
+    list_select_related = ("project",)
+    readonly_fields = ("hits", "misses", "recycled", "last_filled_at")
+    search_fields = ("project__name", "org_config_name")
+    actions = ("fill",)
+
+    def get_queryset(self, request):
+        pending = Q(orgs__deleted_at__isnull=True, orgs__delete_queued_at__isnull=True)
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                ready_count=Count("orgs", filter=pending & Q(orgs__is_created=True)),
+                provisioning_count=Count(
+                    "orgs", filter=pending & Q(orgs__is_created=False)
+                ),
+            )
+        )
+
+    @admin.display(description=_("Ready"), ordering="ready_count")
+    def ready_count(self, obj):
+        return obj.ready_count
+
+    @admin.display(description=_("Provisioning"), ordering="provisioning_count")
+    def provisioning_count(self, obj):
+        return obj.provisioning_count
+
+    @admin.display(description=_("Hit rate"))
+    def hit_rate(self, obj):
+        claims = obj.hits + obj.misses
+        return f"{obj.hits / claims:.0%}" if claims else "-"
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        obj.queue_fill()
+
+    @admin.action(description=_("Recycle stale orgs and top up"))
+    def fill(self, request, queryset):
+        for pool in queryset:
+            pool.queue_fill()
 
 
 class SiteAdminForm(forms.ModelForm):
@@ -1,9 +1,14 @@
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import BooleanField, Case, Value, When
 from django.db.models.query_utils import Q
 from django.utils.translation import gettext_lazy as _
 from django_filters import rest_framework as filters
 
 from .models import Epic, GitHubIssue, Project, ScratchOrg, Task
 
+# How many digits a numeric search may be short of the issue numbers it finds:
+ISSUE_NUMBER_PREFIX_DIGITS = 7
+
 
 def slug_is_active(queryset, name, value):
     return queryset.filter(**{f"{name}__slug": value, f"{name}__is_active": True})
@@ -28,7 +33,38 @@ class GitHubIssueFilter(filters.FilterSet):
         fields = ("project", "id")
 
     def do_search(self, queryset, name, query):
-        return queryset.filter(Q(title__icontains=query) | Q(number__icontains=query))
+        """
+        Match titles containing the query (served by a trigram index on
+        UPPER(title)) and, for numeric queries, issue numbers starting with it.
+        Exact number matches come first, then titles by similarity to the query.
+        """
+        query = query.strip()
+        condition = Q(title__icontains=query)
+        ordering = ["-title_similarity", "-created_at"]
+        number = query.lstrip("#")
+        if number.isdigit() and int(number) > 0:
+            number = int(number)
+            condition |= Q(number=number)
+            # "12" also finds #120-#129, #1200-#1299, ...
+            for scale in (
+                10 ** digits for digits in range(1, ISSUE_NUMBER_PREFIX_DIGITS + 1)
+            ):
+                condition |= Q(
+                    number__gte=number * scale, number__lt=(number + 1) * scale
+                )
+            queryset = queryset.annotate(
+                number_match=Case(
+                    When(number=number, then=Value(True)),
+                    default=Value(False),
+                    output_field=BooleanField(),
+                )
+            )
+            ordering.insert(0, "-number_match")
+        return (
+            queryset.filter(condition)
+            .annotate(title_similarity=TrigramSimilarity("title", query))
+            .order_by(*ordering)
+        )
 
     def filter_by_is_attached(self, queryset, name, is_attached):
         lookup = queryset.exclude if is_attached else queryset.filter
@@ -2,22 +2,32 @@
 GitHub utilities
 """
 
+import collections
 import contextlib
+import hashlib
 import hmac
 import itertools
 import logging
 import os
 import pathlib
 import shutil
+import tempfile
+import threading
+import time
 import zipfile
 from glob import glob
 
-from cumulusci.utils import temporary_dir
+import cumulusci
+from cumulusci.utils import cd, temporary_dir
 from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
 from github3 import GitHub, login, users
 from github3.exceptions import NotFoundError, UnprocessableEntity
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
 
 from .custom_cci_configs import MetechoUniversalConfig, ProjectConfig
 
@@ -25,6 +35,27 @@ logger = logging.getLogger(__name__)
 
 
 ZIP_FILE_NAME = "archive.zip"
+# Installation tokens last an hour; stop handing one out this many seconds
+# before it expires, so requests already in flight don't outlive it:
+INSTALLATION_TOKEN_EXPIRY_MARGIN = 5 * 60
+INSTALLATION_ID_TIMEOUT = 60 * 60 * 24  # 1 day
+# Sessions kept open per user token, so jobs making many GitHub calls reuse
+# their connections:
+USER_SESSION_POOL_SIZE = 32
+USER_SESSION_IDLE_TIMEOUT = 5 * 60
+# Bodies of GET responses kept to answer conditional requests (see
+# ConditionalRequestAdapter). Larger responses aren't worth keeping in Redis:
+CONDITIONAL_REQUEST_TIMEOUT = 60 * 60 * 24  # 1 day
+CONDITIONAL_REQUEST_MAX_BYTES = 1024 * 1024
+# What a light checkout fetches. cumulusci.yml isn't listed, as it always comes
+# from the default branch (see local_github_checkout):
+LIGHT_CHECKOUT_FILES = ("sfdx-project.json",)
+LIGHT_CHECKOUT_FILE_DIRECTORIES = ("orgs",)
+LIGHT_CHECKOUT_LISTED_DIRECTORIES = (
+    "unpackaged/pre",
+    "unpackaged/post",
+    "unpackaged/config",
+)
 
 
 class UnsafeZipfileError(Exception):
@@ -35,6 +66,23 @@ class NoGitHubTokenError(Exception):
     pass
 
 
+# Token hash -> (GitHub, last used), least recently used first:
+_user_sessions = collections.OrderedDict()
+_user_sessions_lock = threading.Lock()
+
+
+def _evict_user_sessions(now):
+    while _user_sessions:
+        key, (gh, last_used) = next(iter(_user_sessions.items()))
+        if (
+            len(_user_sessions) <= USER_SESSION_POOL_SIZE
+            and now - last_used < USER_SESSION_IDLE_TIMEOUT
+        ):
+            break
+        del _user_sessions[key]
+        gh.session.close()
+
+
 def gh_given_user(user):
     try:
         token = (
@@ -42,22 +90,191 @@ def gh_given_user(user):
         )
     except (ObjectDoesNotExist, MultipleObjectsReturned):
         raise NoGitHubTokenError
-    return login(token=token)
+    key = hashlib.sha256(token.encode()).hexdigest()
+    now = time.monotonic()
+    with _user_sessions_lock:
+        gh, _ = _user_sessions.pop(key, (None, None))
+        if gh is None:
+            gh = mount_conditional_request_adapter(
+                login(token=token), identity=f"user_{user.id}"
+            )
+        _user_sessions[key] = (gh, now)
+        _evict_user_sessions(now)
+    return gh
+
+
+class ConditionalRequestAdapter(HTTPAdapter):
+    """
+    Replays GitHub API GET requests with the ETag or Last-Modified of the last
+    response for the same URL and credentials. GitHub answers unchanged
+    resources with a 304, which doesn't count against the rate limit, and we
+    serve the body from Redis instead.
+
+    `identity` names whose credentials the session uses (a user or an App
+    installation). It keys the cache rather than the token itself, which
+    changes every time an installation token is renewed.
+    """
+
+    def __init__(self, identity, *args, **kwargs):
+        self.identity = identity
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if request.method != "GET" or kwargs.get("stream"):
+            return super().send(request, **kwargs)
+
+        key = (
+            "gh_conditional_request_"
+            + hashlib.sha256(f"{self.identity} {request.url}".encode()).hexdigest()
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            if cached["etag"]:
+                request.headers["If-None-Match"] = cached["etag"]
+            elif cached["last_modified"]:
+                request.headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and cached is not None:
+            return self.build_cached_response(request, response, cached)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if (
+            response.status_code == 200
+            and (etag or last_modified)
+            and "json" in response.headers.get("Content-Type", "")
+            and len(response.content) <= CONDITIONAL_REQUEST_MAX_BYTES
+        ):
+            cache.set(
+                key,
+                {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "headers": dict(response.headers),
+                    "content": response.content,
+                },
+                timeout=CONDITIONAL_REQUEST_TIMEOUT,
+            )
+        return response
+
+    def build_cached_response(self, request, not_modified, cached):
+        response = Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(cached["headers"])
+        # The 304 carries the current rate limit, which github3 reports:
+        response.headers.update(
+            {
+                name: value
+                for name, value in not_modified.headers.items()
+                if name.lower().startswith("x-ratelimit-")
+            }
+        )
+        response._content = cached["content"]
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = not_modified.elapsed
+        return response
+
+
+def mount_conditional_request_adapter(gh, identity):
+    gh.session.mount("https://", ConditionalRequestAdapter(identity))
+    return gh
+
+
+# Process-wide copies of what's cached in Redis, to save a round trip to it on
+# every call:
+_installation_ids = {}
+_installation_tokens = {}
+
+
+def get_installation_id(repo_owner, repo_name):
+    key = f"gh_installation_id_{repo_owner.lower()}_{repo_name.lower()}"
+    installation_id = _installation_ids.get(key)
+    if installation_id is None:
+        installation_id = cache.get(key)
+    if installation_id is None:
+        gh = GitHub()
+        gh.login_as_app(settings.GITHUB_APP_KEY, settings.GITHUB_APP_ID, expire_in=120)
+        installation_id = gh.app_installation_for_repository(repo_owner, repo_name).id
+        cache.set(key, installation_id, timeout=INSTALLATION_ID_TIMEOUT)
+    _installation_ids[key] = installation_id
+    return installation_id
+
+
+def forget_installation_id(repo_owner, repo_name):
+    key = f"gh_installation_id_{repo_owner.lower()}_{repo_name.lower()}"
+    _installation_ids.pop(key, None)
+    cache.delete(key)
+
+
+def get_installation_token(installation_id):
+    """
+    Get an access token for an installation of the GitHub App, as a dict of
+    `token`, `expires_at` (as GitHub formats it) and `refresh_after` (a
+    timestamp). Tokens are reused until shortly before they expire.
+    """
+    key = f"gh_installation_token_{installation_id}"
+    token = _installation_tokens.get(key)
+    if token is None or token["refresh_after"] <= time.time():
+        token = cache.get(key)
+    if token is None or token["refresh_after"] <= time.time():
+        gh = GitHub()
+        gh.login_as_app_installation(
+            settings.GITHUB_APP_KEY, settings.GITHUB_APP_ID, installation_id
+        )
+        auth = gh.session.auth
+        refresh_after = auth.expires_at.timestamp() - INSTALLATION_TOKEN_EXPIRY_MARGIN
+        token = {
+            "token": auth.token,
+            "expires_at": auth.expires_at_str,
+            "refresh_after": refresh_after,
+        }
+        cache.set(key, token, timeout=max(int(refresh_after - time.time()), 1))
+    _installation_tokens[key] = token
+    return token
 
 
 def gh_as_app(repo_owner, repo_name):
-    app_id = settings.GITHUB_APP_ID
-    app_key = settings.GITHUB_APP_KEY
+    """
+    Get a GitHub session authenticated as the App's installation on a
+    repository. Installation IDs and tokens are cached, so this usually doesn't
+    call GitHub at all.
+    """
+    installation_id = get_installation_id(repo_owner, repo_name)
+    try:
+        token = get_installation_token(installation_id)
+    except NotFoundError:
+        # The App was reinstalled since we cached its installation ID:
+        forget_installation_id(repo_owner, repo_name)
+        installation_id = get_installation_id(repo_owner, repo_name)
+        token = get_installation_token(installation_id)
     gh = GitHub()
-    gh.login_as_app(app_key, app_id, expire_in=120)
-    installation = gh.app_installation_for_repository(repo_owner, repo_name)
-    gh.login_as_app_installation(app_key, app_id, installation.id)
-    return gh
+    gh.session.app_installation_token_auth(token)
+    return mount_conditional_request_adapter(
+        gh, identity=f"installation_{installation_id}"
+    )
 
 
 def get_all_org_repos(user):
+    """
+    List the repositories a user can access, along with the ETags of the
+    listing's pages (None unless GitHub sent one for every page). These only
+    change when the listing does.
+    """
     gh = gh_given_user(user)
-    return set(gh.repositories())
+    repositories = gh.repositories()
+    repos = set()
+    responses = []
+    for repo in repositories:
+        repos.add(repo)
+        if not responses or responses[-1] is not repositories.last_response:
+            responses.append(repositories.last_response)
+    etags = [response.headers.get("ETag") for response in responses]
+    return repos, " ".join(etags) if etags and all(etags) else None
 
 
 def is_safe_path(path):
@@ -91,6 +308,69 @@ def get_cached_user(gh: GitHub, username: str) -> users.User:
     return user
 
 
+COLLABORATORS_QUERY = """
+query($owner: String!, $name: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    collaborators(first: 100, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      edges { permission node { databaseId login avatarUrl name } }
+    }
+  }
+}
+"""
+# GraphQL reports a single permission level, which implies the lower ones:
+PERMISSION_LEVELS = ("pull", "triage", "push", "maintain", "admin")
+GRAPHQL_PERMISSION_LEVELS = {
+    "READ": "pull",
+    "TRIAGE": "triage",
+    "WRITE": "push",
+    "MAINTAIN": "maintain",
+    "ADMIN": "admin",
+}
+
+
+class GraphQLError(Exception):
+    pass
+
+
+def get_collaborators(repo):
+    """
+    List a repository's collaborators, including their names, with one GraphQL
+    query per 100 collaborators. Returns dicts shaped like
+    Project.github_users.
+    """
+    url = repo._build_url("graphql")
+    variables = {"owner": repo.owner.login, "name": repo.name, "cursor": None}
+    collaborators = []
+    while True:
+        response = repo._post(
+            url, data={"query": COLLABORATORS_QUERY, "variables": variables}
+        )
+        data = repo._json(response, 200)
+        if data.get("errors"):
+            raise GraphQLError(data["errors"])
+        connection = data["data"]["repository"]["collaborators"]
+        for edge in connection["edges"]:
+            level = PERMISSION_LEVELS.index(
+                GRAPHQL_PERMISSION_LEVELS[edge["permission"]]
+            )
+            collaborators.append(
+                {
+                    "id": str(edge["node"]["databaseId"]),
+                    "login": edge["node"]["login"],
+                    "name": edge["node"]["name"],
+                    "avatar_url": edge["node"]["avatarUrl"],
+                    "permissions": {
+                        permission: i <= level
+                        for i, permission in enumerate(PERMISSION_LEVELS)
+                    },
+                }
+            )
+        if not connection["pageInfo"]["hasNextPage"]:
+            return collaborators
+        variables["cursor"] = connection["pageInfo"]["endCursor"]
+
+
 def get_zip_file(repo, commit_ish):
     repo.archive("zipball", path=ZIP_FILE_NAME, ref=commit_ish)
     return zipfile.ZipFile(ZIP_FILE_NAME)
@@ -121,8 +401,125 @@ def extract_zip_file(zip_file, owner, repo_name):
     os.remove(ZIP_FILE_NAME)
 
 
+def _get_checkout_cache_entry(repo_id, commit_sha):
+    return pathlib.Path(settings.CHECKOUT_CACHE_DIR, str(repo_id), commit_sha)
+
+
+def _get_tree_size(path):
+    return sum(f.stat().st_size for f in pathlib.Path(path).rglob("*") if f.is_file())
+
+
+def evict_checkout_cache(keep=None):
+    """
+    Remove the least recently used entries from the checkout cache until it
+    fits in CHECKOUT_CACHE_MAX_BYTES. Each entry is a directory holding the
+    extracted `tree` and a `size` file, whose mtime records the last use.
+    """
+    entries = []
+    for size_file in pathlib.Path(settings.CHECKOUT_CACHE_DIR).glob("*/*/size"):
+        with contextlib.suppress(FileNotFoundError, ValueError):
+            entries.append(
+                (size_file.stat().st_mtime, int(size_file.read_text()), size_file)
+            )
+    total = sum(size for _, size, _ in entries)
+    for _, size, size_file in sorted(entries):
+        if total <= settings.CHECKOUT_CACHE_MAX_BYTES:
+            break
+        entry = size_file.parent
+        if entry == keep:
+            continue
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+
+
+def get_cached_checkout(repo, commit_sha):
+    """
+    Get the path to an extracted tree of the repository at `commit_sha`,
+    downloading the archive only if this worker hasn't already cached it.
+    """
+    entry = _get_checkout_cache_entry(repo.id, commit_sha)
+    if entry.is_dir():
+        (entry / "size").touch()
+        return entry / "tree"
+
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    staging = pathlib.Path(tempfile.mkdtemp(prefix=".staging-", dir=entry.parent))
+    try:
+        (staging / "tree").mkdir()
+        with cd(staging / "tree"):
+            zip_file = get_zip_file(repo, commit_sha)
+            if not zip_file_is_safe(zip_file):
+                log_unsafe_zipfile_error(repo.html_url, commit_sha)
+                raise UnsafeZipfileError
+            extract_zip_file(zip_file, repo.owner.login, repo.name)
+        (staging / "size").write_text(str(_get_tree_size(staging / "tree")))
+        # The rename is atomic, so other workers never see a partial entry. If
+        # one of them got here first, we just use their copy:
+        with contextlib.suppress(OSError):
+            staging.rename(entry)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    evict_checkout_cache(keep=entry)
+    return entry / "tree"
+
+
+def _get_subtree(repo, trees, path):
+    """
+    Look up the tree at `path`, given a dict of already-fetched trees by path
+    that includes the root tree at "". Fetched trees are added to `trees`.
+    """
+    if path in trees:
+        return trees[path]
+    parent_path, _, name = path.rpartition("/")
+    parent = _get_subtree(repo, trees, parent_path)
+    entry = parent and next(
+        (e for e in parent.tree if e.type == "tree" and e.path == name), None
+    )
+    trees[path] = repo.tree(entry.sha) if entry else None
+    return trees[path]
+
+
+def _write_blob(repo, entry, path):
+    pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+    pathlib.Path(path).write_text(repo.blob(entry.sha).decode_content())
+
+
+def extract_light_checkout(repo, commit_ish):
+    """
+    Write only the project configuration that Metecho reads into cwd, using the
+    Git trees API instead of downloading the full archive: the files in
+    LIGHT_CHECKOUT_FILES, the files directly inside
+    LIGHT_CHECKOUT_FILE_DIRECTORIES, and empty copies of the subdirectories of
+    LIGHT_CHECKOUT_LISTED_DIRECTORIES.
+    """
+    trees = {"": repo.tree(commit_ish)}
+    for entry in trees[""].tree:
+        if entry.type == "blob" and entry.path in LIGHT_CHECKOUT_FILES:
+            _write_blob(repo, entry, entry.path)
+
+    for path in LIGHT_CHECKOUT_FILE_DIRECTORIES:
+        tree = _get_subtree(repo, trees, path)
+        for entry in tree.tree if tree else []:
+            if entry.type == "blob":
+                _write_blob(repo, entry, f"{path}/{entry.path}")
+
+    for path in LIGHT_CHECKOUT_LISTED_DIRECTORIES:
+        tree = _get_subtree(repo, trees, path)
+        for entry in tree.tree if tree else []:
+            if entry.type == "tree":
+                pathlib.Path(path, entry.path).mkdir(parents=True, exist_ok=True)
+
+
 @contextlib.contextmanager
-def local_github_checkout(user, repo_id, commit_ish=None):
+def local_github_checkout(user, repo_id, commit_ish=None, *, light=False):
+    """
+    Check out the repository at `commit_ish` (default branch by default) into a
+    temporary directory, and chdir into it for the duration of the context.
+
+    Jobs that only read the project configuration should pass `light=True`,
+    which skips the archive download (see `extract_light_checkout`).
+    """
     with temporary_dir() as repo_root:
         # pretend it's a git clone to satisfy cci
         os.mkdir(".git")
@@ -130,30 +527,38 @@ def local_github_checkout(user, repo_id, commit_ish=None):
         repo = get_repo_info(user, repo_id=repo_id)
         if commit_ish is None:
             commit_ish = repo.default_branch
-        zip_file = get_zip_file(repo, commit_ish)
 
-        if not zip_file_is_safe(zip_file):
-            log_unsafe_zipfile_error(repo.html_url, commit_ish)
-            raise UnsafeZipfileError
+        if light:
+            extract_light_checkout(repo, commit_ish)
+        elif settings.CHECKOUT_CACHE_DIR:
+            # Jobs modify their checkout in place, so they get a copy of the
+            # cached tree rather than hard links into it:
+            commit_sha = repo.commit(commit_ish).sha
+            cached_tree = get_cached_checkout(repo, commit_sha)
+            shutil.copytree(cached_tree, repo_root, dirs_exist_ok=True)
         else:
+            zip_file = get_zip_file(repo, commit_ish)
+            if not zip_file_is_safe(zip_file):
+                log_unsafe_zipfile_error(repo.html_url, commit_ish)
+                raise UnsafeZipfileError
             # Because subsequent operations require certain things to be
             # present in the filesystem at cwd, things that are in the
             # repo (we hope):
             extract_zip_file(zip_file, repo.owner.login, repo.name)
 
-            # Ensure the CumulusCI config is always up to date with the default branch
-            # (even if the current branch has an old version)
-            try:
-                text = repo.file_contents(
-                    "cumulusci.yml", ref=repo.default_branch
-                ).decoded.decode("utf-8")
-                pathlib.Path("cumulusci.yml").write_text(text)
-            except (NotFoundError, IOError) as error:
-                raise Exception(
-                    "Failed to copy cumulusci.yml from default branch"
-                ) from error
+        # Ensure the CumulusCI config is always up to date with the default branch
+        # (even if the current branch has an old version)
+        try:
+            text = repo.file_contents(
+                "cumulusci.yml", ref=repo.default_branch
+            ).decoded.decode("utf-8")
+            pathlib.Path("cumulusci.yml").write_text(text)
+        except (NotFoundError, IOError) as error:
+            raise Exception(
+                "Failed to copy cumulusci.yml from default branch"
+            ) from error
 
-            yield repo_root
+        yield repo_root
 
 
 def get_project_config(**kwargs):
@@ -164,20 +569,47 @@ def get_project_config(**kwargs):
     return ProjectConfig(universal_config, **kwargs)
 
 
-def get_cumulus_prefix(**kwargs):
+def get_project_config_values(**kwargs):
     """
     Expects to be in a local_github_checkout.
+
+    Get the values Metecho reads from the project's CumulusCI config. These are
+    cached by the git blob SHA of cumulusci.yml and the CumulusCI version, so
+    each version of the file is parsed once, rather than once per job.
     """
+    content = pathlib.Path(kwargs["repo_root"], "cumulusci.yml").read_bytes()
+    blob_sha = hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+    key = f"cci_project_config_{cumulusci.__version__}_{blob_sha}"
+    values = cache.get(key)
+    if values is not None:
+        return values
+
     project_config = get_project_config(**kwargs)
-    return project_config.project__git__prefix_feature
+    values = {
+        "prefix_feature": project_config.project__git__prefix_feature,
+        "source_format": project_config.project__source_format,
+        "scratch_org_configs": dict(project_config.orgs__scratch or {}),
+        "api_version": project_config.project__package__api_version,
+        "package_name": project_config.project__package__name,
+        "install_class": project_config.project__package__install_class,
+        "uninstall_class": project_config.project__package__uninstall_class,
+    }
+    cache.set(key, values, timeout=60 * 60 * 24 * 7)  # 1 week
+    return values
+
+
+def get_cumulus_prefix(**kwargs):
+    """
+    Expects to be in a local_github_checkout.
+    """
+    return get_project_config_values(**kwargs)["prefix_feature"]
 
 
 def get_source_format(**kwargs):
     """
     Expects to be in a local_github_checkout.
     """
-    project_config = get_project_config(**kwargs)
-    return project_config.project__source_format
+    return get_project_config_values(**kwargs)["source_format"]
 
 
 def try_to_make_branch(repository, *, new_branch, base_sha):
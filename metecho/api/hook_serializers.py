@@ -9,6 +9,20 @@ from .models import Epic, Project, Task
 logger = logging.getLogger(__name__)
 
 
+def log_hook_latency(*, event, delivery_id, processing_time, wait_time=0):
+    """
+    Log how long a GitHub webhook delivery took, in the logfmt style of the
+    request logs, so it can be graphed.
+    """
+    logger.info(
+        "github_hook event=%s delivery=%s wait_time=%.3f processing_time=%.3f",
+        event,
+        delivery_id,
+        wait_time,
+        processing_time,
+    )
+
+
 class HookSerializerMixin:
     def get_matching_project(self):
         repo_id = self.validated_data["repository"]["id"]
@@ -124,6 +138,8 @@ class HookSenderSerializer(serializers.Serializer):
 
 class PushHookSerializer(HookSerializerMixin, serializers.Serializer):
     forced = serializers.BooleanField()
+    created = serializers.BooleanField(required=False, default=False)
+    deleted = serializers.BooleanField(required=False, default=False)
     ref = serializers.CharField()
     sender = HookSenderSerializer()
     commits = serializers.ListField(child=CommitSerializer())
@@ -150,6 +166,11 @@ class PushHookSerializer(HookSerializerMixin, serializers.Serializer):
         prefix_len = len(branch_prefix)
         ref = ref[prefix_len:]
 
+        if self.validated_data["deleted"]:
+            project.delete_branch(ref)
+        elif self.validated_data["created"]:
+            project.add_branch(ref)
+
         if self._is_force_push():
             project.queue_refresh_commits(ref=ref, originating_user_id=None)
         else:
@@ -183,3 +204,39 @@ class PrReviewHookSerializer(HookSerializerMixin, serializers.Serializer):
 
         sender = self.validated_data["sender"]
         task.add_reviewer(sender)
+
+
+class BranchHookSerializer(HookSerializerMixin, serializers.Serializer):
+    ref = serializers.CharField()
+    ref_type = serializers.CharField()
+    repository = HookRepositorySerializer()
+    # All other fields are ignored by default.
+
+    def process_hook(self):
+        project = self.get_matching_project()
+        if not project:
+            raise NotFound("No matching project.")
+
+        # Tags come through these events, too:
+        if self.validated_data["ref_type"] == "branch":
+            self.update_branches(project, self.validated_data["ref"])
+
+
+class CreateHookSerializer(BranchHookSerializer):
+    def update_branches(self, project, name):
+        project.add_branch(name)
+
+
+class DeleteHookSerializer(BranchHookSerializer):
+    def update_branches(self, project, name):
+        project.delete_branch(name)
+
+
+# Serializers for the GitHub webhook events we handle, by X-GitHub-Event:
+HOOK_SERIALIZERS = {
+    "create": CreateHookSerializer,
+    "delete": DeleteHookSerializer,
+    "push": PushHookSerializer,
+    "pull_request": PrHookSerializer,
+    "pull_request_review": PrReviewHookSerializer,
+}
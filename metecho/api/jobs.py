@@ -9,14 +9,16 @@ import requests
 from asgiref.sync import async_to_sync
 from bs4 import BeautifulSoup
 from django.conf import settings
-from django.db import transaction
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
 from django.db.models.query_utils import Q
 from django.template.loader import render_to_string
 from django.utils.text import slugify
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 from django_rq import get_scheduler, job
-from github3.exceptions import NotFoundError
+from github3.exceptions import ConnectionError, NotFoundError, ResponseError
 from github3.github import GitHub
 from github3.repos.repo import Repository
 
@@ -24,25 +26,45 @@ from .email_utils import get_user_facing_url
 from .gh import (
     get_all_org_repos,
     get_cached_user,
+    get_collaborators,
     get_cumulus_prefix,
-    get_project_config,
+    get_project_config_values,
     get_repo_info,
     local_github_checkout,
     normalize_commit,
     try_to_make_branch,
 )
-from .models import TaskReviewStatus
+from .models import (
+    GitHubBranch,
+    GitHubIssue,
+    GitHubWebhook,
+    GitHubWebhookStatus,
+    IssueStates,
+    ScratchOrg,
+    ScratchOrgPool,
+    ScratchOrgType,
+    TaskReviewStatus,
+)
 from .push import report_scratch_org_error
 from .sf_org_changes import (
     commit_changes_to_github,
     compare_revisions,
+    get_cached_valid_target_directories,
     get_latest_revision_numbers,
     get_valid_target_directories,
 )
-from .sf_run_flow import create_org, delete_org, run_flow
+from .sf_run_flow import create_org, delete_org, invalidate_org_token_on_401, run_flow
 
 logger = logging.getLogger(__name__)
 
+# A user's repository listing is written again once this long has passed, even
+# if its ETag didn't change:
+GITHUB_REPOSITORIES_ETAG_TIMEOUT = 60 * 60 * 24  # 1 day
+# A Project whose repository can't be looked up (usually because the GitHub App
+# isn't installed on it) is retried after this long, doubling on each failure:
+REPO_ID_BACKOFF_MIN = 60 * 5  # 5 minutes
+REPO_ID_BACKOFF_MAX = 60 * 60 * 24  # 1 day
+
 
 class TaskReviewIntegrityError(Exception):
     pass
@@ -64,7 +86,7 @@ def creating_gh_branch(instance):
 def get_branch_prefix(user, repository: Repository):
     if settings.BRANCH_PREFIX:
         return settings.BRANCH_PREFIX
-    with local_github_checkout(user, repository.id) as repo_root:
+    with local_github_checkout(user, repository.id, light=True) as repo_root:
         return get_cumulus_prefix(
             repo_root=repo_root,
             repo_name=repository.name,
@@ -257,12 +279,17 @@ def _create_org_and_run_flow(
     # function is called in a context that will eventually call a
     # finalize_* method, which will save the model.
     scratch_org.last_modified_at = now()
+    # This may be a new org (e.g. after a refresh), so start source tracking over:
+    scratch_org.max_revision_counter = None
     scratch_org.latest_revision_numbers = get_latest_revision_numbers(
         scratch_org,
         originating_user_id=originating_user_id,
     )
     scratch_org.is_created = True
+    _schedule_expiry_alert(scratch_org)
 
+
+def _schedule_expiry_alert(scratch_org):
     scheduler = get_scheduler("default")
     days = settings.DAYS_BEFORE_ORG_EXPIRY_TO_ALERT
     before_expiry = scratch_org.expires_at - timedelta(days=days)
@@ -274,6 +301,73 @@ def _create_org_and_run_flow(
     ).id
 
 
+def _claim_pooled_scratch_org(scratch_org, *, user, repo_id, commit_ish):
+    """
+    Hand a ready pooled org for the same Project, org config and commit to
+    `scratch_org`, reassigning it to `user`. Returns whether one was claimed;
+    any failure counts as a miss, and the caller provisions a new org instead.
+    """
+    pool = (
+        scratch_org.root_project.scratch_org_pools.filter(
+            org_config_name=scratch_org.org_config_name
+        ).first()
+        if scratch_org.root_project
+        else None
+    )
+    if pool is None:
+        return False
+    try:
+        claimed = _adopt_pooled_scratch_org(
+            pool, scratch_org, user=user, repo_id=repo_id, commit_ish=commit_ish
+        )
+    except Exception:
+        logger.exception(f"Couldn't claim an org from {pool}, creating a new one")
+        claimed = False
+    if not claimed:
+        pool.record("misses")
+        return False
+
+    pool.record("hits")
+    pool.queue_fill()
+    return True
+
+
+def _adopt_pooled_scratch_org(pool, scratch_org, *, user, repo_id, commit_ish):
+    if not pool.ready_orgs().exists():
+        return False
+
+    repository = get_repo_info(user, repo_id=repo_id)
+    commit_sha = repository.branch(commit_ish).commit.sha
+    with transaction.atomic():
+        pooled_org = (
+            pool.ready_orgs()
+            .filter(latest_commit=commit_sha)
+            .select_for_update(skip_locked=True)
+            .order_by("created_at")
+            .first()
+        )
+        if pooled_org is None:
+            return False
+        old_expiry_job_id = scratch_org.adopt_pooled_org(pooled_org)
+
+    scheduler = get_scheduler("default")
+    if old_expiry_job_id:
+        scheduler.cancel(old_expiry_job_id)
+    try:
+        _reassign_org_user(scratch_org, new_user=user)
+    except Exception:
+        # The org is still set up for the pool's owner; drop it rather than
+        # hand over a half-claimed org:
+        try:
+            delete_org(scratch_org)
+        except Exception:
+            logger.exception(f"Couldn't delete the org adopted by {scratch_org}")
+        scratch_org.forget_adopted_org()
+        raise
+    _schedule_expiry_alert(scratch_org)
+    return True
+
+
 def create_branches_on_github_then_create_scratch_org(
     *, scratch_org, originating_user_id
 ):
@@ -299,15 +393,22 @@ def create_branches_on_github_then_create_scratch_org(
             parent.latest_sha = repository.branch(commit_ish).latest_sha()
             parent.save()
             parent.notify_changed(originating_user_id=originating_user_id)
-        with local_github_checkout(user, repo_id, commit_ish) as repo_root:
-            _create_org_and_run_flow(
-                scratch_org,
-                user=user,
-                repo_id=repo_id,
-                repo_branch=commit_ish,
-                project_path=repo_root,
-                originating_user_id=originating_user_id,
-            )
+        claimed = scratch_org.pool_id is None and _claim_pooled_scratch_org(
+            scratch_org,
+            user=user,
+            repo_id=repo_id,
+            commit_ish=commit_ish,
+        )
+        if not claimed:
+            with local_github_checkout(user, repo_id, commit_ish) as repo_root:
+                _create_org_and_run_flow(
+                    scratch_org,
+                    user=user,
+                    repo_id=repo_id,
+                    repo_branch=commit_ish,
+                    project_path=repo_root,
+                    originating_user_id=originating_user_id,
+                )
     except Exception as e:
         scratch_org.finalize_provision(error=e, originating_user_id=originating_user_id)
         tb = traceback.format_exc()
@@ -398,15 +499,10 @@ def get_unsaved_changes(scratch_org, *, originating_user_id):
             scratch_org, originating_user_id=originating_user_id
         )
         unsaved_changes = compare_revisions(old_revision_numbers, new_revision_numbers)
-        user = scratch_org.owner
-        repo_id = scratch_org.parent.get_repo_id()
-        commit_ish = scratch_org.parent.branch_name
-        with local_github_checkout(user, repo_id, commit_ish) as repo_root:
-            scratch_org.valid_target_directories, _ = get_valid_target_directories(
-                user,
-                scratch_org,
-                repo_root,
-            )
+        (
+            scratch_org.valid_target_directories,
+            _,
+        ) = get_cached_valid_target_directories(scratch_org.owner, scratch_org)
         scratch_org.unsaved_changes = unsaved_changes
     except Exception as e:
         scratch_org.refresh_from_db()
@@ -590,20 +686,47 @@ def refresh_github_repositories_for_user(user):
     from .models import GitHubRepository
 
     try:
-        repos = get_all_org_repos(user)
-        with transaction.atomic():
-            GitHubRepository.objects.filter(user=user).delete()
-            GitHubRepository.objects.bulk_create(
-                [
-                    GitHubRepository(
-                        user=user,
-                        repo_id=repo.id,
-                        repo_url=repo.html_url,
-                        permissions=repo.permissions,
-                    )
-                    for repo in repos
-                ]
-            )
+        repos, etag = get_all_org_repos(user)
+        etag_key = f"gh_repositories_etag_{user.id}"
+        if etag is None or cache.get(etag_key) != etag:
+            fetched = {repo.id: repo for repo in repos}
+            with transaction.atomic():
+                stored = {
+                    repository.repo_id: repository
+                    for repository in GitHubRepository.objects.select_for_update()
+                    .filter(user=user)
+                    .order_by("id")
+                }
+                GitHubRepository.objects.filter(
+                    user=user, repo_id__in=stored.keys() - fetched.keys()
+                ).delete()
+                GitHubRepository.objects.bulk_create(
+                    [
+                        GitHubRepository(
+                            user=user,
+                            repo_id=repo.id,
+                            repo_url=repo.html_url,
+                            permissions=repo.permissions,
+                        )
+                        for repo_id, repo in fetched.items()
+                        if repo_id not in stored
+                    ]
+                )
+                changed = []
+                for repo_id, repository in stored.items():
+                    repo = fetched.get(repo_id)
+                    if repo is not None and (
+                        repository.repo_url != repo.html_url
+                        or repository.permissions != repo.permissions
+                    ):
+                        repository.repo_url = repo.html_url
+                        repository.permissions = repo.permissions
+                        changed.append(repository)
+                GitHubRepository.objects.bulk_update(
+                    changed, fields=["repo_url", "permissions"]
+                )
+            if etag is not None:
+                cache.set(etag_key, etag, timeout=GITHUB_REPOSITORIES_ETAG_TIMEOUT)
     except Exception as e:
         user.finalize_refresh_repositories(error=e)
         tb = traceback.format_exc()
@@ -639,8 +762,6 @@ def get_social_image(*, project):
 get_social_image_job = job(get_social_image)
 
 
-# This avoids partially-applied saving:
-@transaction.atomic
 def refresh_commits(*, project, branch_name, originating_user_id):
     """
     This should only run when we're notified of a force-commit. It's the
@@ -651,72 +772,153 @@ def refresh_commits(*, project, branch_name, originating_user_id):
     repo = get_repo_info(
         None, repo_owner=project.repo_owner, repo_name=project.repo_name
     )
-    # We get this as a GitHubIterator, but we want to slice it later, so
-    # we will convert it to a list.
-    # We limit it to 1000 commits to avoid hammering the API, and on the
-    # assumption that we will find the origin of the task branch within
-    # that limit.
-    commits = list(repo.commits(repo.branch(branch_name).latest_sha(), number=1000))
-
-    if project.branch_name == branch_name:
-        project.latest_sha = commits[0].sha if commits else ""
-        project.finalize_project_update(originating_user_id=originating_user_id)
-
-    epics = Epic.objects.filter(project=project, branch_name=branch_name)
-    for epic in epics:
-        epic.latest_sha = commits[0].sha if commits else ""
-        epic.finalize_epic_update(originating_user_id=originating_user_id)
-
-    tasks = Task.objects.filter(
-        Q(project=project, branch_name=branch_name)
-        | Q(epic__project=project, branch_name=branch_name)
+    head_sha = repo.branch(branch_name).commit.sha
+
+    tasks = list(
+        Task.objects.filter(
+            Q(project=project, branch_name=branch_name)
+            | Q(epic__project=project, branch_name=branch_name)
+        ).select_related("epic", "project")
     )
-    for task in tasks:
-        origin_sha_index = [commit.sha for commit in commits].index(task.origin_sha)
-        task.commits = [
-            normalize_commit(commit) for commit in commits[:origin_sha_index]
-        ]
-        task.update_has_unmerged_commits()
-        task.update_review_valid()
-        task.finalize_task_update(originating_user_id=originating_user_id)
+    comparisons = [repo.compare_commits(task.origin_sha, head_sha) for task in tasks]
+    task_commits = [(comparison.commits or [])[::-1] for comparison in comparisons]
+    # GitHub only includes 250 commits in a comparison, so find the rest in the
+    # branch's history. One listing, long enough for every truncated Task, is
+    # shared between them:
+    history_length = max(
+        (
+            comparison.total_commits
+            for comparison, commits in zip(comparisons, task_commits)
+            if comparison.total_commits > len(commits)
+        ),
+        default=0,
+    )
+    if history_length:
+        history = list(repo.commits(head_sha, number=history_length + 1))
+        positions = {commit.sha: i for i, commit in enumerate(history)}
+        for i, (task, comparison) in enumerate(zip(tasks, comparisons)):
+            truncated = comparison.total_commits > len(task_commits[i])
+            if truncated and task.origin_sha in positions:
+                task_commits[i] = history[: positions[task.origin_sha]]
+    task_commits = [
+        [normalize_commit(commit) for commit in commits] for commits in task_commits
+    ]
+    Task.update_has_unmerged_commits_for(tasks)
+
+    # All GitHub calls are done; save everything at once, so a failure doesn't
+    # leave partially-applied changes:
+    with transaction.atomic():
+        if project.branch_name == branch_name:
+            project.latest_sha = head_sha
+            project.finalize_project_update(originating_user_id=originating_user_id)
+
+        epics = Epic.objects.filter(project=project, branch_name=branch_name)
+        for epic in epics:
+            epic.latest_sha = head_sha
+            epic.finalize_epic_update(originating_user_id=originating_user_id)
+
+        for task, commits in zip(tasks, task_commits):
+            task.set_commits(commits)
+            task.update_review_valid()
+            task.finalize_task_update(originating_user_id=originating_user_id)
 
 
 refresh_commits_job = job(refresh_commits)
 
 
+@contextlib.contextmanager
+def _advisory_lock(key):
+    """
+    Try to take a Postgres session-level advisory lock on `key`, without
+    waiting or opening a transaction. Yields whether it was taken.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [key])
+        (acquired,) = cursor.fetchone()
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [key])
+
+
+def process_github_webhooks(*, repo_id):
+    """
+    Process a repository's stored webhook deliveries, oldest first. A
+    per-repository advisory lock keeps concurrent jobs for the same repository
+    from overtaking each other; the deliveries themselves are processed outside
+    of any transaction.
+    """
+    deliveries = GitHubWebhook.objects.filter(repo_id=repo_id)
+    while deliveries.filter(status=GitHubWebhookStatus.PENDING).exists():
+        with _advisory_lock(repo_id or 0) as acquired:
+            if not acquired:
+                # The job holding the lock checks for new deliveries after
+                # releasing it, so it picks ours up:
+                return
+            while True:
+                # Deliveries left processing by a job that died are retried:
+                webhook = (
+                    deliveries.filter(
+                        status__in=(
+                            GitHubWebhookStatus.PENDING,
+                            GitHubWebhookStatus.PROCESSING,
+                        )
+                    )
+                    .order_by("created_at", "id")
+                    .first()
+                )
+                if webhook is None:
+                    break
+                webhook.status = GitHubWebhookStatus.PROCESSING
+                webhook.save(update_fields=["status"])
+                webhook.process()
+
+
+process_github_webhooks_job = job("hooks")(process_github_webhooks)
+
+
+def get_expanded_collaborators(repo):
+    collaborators = [
+        {
+            "id": str(collaborator.id),
+            "login": collaborator.login,
+            "avatar_url": collaborator.avatar_url,
+            "permissions": collaborator.permissions,
+        }
+        for collaborator in repo.collaborators()
+    ]
+
+    # Retrieve additional information for each user by querying GitHub
+    gh = GitHub(repo)
+    expanded_users = []
+    for user in collaborators:
+        try:
+            full_user = get_cached_user(gh, user["login"])
+            expanded = {**user, "name": full_user.name}
+        except Exception:
+            logger.exception(f"Failed to expand GitHub user {user['login']}")
+            expanded = user
+        expanded_users.append(expanded)
+    return expanded_users
+
+
 def refresh_github_users(project, *, originating_user_id):
     try:
         project.refresh_from_db()
         repo = get_repo_info(
             None, repo_owner=project.repo_owner, repo_name=project.repo_name
         )
-        project.github_users = list(
-            sorted(
-                [
-                    {
-                        "id": str(collaborator.id),
-                        "login": collaborator.login,
-                        "avatar_url": collaborator.avatar_url,
-                        "permissions": collaborator.permissions,
-                    }
-                    for collaborator in repo.collaborators()
-                ],
-                key=lambda x: x["login"].lower(),
+        try:
+            github_users = get_collaborators(repo)
+        except Exception:
+            logger.exception(
+                f"Failed to list collaborators of {repo} with GraphQL, "
+                "falling back to REST"
             )
-        )
-
-        # Retrieve additional information for each user by querying GitHub
-        gh = GitHub(repo)
-        expanded_users = []
-        for user in project.github_users:
-            try:
-                full_user = get_cached_user(gh, user["login"])
-                expanded = {**user, "name": full_user.name}
-            except Exception:
-                logger.exception(f"Failed to expand GitHub user {user['login']}")
-                expanded = user
-            expanded_users.append(expanded)
-        project.github_users = expanded_users
+            github_users = get_expanded_collaborators(repo)
+        project.github_users = sorted(github_users, key=lambda x: x["login"].lower())
 
     except Exception as e:
         project.finalize_refresh_github_users(
@@ -739,32 +941,74 @@ def refresh_github_issues(project, *, originating_user_id):
             None, repo_owner=project.repo_owner, repo_name=project.repo_name
         )
 
+        if project.issues_updated_at is None:
+            # First refresh: the most recently active open issues
+            issues = repo.issues(state="open", sort="updated", direction="desc")
+        else:
+            # Later refreshes: whatever changed since, oldest change first so a
+            # truncated refresh picks up where it stopped next time
+            issues = repo.issues(
+                state="all",
+                sort="updated",
+                direction="asc",
+                since=project.issues_updated_at,
+            )
+
         # Unfortunately the GitHub API includes pull requests when querying for issues,
         # and we can't filter them out in the request. Instead we manually filter out
         # pull requests until we have enough issues.
-        project.has_truncated_issues = True
-        issues = repo.issues()
-        count = 0
-        while count < settings.GITHUB_ISSUE_LIMIT:
+        truncated = True
+        updated_at = project.issues_updated_at
+        fetched = {}
+        while len(fetched) < settings.GITHUB_ISSUE_LIMIT:
             try:
                 issue = next(issues)
             except StopIteration:
-                project.has_truncated_issues = False
+                truncated = False
                 break
+            updated_at = max(filter(None, (updated_at, issue.updated_at)))
             if issue.pull_request_urls is not None:
                 continue  # Issue is actually a pull request, skip
-            project.issues.update_or_create(
+            fetched[issue.id] = GitHubIssue(
+                project=project,
                 github_id=issue.id,
-                defaults={
-                    "title": issue.title,
-                    "number": issue.number,
-                    "state": issue.state,
-                    "html_url": issue.html_url,
-                    "created_at": issue.created_at,
-                    "updated_at": issue.updated_at,
-                },
+                title=issue.title,
+                number=issue.number,
+                state=issue.state,
+                html_url=issue.html_url,
+                created_at=issue.created_at,
+                updated_at=issue.updated_at,
+            )
+
+        with transaction.atomic():
+            existing = project.issues.filter(github_id__in=fetched).in_bulk(
+                field_name="github_id"
+            )
+            for github_id, issue in existing.items():
+                fetched[github_id].id = issue.id
+            GitHubIssue.objects.bulk_update(
+                [fetched[github_id] for github_id in existing],
+                fields=[
+                    "title",
+                    "number",
+                    "state",
+                    "html_url",
+                    "created_at",
+                    "updated_at",
+                ],
             )
-            count += 1
+            # An incremental refresh also sees issues closed since the last one;
+            # those we never stored don't need to be, as they can't be attached:
+            GitHubIssue.objects.bulk_create(
+                [
+                    issue
+                    for github_id, issue in fetched.items()
+                    if github_id not in existing and issue.state == IssueStates.OPEN
+                ]
+            )
+        if project.issues_updated_at is None or truncated:
+            project.has_truncated_issues = truncated
+        project.issues_updated_at = updated_at
 
     except Exception as e:
         project.finalize_refresh_github_issues(
@@ -780,6 +1024,67 @@ def refresh_github_issues(project, *, originating_user_id):
 refresh_github_issues_job = job(refresh_github_issues)
 
 
+def refresh_github_branches(project):
+    """
+    Rebuild a Project's GitHubBranch index from GitHub. Webhooks keep it
+    current; this catches any deliveries we missed.
+    """
+    repo = get_repo_info(
+        None, repo_owner=project.repo_owner, repo_name=project.repo_name
+    )
+    names = {
+        branch.name for branch in repo.branches() if branch.name != repo.default_branch
+    }
+    with transaction.atomic():
+        project.branches.exclude(name__in=names).delete()
+        GitHubBranch.objects.bulk_create(
+            [GitHubBranch(project=project, name=name) for name in names],
+            ignore_conflicts=True,
+        )
+        project.branches_updated_at = now()
+        project.save(update_fields=["branches_updated_at"])
+
+
+refresh_github_branches_job = job(refresh_github_branches)
+
+
+def populate_project_repo_ids():
+    """
+    Look up the GitHub repository ID of Projects that don't have one yet. Those
+    that fail are skipped for a while, backing off exponentially.
+    """
+    from .models import Project
+
+    for project in Project.objects.filter(repo_id__isnull=True):
+        backoff_key = f"gh_repo_id_backoff_{project.id}"
+        backoff = cache.get(backoff_key)
+        if backoff and backoff["retry_at"] > now():
+            continue
+        try:
+            project.get_repo_id()
+        except (ResponseError, ConnectionError) as e:
+            failures = backoff["failures"] + 1 if backoff else 1
+            delay = min(REPO_ID_BACKOFF_MIN * 2 ** (failures - 1), REPO_ID_BACKOFF_MAX)
+            logger.info(
+                f"Couldn't get the repository ID of {project.repo_owner}/"
+                f"{project.repo_name}, retrying in {delay} seconds: {e}"
+            )
+            cache.set(
+                backoff_key,
+                {
+                    "failures": failures,
+                    "retry_at": now() + timedelta(seconds=delay),
+                },
+                # Remember the failure count past the retry, so it keeps growing
+                timeout=REPO_ID_BACKOFF_MAX * 2,
+            )
+        else:
+            cache.delete(backoff_key)
+
+
+populate_project_repo_ids_job = job(populate_project_repo_ids)
+
+
 def submit_review(*, user, task, data, originating_user_id):
     try:
         review_sha = ""
@@ -932,8 +1237,8 @@ def available_org_config_names(project, *, user):
             repo_owner=project.repo_owner,
             repo_name=project.repo_name,
         )
-        with local_github_checkout(user, repo_id) as repo_root:
-            config = get_project_config(
+        with local_github_checkout(user, repo_id, light=True) as repo_root:
+            config = get_project_config_values(
                 repo_root=repo_root,
                 repo_name=repo.name,
                 repo_url=repo.html_url,
@@ -942,7 +1247,8 @@ def available_org_config_names(project, *, user):
                 repo_commit=repo.branch(repo.default_branch).latest_sha(),
             )
             project.org_config_names = [
-                {"key": key, **value} for key, value in config.orgs__scratch.items()
+                {"key": key, **value}
+                for key, value in config["scratch_org_configs"].items()
             ]
     except Exception:
         project.finalize_available_org_config_names(
@@ -960,16 +1266,21 @@ def available_org_config_names(project, *, user):
 available_org_config_names_job = job(available_org_config_names)
 
 
-def user_reassign(scratch_org, *, new_user, originating_user_id):
-    try:
-        scratch_org.refresh_from_db()
-        scratch_org.owner = new_user
-        org_config = scratch_org.get_refreshed_org_config()
-        username = org_config.username
+def _reassign_org_user(scratch_org, *, new_user):
+    scratch_org.owner = new_user
+    org_config = scratch_org.get_refreshed_org_config()
+    username = org_config.username
+    with invalidate_org_token_on_401(org_config.org_id):
         org_config.salesforce_client.User.update(
             f"Username/{username}",
             {"Email": new_user.email},
         )
+
+
+def user_reassign(scratch_org, *, new_user, originating_user_id):
+    try:
+        scratch_org.refresh_from_db()
+        _reassign_org_user(scratch_org, new_user=new_user)
     except Exception as err:
         scratch_org.finalize_reassign(
             error=err, originating_user_id=originating_user_id
@@ -979,3 +1290,49 @@ def user_reassign(scratch_org, *, new_user, originating_user_id):
 
 
 user_reassign_job = job(user_reassign)
+
+
+def fill_scratch_org_pool(pool):
+    """
+    Recycle pooled orgs that are too old or not at the head of the Project's
+    default branch, then start provisioning enough new ones to get back to
+    `pool.size`.
+    """
+    pool.refresh_from_db()
+    project = pool.project
+    repository = get_repo_info(pool.owner, repo_id=project.get_repo_id())
+    head_sha = repository.branch(project.branch_name).commit.sha
+
+    orgs = pool.orgs.active().filter(delete_queued_at__isnull=True)
+    stale = orgs.filter(is_created=True).filter(
+        ~Q(latest_commit=head_sha)
+        | Q(
+            created_at__lt=now()
+            - timedelta(days=settings.SCRATCH_ORG_POOL_MAX_AGE_DAYS)
+        )
+    )
+    recycled = 0
+    for scratch_org in stale:
+        scratch_org.queue_delete(originating_user_id=None)
+        recycled += 1
+    if recycled:
+        ScratchOrgPool.objects.filter(pk=pool.pk).update(
+            recycled=F("recycled") + recycled
+        )
+
+    # Orgs still provisioning count towards the pool, so repeated fills
+    # don't overshoot:
+    missing = pool.size - orgs.count()
+    for _i in range(max(missing, 0)):
+        ScratchOrg.objects.create(
+            pool=pool,
+            project=project,
+            owner=pool.owner,
+            org_type=ScratchOrgType.PLAYGROUND,
+            org_config_name=pool.org_config_name,
+        )
+    pool.last_filled_at = now()
+    pool.save(update_fields=["last_filled_at", "edited_at"])
+
+
+fill_scratch_org_pool_job = job(fill_scratch_org_pool)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from ...models import ScratchOrgPool
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue jobs to recycle stale pre-provisioned scratch orgs and top up "
+        "every scratch org pool. Meant to run periodically."
+    )
+
+    def handle(self, *args, **options):
+        pools = ScratchOrgPool.objects.all()
+        for pool in pools:
+            pool.queue_fill()
+        self.stdout.write(f"Queued fills for {len(pools)} scratch org pools.")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from ...jobs import populate_project_repo_ids_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue a job to look up the GitHub repository IDs of Projects that don't "
+        "have one yet. Meant to run periodically."
+    )
+
+    def handle(self, *args, **options):
+        populate_project_repo_ids_job.delay()
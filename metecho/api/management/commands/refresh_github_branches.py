@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from ...models import Project
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue jobs to rebuild the branch index of every Project from GitHub, "
+        "catching any branch webhooks that were missed. Meant to run periodically."
+    )
+
+    def handle(self, *args, **options):
+        projects = Project.objects.filter(repo_id__isnull=False)
+        for project in projects:
+            project.queue_refresh_github_branches()
+        self.stdout.write(f"Queued branch refreshes for {len(projects)} Projects.")
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from ...jobs import process_github_webhooks_job
+from ...models import GitHubWebhook, GitHubWebhookStatus
+
+
+class Command(BaseCommand):
+    help = "Process stored GitHub webhook deliveries again."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "delivery_ids",
+            nargs="*",
+            help="X-GitHub-Delivery IDs to replay. Defaults to all failed deliveries.",
+        )
+
+    def handle(self, *args, delivery_ids, **options):
+        if delivery_ids:
+            webhooks = GitHubWebhook.objects.filter(delivery_id__in=delivery_ids)
+        else:
+            webhooks = GitHubWebhook.objects.filter(status=GitHubWebhookStatus.FAILED)
+        repo_ids = set(webhooks.values_list("repo_id", flat=True))
+        count = webhooks.update(status=GitHubWebhookStatus.PENDING, error="")
+        for repo_id in repo_ids:
+            process_github_webhooks_job.delay(repo_id=repo_id)
+        self.stdout.write(f"Queued {count} GitHub webhook deliveries.")
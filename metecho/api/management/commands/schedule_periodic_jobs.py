@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django_rq import get_scheduler
+
+JOB_ID_PREFIX = "periodic-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Register the management commands in settings.PERIODIC_JOBS with "
+        "rqscheduler, replacing any earlier registrations. Run on every release."
+    )
+
+    def handle(self, *args, **options):
+        scheduler = get_scheduler("default")
+        for job in scheduler.get_jobs():
+            if job.id.startswith(JOB_ID_PREFIX):
+                scheduler.cancel(job)
+        for command, cron_string in settings.PERIODIC_JOBS.items():
+            if not cron_string:
+                continue
+            scheduler.cron(
+                cron_string,
+                func=call_command,
+                args=[command],
+                id=f"{JOB_ID_PREFIX}{command}",
+                queue_name="default",
+            )
+            self.stdout.write(f"Scheduled {command}: {cron_string}")
@@ -0,0 +1,14 @@
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+def test_fill_scratch_org_pools(mocker, scratch_org_pool_factory):
+    fill_scratch_org_pool_job = mocker.patch(
+        "metecho.api.jobs.fill_scratch_org_pool_job"
+    )
+    pool = scratch_org_pool_factory()
+
+    call_command("fill_scratch_org_pools")
+
+    fill_scratch_org_pool_job.delay.assert_called_once_with(pool)
@@ -0,0 +1,12 @@
+from django.core.management import call_command
+
+
+def test_populate_project_repo_ids(mocker):
+    populate_project_repo_ids_job = mocker.patch(
+        "metecho.api.management.commands.populate_project_repo_ids."
+        "populate_project_repo_ids_job"
+    )
+
+    call_command("populate_project_repo_ids")
+
+    assert populate_project_repo_ids_job.delay.called
@@ -0,0 +1,15 @@
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+def test_refresh_github_branches(mocker, project_factory):
+    refresh_github_branches_job = mocker.patch(
+        "metecho.api.jobs.refresh_github_branches_job"
+    )
+    project = project_factory(repo_id=123)
+    project_factory(repo_id=None)
+
+    call_command("refresh_github_branches")
+
+    refresh_github_branches_job.delay.assert_called_once_with(project)
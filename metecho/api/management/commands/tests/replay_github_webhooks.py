@@ -0,0 +1,49 @@
+import pytest
+from django.core.management import call_command
+
+from ....models import GitHubWebhook, GitHubWebhookStatus
+
+
+@pytest.mark.django_db
+def test_replay_github_webhooks(mocker):
+    module_name = "metecho.api.management.commands.replay_github_webhooks"
+    process_github_webhooks_job = mocker.patch(
+        f"{module_name}.process_github_webhooks_job"
+    )
+    failed = GitHubWebhook.objects.create(
+        event="push",
+        repo_id=123,
+        payload={},
+        status=GitHubWebhookStatus.FAILED,
+        error="Oh no!",
+    )
+    processed = GitHubWebhook.objects.create(
+        event="push", repo_id=456, payload={}, status=GitHubWebhookStatus.PROCESSED
+    )
+
+    call_command("replay_github_webhooks")
+
+    failed.refresh_from_db()
+    processed.refresh_from_db()
+    assert failed.status == GitHubWebhookStatus.PENDING
+    assert failed.error == ""
+    assert processed.status == GitHubWebhookStatus.PROCESSED
+    process_github_webhooks_job.delay.assert_called_once_with(repo_id=123)
+
+
+@pytest.mark.django_db
+def test_replay_github_webhooks__delivery_ids(mocker):
+    module_name = "metecho.api.management.commands.replay_github_webhooks"
+    mocker.patch(f"{module_name}.process_github_webhooks_job")
+    webhook = GitHubWebhook.objects.create(
+        event="push",
+        delivery_id="abc",
+        repo_id=123,
+        payload={},
+        status=GitHubWebhookStatus.PROCESSED,
+    )
+
+    call_command("replay_github_webhooks", "abc")
+
+    webhook.refresh_from_db()
+    assert webhook.status == GitHubWebhookStatus.PENDING
@@ -0,0 +1,21 @@
+from unittest.mock import MagicMock
+
+from django.core.management import call_command
+
+
+def test_schedule_periodic_jobs(mocker, settings):
+    settings.PERIODIC_JOBS = {"first": "*/5 * * * *", "disabled": ""}
+    get_scheduler = mocker.patch(
+        "metecho.api.management.commands.schedule_periodic_jobs.get_scheduler"
+    )
+    scheduler = get_scheduler.return_value
+    stale = MagicMock(id="periodic-removed")
+    scheduler.get_jobs.return_value = [stale, MagicMock(id="expiry-job")]
+
+    call_command("schedule_periodic_jobs")
+
+    scheduler.cancel.assert_called_once_with(stale)
+    scheduler.cron.assert_called_once()
+    assert scheduler.cron.call_args.args == ("*/5 * * * *",)
+    assert scheduler.cron.call_args.kwargs["args"] == ["first"]
+    assert scheduler.cron.call_args.kwargs["id"] == "periodic-first"
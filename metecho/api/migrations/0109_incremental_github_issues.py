@@ -0,0 +1,51 @@
+# Generated by Django 4.0 on 2026-10-18 12:00
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remove_duplicate_issues(apps, schema_editor):
+    """
+    Keep one GitHubIssue per project and GitHub ID, preferring the one attached
+    to an Epic or Task.
+    """
+    GitHubIssue = apps.get_model("api", "GitHubIssue")
+
+    duplicates = (
+        GitHubIssue.objects.values("project", "github_id")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        issues = GitHubIssue.objects.filter(
+            project=duplicate["project"], github_id=duplicate["github_id"]
+        ).order_by("id")
+        keep = next(
+            (
+                issue
+                for issue in issues
+                if hasattr(issue, "epic") or hasattr(issue, "task")
+            ),
+            issues[0],
+        )
+        issues.exclude(id=keep.id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0108_project_has_truncated_issues"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="issues_updated_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(remove_duplicate_issues, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name="githubissue",
+            unique_together={("project", "github_id")},
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.0 on 2026-10-18 12:00
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0109_incremental_github_issues"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="githubissue",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"],
+                name="githubissue_title_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="githubissue",
+            index=models.Index(
+                fields=["project", "number"], name="githubissue_project_number"
+            ),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.0 on 2026-10-18 12:00
+
+import hashid_field.field
+import sfdo_template_helpers.fields.string
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0110_githubissue_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GitHubWebhook",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("edited_at", models.DateTimeField(auto_now=True)),
+                (
+                    "id",
+                    hashid_field.field.HashidAutoField(
+                        alphabet="abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890",  # noqa
+                        min_length=7,
+                        prefix="",
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("event", sfdo_template_helpers.fields.string.StringField()),
+                (
+                    "delivery_id",
+                    sfdo_template_helpers.fields.string.StringField(blank=True),
+                ),
+                ("repo_id", models.IntegerField(blank=True, null=True)),
+                ("payload", models.JSONField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("processed", "Processed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+            ],
+            options={
+                "verbose_name": "GitHub webhook",
+                "ordering": ("-created_at",),
+            },
+        ),
+        migrations.AddIndex(
+            model_name="githubwebhook",
+            index=models.Index(
+                fields=["repo_id", "status"], name="githubwebhook_repo_status"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0111_githubwebhook"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="githubwebhook",
+            name="processed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="githubwebhook",
+            name="processing_time",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
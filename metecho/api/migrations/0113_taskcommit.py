@@ -0,0 +1,204 @@
+# Generated by Django 4.0 on 2026-10-18 12:00
+
+import django.db.models.deletion
+import sfdo_template_helpers.fields.string
+from django.db import migrations, models
+
+
+def author_key(commit):
+    author = commit.get("author") or {}
+    return (
+        author.get("name", ""),
+        author.get("email", ""),
+        author.get("username", ""),
+        author.get("avatar_url", ""),
+    )
+
+
+def commits_to_rows(apps, schema_editor):
+    Task = apps.get_model("api", "Task")
+    TaskCommit = apps.get_model("api", "TaskCommit")
+    GitHubCommitAuthor = apps.get_model("api", "GitHubCommitAuthor")
+
+    authors = {}
+    for task in Task.objects.exclude(commits=[]).only("id", "commits").iterator():
+        commits = [
+            commit
+            for commit in task.commits
+            if isinstance(commit, dict) and "id" in commit
+        ]
+        rows = []
+        # Stored newest first; positions count up from the oldest commit:
+        for i, commit in enumerate(commits):
+            author = None
+            if commit.get("author"):
+                key = author_key(commit)
+                if key not in authors:
+                    name, email, username, avatar_url = key
+                    authors[key], _ = GitHubCommitAuthor.objects.get_or_create(
+                        name=name, email=email, username=username, avatar_url=avatar_url
+                    )
+                author = authors[key]
+            rows.append(
+                TaskCommit(
+                    task=task,
+                    position=len(commits) - i - 1,
+                    sha=commit["id"],
+                    timestamp=commit.get("timestamp", ""),
+                    author=author,
+                    message=commit.get("message", ""),
+                    url=commit.get("url", ""),
+                )
+            )
+        TaskCommit.objects.bulk_create(rows)
+        Task.objects.filter(id=task.id).update(commit_count=len(commits))
+
+
+def rows_to_commits(apps, schema_editor):
+    Task = apps.get_model("api", "Task")
+    TaskCommit = apps.get_model("api", "TaskCommit")
+
+    for task in Task.objects.filter(commit_count__gt=0).iterator():
+        task.commits = [
+            {
+                "id": commit.sha,
+                "timestamp": commit.timestamp,
+                "author": {
+                    "name": commit.author.name,
+                    "email": commit.author.email,
+                    "username": commit.author.username,
+                    "avatar_url": commit.author.avatar_url,
+                }
+                if commit.author
+                else {},
+                "message": commit.message,
+                "url": commit.url,
+            }
+            for commit in TaskCommit.objects.filter(task=task)
+            .select_related("author")
+            .order_by("-position")
+        ]
+        task.save(update_fields=["commits"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0112_githubwebhook_latency"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GitHubCommitAuthor",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    sfdo_template_helpers.fields.string.StringField(
+                        blank=True, default=""
+                    ),
+                ),
+                (
+                    "email",
+                    sfdo_template_helpers.fields.string.StringField(
+                        blank=True, default=""
+                    ),
+                ),
+                (
+                    "username",
+                    sfdo_template_helpers.fields.string.StringField(
+                        blank=True, default=""
+                    ),
+                ),
+                (
+                    "avatar_url",
+                    sfdo_template_helpers.fields.string.StringField(
+                        blank=True, default=""
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "GitHub commit author",
+                "verbose_name_plural": "GitHub commit authors",
+                "unique_together": {("name", "email", "username", "avatar_url")},
+            },
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="commit_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="TaskCommit",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("position", models.PositiveIntegerField()),
+                ("sha", sfdo_template_helpers.fields.string.StringField()),
+                (
+                    "timestamp",
+                    sfdo_template_helpers.fields.string.StringField(
+                        blank=True, default=""
+                    ),
+                ),
+                ("message", models.TextField(blank=True, default="")),
+                (
+                    "url",
+                    sfdo_template_helpers.fields.string.StringField(
+                        blank=True, default=""
+                    ),
+                ),
+                (
+                    "author",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="commits",
+                        to="api.githubcommitauthor",
+                    ),
+                ),
+                (
+                    "task",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="task_commits",
+                        to="api.task",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-position",),
+                "unique_together": {("task", "position")},
+            },
+        ),
+        migrations.RunPython(commits_to_rows, rows_to_commits),
+        migrations.RemoveField(
+            model_name="task",
+            name="commits",
+        ),
+        migrations.AlterField(
+            model_name="taskcommit",
+            name="task",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="commits",
+                to="api.task",
+            ),
+        ),
+    ]
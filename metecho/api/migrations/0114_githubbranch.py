@@ -0,0 +1,49 @@
+# Generated by Django 4.0 on 2026-10-18 12:00
+
+import django.db.models.deletion
+import sfdo_template_helpers.fields.string
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0113_taskcommit"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="branches_updated_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="GitHubBranch",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", sfdo_template_helpers.fields.string.StringField()),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="branches",
+                        to="api.project",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "GitHub branch",
+                "verbose_name_plural": "GitHub branches",
+                "ordering": ("name",),
+                "unique_together": {("project", "name")},
+            },
+        ),
+    ]
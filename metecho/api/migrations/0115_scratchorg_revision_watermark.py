@@ -0,0 +1,28 @@
+# Generated by Django 4.0 on 2026-10-18 12:00
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0114_githubbranch"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scratchorg",
+            name="org_revision_numbers",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                encoder=django.core.serializers.json.DjangoJSONEncoder,
+            ),
+        ),
+        migrations.AddField(
+            model_name="scratchorg",
+            name="max_revision_counter",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
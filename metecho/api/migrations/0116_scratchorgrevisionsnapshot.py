@@ -0,0 +1,90 @@
+# Generated by Django 4.0 on 2026-10-18 12:00
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fields_to_snapshots(apps, schema_editor):
+    ScratchOrg = apps.get_model("api", "ScratchOrg")
+    ScratchOrgRevisionSnapshot = apps.get_model("api", "ScratchOrgRevisionSnapshot")
+
+    rows = (
+        ScratchOrg.objects.exclude(latest_revision_numbers={}, org_revision_numbers={})
+        .values_list("id", "latest_revision_numbers", "org_revision_numbers")
+        .iterator()
+    )
+    batch = []
+    for id_, latest_revision_numbers, org_revision_numbers in rows:
+        batch.append(
+            ScratchOrgRevisionSnapshot(
+                scratch_org_id=id_,
+                latest_revision_numbers=latest_revision_numbers,
+                org_revision_numbers=org_revision_numbers,
+            )
+        )
+        if len(batch) >= 500:
+            ScratchOrgRevisionSnapshot.objects.bulk_create(batch)
+            batch = []
+    ScratchOrgRevisionSnapshot.objects.bulk_create(batch)
+
+
+def snapshots_to_fields(apps, schema_editor):
+    ScratchOrg = apps.get_model("api", "ScratchOrg")
+    ScratchOrgRevisionSnapshot = apps.get_model("api", "ScratchOrgRevisionSnapshot")
+
+    for snapshot in ScratchOrgRevisionSnapshot.objects.iterator():
+        ScratchOrg.objects.filter(id=snapshot.scratch_org_id).update(
+            latest_revision_numbers=snapshot.latest_revision_numbers,
+            org_revision_numbers=snapshot.org_revision_numbers,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0115_scratchorg_revision_watermark"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScratchOrgRevisionSnapshot",
+            fields=[
+                (
+                    "scratch_org",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="revision_snapshot",
+                        serialize=False,
+                        to="api.scratchorg",
+                    ),
+                ),
+                (
+                    "latest_revision_numbers",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                    ),
+                ),
+                (
+                    "org_revision_numbers",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(fields_to_snapshots, snapshots_to_fields),
+        migrations.RemoveField(
+            model_name="scratchorg",
+            name="latest_revision_numbers",
+        ),
+        migrations.RemoveField(
+            model_name="scratchorg",
+            name="org_revision_numbers",
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.0 on 2026-10-18 12:00
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0117_scratchorgpool"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="githubissue",
+            name="githubissue_title_trgm",
+        ),
+        migrations.AddIndex(
+            model_name="githubissue",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("title"),
+                    name="gin_trgm_ops",
+                ),
+                name="githubissue_upper_title_trgm",
+            ),
+        ),
+    ]
@@ -48,6 +48,35 @@ class PopulateRepoIdMixin:
         return self.repo_id
 
 
+class PrefetchedSlugMixin:
+    """
+    Mix in before SlugMixin. Lets a queryset prefetch the active slugs of many
+    objects at once (see `prefetch_active_slugs`) rather than each object
+    querying its own.
+    """
+
+    @property
+    def slug(self):
+        if "active_slugs" in self.__dict__:
+            return self.active_slugs[0].slug if self.active_slugs else None
+        return super().slug
+
+    @property
+    def old_slugs(self):
+        if "active_slugs" in self.__dict__:
+            return [slug.slug for slug in self.active_slugs[1:]]
+        return super().old_slugs
+
+
+def prefetch_active_slugs(slug_class, lookup="slugs"):
+    # Newest first, like SlugMixin:
+    return models.Prefetch(
+        lookup,
+        queryset=slug_class.objects.filter(is_active=True).order_by("-created_at"),
+        to_attr="active_slugs",
+    )
+
+
 class PushMixin:
     """
     Expects the following attributes:
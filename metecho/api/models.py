@@ -1,5 +1,7 @@
 import html
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
 from datetime import timedelta
 from typing import Dict, Optional, Tuple
@@ -11,11 +13,13 @@ from cryptography.fernet import InvalidToken
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import UserManager as BaseUserManager
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.contrib.sites.models import Site
 from django.core.exceptions import ValidationError
 from django.core.mail import send_mail
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models, transaction
+from django.db.models.functions import Upper
 from django.db.models.query_utils import Q
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -24,6 +28,7 @@ from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
+from github3.exceptions import NotFoundError
 from model_utils import FieldTracker
 from parler.models import TranslatableModel, TranslatedFields
 from requests.exceptions import HTTPError
@@ -39,6 +44,7 @@ from .model_mixins import (
     CreatePrMixin,
     HashIdMixin,
     PopulateRepoIdMixin,
+    PrefetchedSlugMixin,
     PushMixin,
     SoftDeleteMixin,
     TimestampsMixin,
@@ -48,6 +54,9 @@ from .validators import validate_unicode_branch
 
 logger = logging.getLogger(__name__)
 
+# Threads comparing branches on GitHub in Task.update_has_unmerged_commits_for:
+UNMERGED_COMMITS_WORKERS = 4
+
 
 class OrgType(models.TextChoices):
     PRODUCTION = "Production"
@@ -86,6 +95,13 @@ class IssueStates(models.TextChoices):
     CLOSED = "closed"
 
 
+class GitHubWebhookStatus(models.TextChoices):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    PROCESSED = "processed"
+    FAILED = "failed"
+
+
 class SiteProfile(TranslatableModel):
     site = models.OneToOneField(Site, on_delete=models.CASCADE)
 
@@ -301,11 +317,29 @@ class ProjectSlug(AbstractSlug):
     )
 
 
+class ProjectQuerySet(models.QuerySet):
+    def with_push_permission(self, user):
+        """
+        Annotate `user_has_push_permission`, the result of has_push_permission
+        for `user`, so it isn't queried per Project.
+        """
+        return self.annotate(
+            user_has_push_permission=models.Exists(
+                GitHubRepository.objects.filter(
+                    user=user,
+                    repo_id=models.OuterRef("repo_id"),
+                    permissions__push=True,
+                )
+            )
+        )
+
+
 class Project(
     PushMixin,
     PopulateRepoIdMixin,
     HashIdMixin,
     TimestampsMixin,
+    PrefetchedSlugMixin,
     SlugMixin,
     models.Model,
 ):
@@ -314,6 +348,9 @@ class Project(
     name = StringField(unique=True)
     description = MarkdownField(blank=True, property_suffix="_markdown")
     has_truncated_issues = models.BooleanField(default=False)
+    # Latest `updated_at` of the GitHub issues we've fetched, so refreshes only
+    # ask for issues that changed since:
+    issues_updated_at = models.DateTimeField(null=True, blank=True)
     is_managed = models.BooleanField(default=False)
     repo_id = models.IntegerField(null=True, blank=True, unique=True)
     repo_image_url = models.URLField(blank=True)
@@ -347,10 +384,15 @@ class Project(
     currently_fetching_github_users = models.BooleanField(default=False)
     latest_sha = StringField(blank=True)
     currently_fetching_issues = models.BooleanField(default=False)
+    # When the GitHubBranch index was last rebuilt from GitHub; webhooks keep it
+    # current in between:
+    branches_updated_at = models.DateTimeField(null=True, blank=True)
 
     slug_class = ProjectSlug
     tracker = FieldTracker(fields=["name"])
 
+    objects = ProjectQuerySet.as_manager()
+
     def subscribable_by(self, user):  # pragma: nocover
         return True
 
@@ -442,6 +484,19 @@ class Project(
             project=self, branch_name=ref, originating_user_id=originating_user_id
         )
 
+    def queue_refresh_github_branches(self):
+        from .jobs import refresh_github_branches_job
+
+        refresh_github_branches_job.delay(self)
+
+    def add_branch(self, name):
+        GitHubBranch.objects.bulk_create(
+            [GitHubBranch(project=self, name=name)], ignore_conflicts=True
+        )
+
+    def delete_branch(self, name):
+        self.branches.filter(name=name).delete()
+
     def queue_available_org_config_names(self, user=None):
         from .jobs import available_org_config_names_job
 
@@ -459,28 +514,61 @@ class Project(
         self.save()
         self.notify_changed(originating_user_id=originating_user_id)
 
-    @transaction.atomic
     def add_commits(self, *, commits, ref, sender):
-        if self.branch_name == ref:
-            self.latest_sha = commits[0].get("id") if commits else ""
-            self.finalize_project_update()
-
-        matching_epics = Epic.objects.filter(branch_name=ref, project=self)
-        for epic in matching_epics:
-            epic.add_commits(commits)
-
-        matching_tasks = Task.objects.filter(
-            Q(branch_name=ref, project=self) | Q(branch_name=ref, epic__project=self)
-        )
+        with transaction.atomic():
+            if self.branch_name == ref:
+                self.latest_sha = commits[0].get("id") if commits else ""
+                self.finalize_project_update()
+
+            matching_epics = Epic.objects.filter(branch_name=ref, project=self)
+            for epic in matching_epics:
+                epic.add_commits(commits)
+
+            matching_tasks = list(
+                Task.objects.filter(
+                    Q(branch_name=ref, project=self)
+                    | Q(branch_name=ref, epic__project=self)
+                ).select_related("epic", "project")
+            )
+            for task in matching_tasks:
+                task.add_commits(commits, sender)
+
+        # Without new commits (e.g. the branch was deleted) nothing can have
+        # become (un)merged. The GitHub lookups run outside the transaction:
+        changed_based_tasks = []
+        if commits:
+            # Commits pushed to an Epic's (or the Project's) branch may merge
+            # the work of Tasks based on it:
+            based_on_ref = Q(epic__branch_name=ref, epic__project=self)
+            if ref == self.branch_name:
+                based_on_ref |= Q(epic__isnull=True, project=self)
+            based_tasks = list(
+                Task.objects.active()
+                .filter(based_on_ref, status=TaskStatus.IN_PROGRESS)
+                .exclude(branch_name__in=("", ref))
+                .select_related("epic", "project")
+            )
+            changed = Task.update_has_unmerged_commits_for(matching_tasks + based_tasks)
+            changed_based_tasks = [task for task in based_tasks if task in changed]
         for task in matching_tasks:
-            task.add_commits(commits, sender)
+            task.update_review_valid()
+        tasks = matching_tasks + changed_based_tasks
+        Task.objects.bulk_update(tasks, ["has_unmerged_commits", "review_valid"])
+        for task in tasks:
+            # This comes from the GitHub hook, and so has no originating user:
+            task.notify_changed(originating_user_id=None)
 
     def has_push_permission(self, user):
-        return GitHubRepository.objects.filter(
-            user=user,
-            repo_id=self.repo_id,
-            permissions__push=True,
-        ).exists()
+        # Views and serializers both check this when writing to an Epic or Task,
+        # so remember the answer for the lifetime of this instance:
+        push_permissions = self.__dict__.setdefault("_push_permissions", {})
+        if user.pk not in push_permissions:
+            push_permissions[user.pk] = GitHubRepository.objects.filter(
+                user=user,
+                repo_id=self.repo_id,
+                permissions__push=True,
+            ).exists()
+        return push_permissions[user.pk]
 
     def get_collaborator(self, gh_uid: str) -> Optional[Dict[str, object]]:
         try:
@@ -523,11 +611,110 @@ class GitHubIssue(HashIdMixin):
         ordering = ["-created_at"]
         verbose_name = "GitHub issue"
         verbose_name_plural = "GitHub issues"
+        unique_together = (("project", "github_id"),)
+        indexes = [
+            # Serves GitHubIssueFilter.do_search; on Postgres `title__icontains`
+            # compiles to `UPPER(title) LIKE UPPER(...)`, so index that:
+            GinIndex(
+                OpClass(Upper("title"), name="gin_trgm_ops"),
+                name="githubissue_upper_title_trgm",
+            ),
+            models.Index(
+                fields=["project", "number"], name="githubissue_project_number"
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class GitHubBranch(models.Model):
+    """
+    A non-default branch of a Project's repository, so feature branches can be
+    listed without asking GitHub.
+    """
+
+    project = models.ForeignKey(
+        Project, related_name="branches", on_delete=models.CASCADE
+    )
+    name = StringField()
+
+    class Meta:
+        ordering = ("name",)
+        verbose_name = "GitHub branch"
+        verbose_name_plural = "GitHub branches"
+        unique_together = (("project", "name"),)
+
+    def __str__(self):
+        return self.name
+
+
+class GitHubWebhook(HashIdMixin, TimestampsMixin, models.Model):
+    """
+    A webhook delivery from GitHub, stored to be processed on the "hooks" queue
+    (see settings.GITHUB_HOOK_QUEUE).
+    """
+
+    event = StringField()
+    delivery_id = StringField(blank=True)
+    repo_id = models.IntegerField(null=True, blank=True)
+    payload = models.JSONField()
+    status = models.CharField(
+        choices=GitHubWebhookStatus.choices,
+        default=GitHubWebhookStatus.PENDING,
+        max_length=16,
+    )
+    error = models.TextField(blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    # In seconds:
+    processing_time = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        verbose_name = "GitHub webhook"
+        indexes = [
+            models.Index(
+                fields=["repo_id", "status"], name="githubwebhook_repo_status"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event} {self.delivery_id}"
+
+    def queue_process(self):
+        from .jobs import process_github_webhooks_job
+
+        process_github_webhooks_job.delay(repo_id=self.repo_id)
+
+    def process(self):
+        from .hook_serializers import HOOK_SERIALIZERS, log_hook_latency
+
+        start = time.monotonic()
+        # Not in a transaction: hooks make GitHub calls, and the models they
+        # update keep their own writes atomic
+        try:
+            serializer = HOOK_SERIALIZERS[self.event](data=self.payload)
+            serializer.is_valid(raise_exception=True)
+            serializer.process_hook()
+        except Exception as e:
+            logger.exception(f"Failed to process GitHub webhook {self}")
+            self.status = GitHubWebhookStatus.FAILED
+            self.error = str(e)
+        else:
+            self.status = GitHubWebhookStatus.PROCESSED
+            self.error = ""
+        self.processed_at = timezone.now()
+        self.processing_time = time.monotonic() - start
+        self.save()
+        log_hook_latency(
+            event=self.event,
+            delivery_id=self.delivery_id,
+            processing_time=self.processing_time,
+            wait_time=(self.processed_at - self.created_at).total_seconds()
+            - self.processing_time,
+        )
+
+
 class EpicSlug(AbstractSlug):
     parent = models.ForeignKey("Epic", on_delete=models.CASCADE, related_name="slugs")
 
@@ -537,6 +724,7 @@ class Epic(
     PushMixin,
     HashIdMixin,
     TimestampsMixin,
+    PrefetchedSlugMixin,
     SlugMixin,
     SoftDeleteMixin,
     models.Model,
@@ -726,6 +914,7 @@ class Task(
     PushMixin,
     HashIdMixin,
     TimestampsMixin,
+    PrefetchedSlugMixin,
     SlugMixin,
     SoftDeleteMixin,
     models.Model,
@@ -753,7 +942,8 @@ class Task(
         null=True,
         blank=True,
     )
-    commits = models.JSONField(default=list, blank=True)
+    # The commits themselves are TaskCommits, see Task.set_commits:
+    commit_count = models.PositiveIntegerField(default=0)
     origin_sha = StringField(blank=True, default="")
     metecho_commits = models.JSONField(default=list, blank=True)
     has_unmerged_commits = models.BooleanField(default=False)
@@ -810,6 +1000,16 @@ class Task(
             return self.epic.project
         return self.project
 
+    @property
+    def latest_sha(self) -> str:
+        return self.head_commit_sha or self.origin_sha
+
+    @property
+    def head_commit_sha(self) -> str:
+        if not self.commit_count:
+            return ""
+        return self.commits.values_list("sha", flat=True).first() or ""
+
     def save(self, *args, force_epic_save=False, **kwargs):
         is_new = self.pk is None
         ret = super().save(*args, **kwargs)
@@ -865,12 +1065,12 @@ class Task(
 
     @property
     def get_all_users_in_commits(self):
-        ret = []
-        for commit in self.commits:
-            if commit["author"] not in ret:
-                ret.append(commit["author"])
-        ret.sort(key=lambda d: d["username"])
-        return ret
+        return [
+            author.as_dict()
+            for author in GitHubCommitAuthor.objects.filter(commits__task=self)
+            .distinct()
+            .order_by("username", "name", "email")
+        ]
 
     def add_reviewer(self, user):
         if user not in self.reviewers:
@@ -913,27 +1113,61 @@ class Task(
         return self.root_project.has_push_permission(user)
 
     def update_review_valid(self):
-        review_valid = bool(
-            self.review_sha
-            and self.commits
-            and self.review_sha == self.commits[0].get("id")
-        )
+        review_valid = bool(self.review_sha and self.review_sha == self.head_commit_sha)
         self.review_valid = review_valid
 
-    def update_has_unmerged_commits(self):
-        base = self.get_base()
-        head = self.get_head()
-        if head and base:
-            repo = gh.get_repo_info(
-                None,
-                repo_owner=self.root_project.repo_owner,
-                repo_name=self.root_project.repo_name,
-            )
-            base_sha = repo.branch(base).commit.sha
-            head_sha = repo.branch(head).commit.sha
-            self.has_unmerged_commits = (
-                repo.compare_commits(base_sha, head_sha).ahead_by > 0
+    @staticmethod
+    def update_has_unmerged_commits_for(tasks):
+        """
+        Update has_unmerged_commits on many Tasks of a Project at once. Each
+        branch is looked up once and the comparisons run in parallel. Tasks
+        whose base or head branch no longer exists are left alone. The Tasks
+        aren't saved; the ones whose has_unmerged_commits changed are returned.
+        """
+        tasks = [task for task in tasks if task.get_base() and task.get_head()]
+        if not tasks:
+            return []
+        project = tasks[0].root_project
+        repo = gh.get_repo_info(
+            None, repo_owner=project.repo_owner, repo_name=project.repo_name
+        )
+        branches = list(
+            dict.fromkeys(
+                branch
+                for task in tasks
+                for branch in (task.get_base(), task.get_head())
             )
+        )
+
+        def get_sha(name):
+            try:
+                return repo.branch(name).commit.sha
+            except NotFoundError:
+                logger.info(f"Branch {name} not found, skipping its Tasks")
+                return None
+
+        def compare(task):
+            base_sha = shas[task.get_base()]
+            head_sha = shas[task.get_head()]
+            if not (base_sha and head_sha):
+                return None
+            try:
+                return repo.compare_commits(base_sha, head_sha)
+            except NotFoundError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=UNMERGED_COMMITS_WORKERS) as executor:
+            shas = dict(zip(branches, executor.map(get_sha, branches)))
+            comparisons = executor.map(compare, tasks)
+            changed = []
+            for task, comparison in zip(tasks, comparisons):
+                if comparison is None:
+                    continue
+                has_unmerged_commits = comparison.ahead_by > 0
+                if task.has_unmerged_commits != has_unmerged_commits:
+                    task.has_unmerged_commits = has_unmerged_commits
+                    changed.append(task)
+        return changed
 
     def notify_created(self, originating_user_id=None):
         # Notify all users about the new task
@@ -989,15 +1223,59 @@ class Task(
             self.save()
             self.notify_changed(originating_user_id=originating_user_id)
 
+    def _lock_commit_count(self):
+        """
+        Lock this Task's row until the end of the transaction, and reload its
+        commit_count in case another push or refresh changed it since this Task
+        was loaded.
+        """
+        self.commit_count = (
+            Task.objects.select_for_update()
+            .values_list("commit_count", flat=True)
+            .get(pk=self.pk)
+        )
+
+    def set_commits(self, commits):
+        """
+        Replace the commits of this Task. `commits` are normalized commits (see
+        gh.normalize_commit), newest first.
+        """
+        with transaction.atomic():
+            self._lock_commit_count()
+            self.commits.all().delete()
+            self.commit_count = 0
+            self.append_commits(commits)
+            Task.objects.filter(pk=self.pk).update(commit_count=self.commit_count)
+
+    def append_commits(self, commits):
+        """
+        Add normalized commits, newest first, on top of the existing ones. The
+        Task's commit_count is updated but not saved.
+        """
+        authors = GitHubCommitAuthor.objects.get_for_commits(commits)
+        TaskCommit.objects.bulk_create(
+            TaskCommit.from_normalized(
+                commit,
+                task=self,
+                position=self.commit_count + len(commits) - i - 1,
+                author=authors.get(GitHubCommitAuthor.key_for_commit(commit)),
+            )
+            for i, commit in enumerate(commits)
+        )
+        self.commit_count += len(commits)
+
     def add_commits(self, commits, sender):
-        self.commits = [
-            gh.normalize_commit(c, sender=sender) for c in commits
-        ] + self.commits
-        self.update_has_unmerged_commits()
-        self.update_review_valid()
-        self.save()
-        # This comes from the GitHub hook, and so has no originating user:
-        self.notify_changed(originating_user_id=None)
+        """
+        Record commits pushed to this Task's branch. Project.add_commits then
+        updates has_unmerged_commits for all the pushed Tasks at once, and
+        saves and notifies them.
+        """
+        with transaction.atomic():
+            self._lock_commit_count()
+            self.append_commits(
+                [gh.normalize_commit(c, sender=sender) for c in commits]
+            )
+            Task.objects.filter(pk=self.pk).update(commit_count=self.commit_count)
 
     def add_metecho_git_sha(self, sha):
         self.metecho_commits.append(sha)
@@ -1047,6 +1325,186 @@ class Task(
                 org.queue_delete(originating_user_id=originating_user_id)
 
 
+class GitHubCommitAuthorManager(models.Manager):
+    def get_for_commits(self, commits):
+        """
+        Get or create the authors of some normalized commits, keyed by
+        GitHubCommitAuthor.key_for_commit.
+        """
+        keys = {
+            GitHubCommitAuthor.key_for_commit(commit)
+            for commit in commits
+            if commit.get("author")
+        }
+        if not keys:
+            return {}
+        query = Q()
+        for name, email, username, avatar_url in keys:
+            query |= Q(name=name, email=email, username=username, avatar_url=avatar_url)
+        authors = {author.key: author for author in self.filter(query)}
+        self.bulk_create(
+            [
+                GitHubCommitAuthor(
+                    name=name, email=email, username=username, avatar_url=avatar_url
+                )
+                for name, email, username, avatar_url in keys - authors.keys()
+            ],
+            ignore_conflicts=True,
+        )
+        if keys - authors.keys():
+            # bulk_create doesn't set primary keys when ignoring conflicts:
+            authors = {author.key: author for author in self.filter(query)}
+        return authors
+
+
+class GitHubCommitAuthor(models.Model):
+    """The author of some TaskCommits, stored once however many they made."""
+
+    name = StringField(blank=True, default="")
+    email = StringField(blank=True, default="")
+    username = StringField(blank=True, default="")
+    avatar_url = StringField(blank=True, default="")
+
+    objects = GitHubCommitAuthorManager()
+
+    class Meta:
+        verbose_name = "GitHub commit author"
+        verbose_name_plural = "GitHub commit authors"
+        unique_together = (("name", "email", "username", "avatar_url"),)
+
+    def __str__(self):
+        return self.username or self.name
+
+    @staticmethod
+    def key_for_commit(commit) -> Tuple[str, str, str, str]:
+        author = commit.get("author") or {}
+        return (
+            author.get("name", ""),
+            author.get("email", ""),
+            author.get("username", ""),
+            author.get("avatar_url", ""),
+        )
+
+    @property
+    def key(self) -> Tuple[str, str, str, str]:
+        return (self.name, self.email, self.username, self.avatar_url)
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "email": self.email,
+            "username": self.username,
+            "avatar_url": self.avatar_url,
+        }
+
+
+class TaskCommit(models.Model):
+    """
+    A commit on a Task branch. Positions count up from the oldest commit, so a
+    push only appends rows.
+    """
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="commits")
+    position = models.PositiveIntegerField()
+    sha = StringField()
+    timestamp = StringField(blank=True, default="")
+    author = models.ForeignKey(
+        GitHubCommitAuthor,
+        on_delete=models.PROTECT,
+        related_name="commits",
+        null=True,
+        blank=True,
+    )
+    message = models.TextField(blank=True, default="")
+    url = StringField(blank=True, default="")
+
+    class Meta:
+        ordering = ("-position",)
+        unique_together = (("task", "position"),)
+
+    def __str__(self):
+        return self.sha
+
+    @classmethod
+    def from_normalized(cls, commit, **kwargs):
+        return cls(
+            sha=commit["id"],
+            timestamp=commit.get("timestamp", ""),
+            message=commit.get("message", ""),
+            url=commit.get("url", ""),
+            **kwargs,
+        )
+
+    @classmethod
+    def prefetch_first_page(cls, page_size):
+        """
+        Prefetch the newest `page_size` commits of each Task into
+        `first_commit_page`. The rest of the history isn't loaded: positions
+        count up to commit_count, so the first page is the top `page_size`.
+        """
+        return models.Prefetch(
+            "commits",
+            queryset=cls.objects.select_related("author").filter(
+                position__gte=models.F("task__commit_count") - page_size
+            ),
+            to_attr="first_commit_page",
+        )
+
+    def as_dict(self):
+        """The commit in the format of gh.normalize_commit."""
+        return {
+            "id": self.sha,
+            "timestamp": self.timestamp,
+            "author": self.author.as_dict() if self.author else {},
+            "message": self.message,
+            "url": self.url,
+        }
+
+
+class ScratchOrgPool(HashIdMixin, TimestampsMixin, models.Model):
+    """
+    Keeps `size` scratch orgs for a Project and org config pre-provisioned
+    from the head of the Project's default branch, so new ScratchOrgs for
+    that commit can claim one instead of waiting for a full provision.
+
+    Pooled orgs are ordinary ScratchOrgs with `pool` set, owned by `owner`,
+    whose GitHub access and Dev Hub are used to build them. They're hidden
+    from the API until claimed.
+    """
+
+    project = models.ForeignKey(
+        Project, on_delete=models.CASCADE, related_name="scratch_org_pools"
+    )
+    org_config_name = StringField()
+    size = models.PositiveIntegerField(default=1)
+    owner = models.ForeignKey(User, on_delete=models.PROTECT)
+    hits = models.PositiveIntegerField(default=0)
+    misses = models.PositiveIntegerField(default=0)
+    recycled = models.PositiveIntegerField(default=0)
+    last_filled_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = (("project", "org_config_name"),)
+
+    def __str__(self):
+        return f"{self.project} ({self.org_config_name})"
+
+    def ready_orgs(self):
+        return self.orgs.active().filter(
+            is_created=True,
+            delete_queued_at__isnull=True,
+            currently_refreshing_org=False,
+        )
+
+    def record(self, field):
+        ScratchOrgPool.objects.filter(pk=self.pk).update(**{field: models.F(field) + 1})
+
+    def queue_fill(self):
+        from .jobs import fill_scratch_org_pool_job
+
+        fill_scratch_org_pool_job.delay(self)
+
+
 class ScratchOrg(
     SoftDeleteMixin, PushMixin, HashIdMixin, TimestampsMixin, models.Model
 ):
@@ -1088,8 +1546,16 @@ class ScratchOrg(
     ignored_changes = models.JSONField(
         default=dict, encoder=DjangoJSONEncoder, blank=True
     )
-    latest_revision_numbers = models.JSONField(
-        default=dict, encoder=DjangoJSONEncoder, blank=True
+    # Highest SourceMember RevisionCounter seen in the org, so polls only
+    # fetch members changed since then. The revision numbers themselves live
+    # on ScratchOrgRevisionSnapshot:
+    max_revision_counter = models.BigIntegerField(null=True, blank=True)
+    pool = models.ForeignKey(
+        ScratchOrgPool,
+        on_delete=models.PROTECT,
+        related_name="orgs",
+        null=True,
+        blank=True,
     )
     currently_refreshing_changes = models.BooleanField(default=False)
     currently_capturing_changes = models.BooleanField(default=False)
@@ -1136,17 +1602,58 @@ class ScratchOrg(
             return self.task.root_project
         return None
 
+    def _get_revision_snapshot(self):
+        snapshot = self.__dict__.get("_revision_snapshot")
+        if snapshot is None:
+            try:
+                snapshot = self.revision_snapshot
+            except ScratchOrgRevisionSnapshot.DoesNotExist:
+                snapshot = ScratchOrgRevisionSnapshot(scratch_org=self)
+            self.__dict__["_revision_snapshot"] = snapshot
+        return snapshot
+
+    @property
+    def latest_revision_numbers(self):
+        return self._get_revision_snapshot().latest_revision_numbers
+
+    @latest_revision_numbers.setter
+    def latest_revision_numbers(self, value):
+        self._get_revision_snapshot().latest_revision_numbers = value
+
+    @property
+    def org_revision_numbers(self):
+        return self._get_revision_snapshot().org_revision_numbers
+
+    @org_revision_numbers.setter
+    def org_revision_numbers(self, value):
+        self._get_revision_snapshot().org_revision_numbers = value
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        if kwargs.get("fields") is None:
+            self.__dict__.pop("_revision_snapshot", None)
+
     def save(self, *args, **kwargs):
         is_new = self.id is None
         self.clean_config()
         ret = super().save(*args, **kwargs)
 
+        # The revision snapshot is only written if it was read or set on this
+        # instance, and never by saves restricted with update_fields:
+        snapshot = self.__dict__.get("_revision_snapshot")
+        if snapshot is not None and kwargs.get("update_fields") is None:
+            snapshot.save()
+
         if is_new:
             self.queue_provision(originating_user_id=str(self.owner.id))
             self.notify_org_provisioning(originating_user_id=str(self.owner.id))
 
         return ret
 
+    def _save_flags(self, *fields):
+        # Skip rewriting the rest of the row for simple flag changes:
+        self.save(update_fields=[*fields, "edited_at"])
+
     def clean(self):
         if len([x for x in [self.project, self.epic, self.task] if x is not None]) != 1:
             raise ValidationError(
@@ -1162,9 +1669,63 @@ class ScratchOrg(
         banned_keys = {"email", "access_token", "refresh_token"}
         self.config = {k: v for (k, v) in self.config.items() if k not in banned_keys}
 
+    # Fields describing the Salesforce org itself, which move with it when a
+    # pooled org is claimed:
+    POOLED_ORG_FIELDS = (
+        "url",
+        "expires_at",
+        "latest_commit",
+        "latest_commit_url",
+        "latest_commit_at",
+        "config",
+        "owner_sf_username",
+        "valid_target_directories",
+        "cci_log",
+        "last_modified_at",
+        "is_created",
+        "max_revision_counter",
+        "latest_revision_numbers",
+        "org_revision_numbers",
+    )
+
+    def adopt_pooled_org(self, pooled_org):
+        """
+        Take over the Salesforce org behind `pooled_org`, and remove the
+        pooled row without deleting the org on Salesforce. The caller is
+        responsible for reassigning the org to this org's owner.
+        """
+        for field in self.POOLED_ORG_FIELDS:
+            setattr(self, field, getattr(pooled_org, field))
+        self.owner_gh_username = self.owner.username
+        self.owner_gh_id = self.owner.github_id
+        expiry_job_id = pooled_org.expiry_job_id
+        ScratchOrg.objects.filter(pk=pooled_org.pk).hard_delete()
+        self.save()
+        return expiry_job_id
+
+    def forget_adopted_org(self):
+        """
+        Undo adopt_pooled_org when the adopted org couldn't be reassigned, so a
+        new org can be created in its place. The caller deletes the old one.
+        """
+        blank = ScratchOrg()
+        for field in self.POOLED_ORG_FIELDS:
+            setattr(self, field, getattr(blank, field))
+        self.save()
+
+    # Pooled orgs aren't visible to anyone until they're claimed, so they
+    # don't send any notifications:
+    def notify_changed(self, *args, **kwargs):
+        if self.pool_id is None:
+            super().notify_changed(*args, **kwargs)
+
+    def notify_scratch_org_error(self, *args, **kwargs):
+        if self.pool_id is None:
+            super().notify_scratch_org_error(*args, **kwargs)
+
     def mark_visited(self, *, originating_user_id):
         self.has_been_visited = True
-        self.save()
+        self._save_flags("has_been_visited")
         self.notify_changed(originating_user_id=originating_user_id)
 
     def get_refreshed_org_config(self, org_name=None, keychain=None):
@@ -1294,7 +1855,7 @@ class ScratchOrg(
             return
 
         self.currently_refreshing_changes = True
-        self.save()
+        self._save_flags("currently_refreshing_changes")
         self.notify_changed(originating_user_id=originating_user_id)
 
         get_unsaved_changes_job.delay(self, originating_user_id=originating_user_id)
@@ -1326,7 +1887,7 @@ class ScratchOrg(
         from .jobs import commit_changes_from_org_job
 
         self.currently_capturing_changes = True
-        self.save()
+        self._save_flags("currently_capturing_changes")
         self.notify_changed(originating_user_id=originating_user_id)
 
         commit_changes_from_org_job.delay(
@@ -1373,7 +1934,7 @@ class ScratchOrg(
 
         self.has_been_visited = False
         self.currently_refreshing_org = True
-        self.save()
+        self._save_flags("has_been_visited", "currently_refreshing_org")
         self.notify_changed(originating_user_id=originating_user_id)
         refresh_scratch_org_job.delay(self, originating_user_id=originating_user_id)
 
@@ -1399,7 +1960,7 @@ class ScratchOrg(
         self.currently_reassigning_user = True
         was_deleted = self.deleted_at is not None
         self.deleted_at = None
-        self.save()
+        self._save_flags("currently_reassigning_user", "deleted_at")
         if was_deleted:
             self.notify_changed(
                 type_="SCRATCH_ORG_RECREATE",
@@ -1427,7 +1988,7 @@ class ScratchOrg(
 
     def notify_org_provisioning(self, originating_user_id):
         parent = self.parent
-        if parent:
+        if parent and self.pool_id is None:
             group_name = CHANNELS_GROUP_NAME.format(
                 model=parent._meta.model_name, id=parent.id
             )
@@ -1438,6 +1999,31 @@ class ScratchOrg(
             )
 
 
+class ScratchOrgRevisionSnapshot(models.Model):
+    """
+    SourceMember revision numbers for a scratch org, kept out of the
+    ScratchOrg row so that its frequent saves and loads don't carry them.
+    Accessed through ScratchOrg.latest_revision_numbers and
+    ScratchOrg.org_revision_numbers.
+    """
+
+    scratch_org = models.OneToOneField(
+        ScratchOrg,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="revision_snapshot",
+    )
+    # Revision numbers as of the last commit (or org creation); anything
+    # newer in the org is an unsaved change:
+    latest_revision_numbers = models.JSONField(
+        default=dict, encoder=DjangoJSONEncoder, blank=True
+    )
+    # Last known revision numbers in the org:
+    org_revision_numbers = models.JSONField(
+        default=dict, encoder=DjangoJSONEncoder, blank=True
+    )
+
+
 @receiver(user_logged_in)
 def user_logged_in_handler(sender, *, user, **kwargs):
     user.queue_refresh_repositories()
@@ -1457,6 +2043,8 @@ def ensure_slug_handler(sender, *, created, instance, **kwargs):
         )
     with suppress(AttributeError):
         del instance.slug_cache  # Clear cached property
+    with suppress(AttributeError):
+        del instance.active_slugs  # Clear prefetched slugs
 
 
 post_save.connect(ensure_slug_handler, sender=Project)
@@ -20,8 +20,10 @@ from .models import (
     ScratchOrgType,
     SiteProfile,
     Task,
+    TaskCommit,
     TaskReviewStatus,
 )
+from .paginators import CustomPaginator
 from .sf_run_flow import is_org_good
 from .validators import CaseInsensitiveUniqueTogetherValidator, UnattachedIssueValidator
 
@@ -283,6 +285,9 @@ class ProjectSerializer(HashIdModelSerializer):
         return obj.repo_image_url if obj.include_repo_image_url else ""
 
     def get_has_push_permission(self, obj) -> bool:
+        # Annotated for the requesting user by ProjectViewSet:
+        if hasattr(obj, "user_has_push_permission"):
+            return obj.user_has_push_permission
         return obj.has_push_permission(self.context["request"].user)
 
 
@@ -420,6 +425,9 @@ class EpicSerializer(HashIdModelSerializer):
         return data
 
     def get_task_count(self, obj) -> int:
+        # Annotated by EpicViewSet:
+        if hasattr(obj, "task_count"):
+            return obj.task_count
         return obj.tasks.active().count()
 
     @extend_schema_field(OpenApiTypes.URI)
@@ -497,6 +505,29 @@ class EpicCollaboratorsSerializer(serializers.ModelSerializer):
         return github_users
 
 
+class TaskCommitSerializer(serializers.ModelSerializer):
+    id = serializers.CharField(source="sha", read_only=True)
+    author = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TaskCommit
+        fields = ("id", "timestamp", "author", "message", "url")
+        read_only_fields = fields
+
+    @extend_schema_field(
+        {
+            "properties": {
+                "name": {"type": "string"},
+                "email": {"type": "string"},
+                "username": {"type": "string"},
+                "avatar_url": {"type": "string"},
+            }
+        }
+    )
+    def get_author(self, commit):
+        return commit.author.as_dict() if commit.author else {}
+
+
 class TaskSerializer(HashIdModelSerializer):
     slug = serializers.CharField(read_only=True)
     old_slugs = StringListField(read_only=True)
@@ -516,6 +547,7 @@ class TaskSerializer(HashIdModelSerializer):
     )
     root_project = serializers.SerializerMethodField()
     branch_url = serializers.SerializerMethodField()
+    commits = serializers.SerializerMethodField()
     branch_diff_url = serializers.SerializerMethodField()
     pr_url = serializers.SerializerMethodField()
     issue = serializers.PrimaryKeyRelatedField(
@@ -550,6 +582,7 @@ class TaskSerializer(HashIdModelSerializer):
             "root_project",
             "branch_url",
             "commits",
+            "commit_count",
             "origin_sha",
             "branch_diff_url",
             "pr_url",
@@ -572,7 +605,7 @@ class TaskSerializer(HashIdModelSerializer):
             "currently_creating_pr": {"read_only": True},
             "root_project": {"read_only": True},
             "branch_url": {"read_only": True},
-            "commits": {"read_only": True},
+            "commit_count": {"read_only": True},
             "origin_sha": {"read_only": True},
             "branch_diff_url": {"read_only": True},
             "pr_url": {"read_only": True},
@@ -600,6 +633,18 @@ class TaskSerializer(HashIdModelSerializer):
             return f"https://github.com/{repo_owner}/{repo_name}/tree/{branch}"
         return None
 
+    @extend_schema_field(TaskCommitSerializer(many=True))
+    def get_commits(self, obj):
+        # Only the first page of commits; the rest are paged from the Task's
+        # `commits` endpoint. TaskViewSet prefetches that page; a lone Task
+        # fetches it here:
+        if not obj.commit_count:
+            return []
+        commits = getattr(obj, "first_commit_page", None)
+        if commits is None:
+            commits = obj.commits.select_related("author")[: CustomPaginator.page_size]
+        return TaskCommitSerializer(commits, many=True).data
+
     @extend_schema_field(OpenApiTypes.URI)
     def get_branch_diff_url(self, obj) -> Optional[str]:
         base_branch = obj.get_base()
@@ -745,9 +790,7 @@ class TaskAssigneeSerializer(serializers.Serializer):
                 new_user = self._valid_reassign(
                     type_, org, validated_data[f"assigned_{type_}"]
                 )
-                valid_commit = org.latest_commit == (
-                    instance.commits[0] if instance.commits else instance.origin_sha
-                )
+                valid_commit = org.latest_commit == instance.latest_sha
                 org_still_exists = is_org_good(org)
                 if (
                     org_still_exists
@@ -951,7 +994,9 @@ class ScratchOrgSerializer(HashIdModelSerializer):
 
     def validate(self, data):
         if not self.instance:
-            orgs = ScratchOrg.objects.active().filter(org_type=data["org_type"])
+            orgs = ScratchOrg.objects.active().filter(
+                org_type=data["org_type"], pool__isnull=True
+            )
             if data["org_type"] == ScratchOrgType.PLAYGROUND:
                 orgs = orgs.filter(
                     owner=data.get("owner", self.context["request"].user)
@@ -4,14 +4,23 @@ import pathlib
 from collections import defaultdict
 
 import simple_salesforce
-from cumulusci.core.runtime import BaseCumulusCI
 from cumulusci.tasks.github.util import CommitDir
 from cumulusci.tasks.salesforce.sourcetracking import retrieve_components
 from django.conf import settings
+from django.core.cache import cache
 
 from .custom_cci_configs import MetechoUniversalConfig
-from .gh import get_repo_info, get_source_format, local_github_checkout
-from .sf_run_flow import refresh_access_token
+from .gh import (
+    get_project_config_values,
+    get_repo_info,
+    get_source_format,
+    local_github_checkout,
+)
+from .sf_run_flow import (
+    get_org_session,
+    invalidate_org_token_on_401,
+    refresh_access_token,
+)
 
 
 def get_valid_target_directories(user, scratch_org, repo_root):
@@ -79,6 +88,34 @@ def get_valid_target_directories(user, scratch_org, repo_root):
     return package_directories, sfdx
 
 
+def get_cached_valid_target_directories(user, scratch_org):
+    """
+    Get the valid target directories for the scratch org's branch, checking out
+    the repository only if the branch or the project's default branch have new
+    commits since the last time. The head SHAs come from our own records, which
+    the push hooks keep up to date, so the common case makes no GitHub calls.
+    """
+    parent = scratch_org.parent
+    project = scratch_org.root_project
+    key = None
+    if parent.latest_sha and project.latest_sha:
+        key = (
+            f"valid_target_directories_{project.repo_id}_"
+            f"{parent.latest_sha}_{project.latest_sha}"
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    with local_github_checkout(
+        user, parent.get_repo_id(), parent.branch_name, light=True
+    ) as repo_root:
+        result = get_valid_target_directories(user, scratch_org, repo_root)
+    if key:
+        cache.set(key, result, timeout=60 * 60 * 24 * 30)  # 30 days
+    return result
+
+
 def run_retrieve_task(
     user,
     scratch_org,
@@ -96,14 +133,13 @@ def run_retrieve_task(
     )
     repository = get_repo_info(user, repo_id=repo_id)
     branch = repository.default_branch
-    cci = BaseCumulusCI(
-        repo_info={
-            "root": project_path,
-            "url": repository.html_url,
-            "name": repository.name,
-            "owner": repository.owner.login,
-            "commit": branch,
-        }
+    project_config = get_project_config_values(
+        repo_root=project_path,
+        repo_name=repository.name,
+        repo_url=repository.html_url,
+        repo_owner=repository.owner.login,
+        repo_branch=branch,
+        repo_commit=branch,
     )
 
     valid_directories, sfdx = get_valid_target_directories(
@@ -121,9 +157,9 @@ def run_retrieve_task(
 
     if is_main_project_directory:
         package_xml_opts = {
-            "package_name": cci.project_config.project__package__name,
-            "install_class": cci.project_config.project__package__install_class,
-            "uninstall_class": cci.project_config.project__package__uninstall_class,
+            "package_name": project_config["package_name"],
+            "install_class": project_config["install_class"],
+            "uninstall_class": project_config["uninstall_class"],
         }
     else:
         package_xml_opts = {}
@@ -132,15 +168,16 @@ def run_retrieve_task(
     for mdtype, members in desired_changes.items():
         for name in members:
             components.append({"MemberName": name, "MemberType": mdtype})
-    retrieve_components(
-        components,
-        org_config,
-        os.path.realpath(target_directory),
-        md_format,
-        extra_package_xml_opts=package_xml_opts,
-        namespace_tokenize=False,
-        api_version=cci.project_config.project__package__api_version,
-    )
+    with invalidate_org_token_on_401(org_config.org_id):
+        retrieve_components(
+            components,
+            org_config,
+            os.path.realpath(target_directory),
+            md_format,
+            extra_package_xml_opts=package_xml_opts,
+            namespace_tokenize=False,
+            api_version=project_config["api_version"],
+        )
 
 
 def commit_changes_to_github(
@@ -187,6 +224,7 @@ def get_salesforce_connection(*, scratch_org, originating_user_id, base_url=""):
         instance_url=org_config.instance_url,
         session_id=org_config.access_token,
         version=MetechoUniversalConfig().project__package__api_version,
+        session=get_org_session(org_config.org_id),
     )
     conn.headers.setdefault(
         "Sforce-Call-Options", "client={}".format(settings.SFDX_CLIENT_ID)
@@ -197,6 +235,16 @@ def get_salesforce_connection(*, scratch_org, originating_user_id, base_url=""):
 
 
 def get_latest_revision_numbers(scratch_org, *, originating_user_id):
+    """
+    Return the current SourceMember revision numbers in the org, as
+    `{member_type: {member_name: revision_counter}}`.
+
+    The result and its highest RevisionCounter are kept on
+    `scratch_org.org_revision_numbers` and `scratch_org.max_revision_counter`
+    (not saved here), so once those are set we only query members whose
+    counter is higher and merge them in. Clear `max_revision_counter` to
+    force a full query, e.g. when the org is recreated.
+    """
     conn = get_salesforce_connection(
         scratch_org=scratch_org,
         base_url="tooling/",
@@ -206,18 +254,35 @@ def get_latest_revision_numbers(scratch_org, *, originating_user_id):
     # Store the results here on the org, and if any of these are > number than earlier
     # version, there are changes.
     # We need to run this right after the setup flow and store that as initial state.
-    records = conn.query_all(
-        "SELECT MemberName, MemberType, RevisionCounter FROM SourceMember "
-        "WHERE IsNameObsolete=false"
-    ).get("records", [])
+    record_dict = defaultdict(dict)
+    max_revision_counter = scratch_org.max_revision_counter
+    if max_revision_counter is None:
+        max_revision_counter = 0
+        records = conn.query_all(
+            "SELECT MemberName, MemberType, RevisionCounter, IsNameObsolete "
+            "FROM SourceMember WHERE IsNameObsolete=false"
+        ).get("records", [])
+    else:
+        for member_type, members in scratch_org.org_revision_numbers.items():
+            record_dict[member_type].update(members)
+        records = conn.query_all(
+            "SELECT MemberName, MemberType, RevisionCounter, IsNameObsolete "
+            f"FROM SourceMember WHERE RevisionCounter > {int(max_revision_counter)}"
+        ).get("records", [])
 
-    record_dict = defaultdict(lambda: defaultdict(dict))
     for record in records:
-        record_dict[record["MemberType"]][record["MemberName"]] = record[
-            "RevisionCounter"
-        ]
+        max_revision_counter = max(max_revision_counter, record["RevisionCounter"] or 0)
+        if record.get("IsNameObsolete"):
+            record_dict[record["MemberType"]].pop(record["MemberName"], None)
+        else:
+            record_dict[record["MemberType"]][record["MemberName"]] = record[
+                "RevisionCounter"
+            ]
 
-    return {k: dict(v) for k, v in record_dict.items()}
+    revision_numbers = {k: dict(v) for k, v in record_dict.items() if v}
+    scratch_org.org_revision_numbers = revision_numbers
+    scratch_org.max_revision_counter = max_revision_counter
+    return {k: dict(v) for k, v in revision_numbers.items()}
 
 
 def compare_revisions(old_revision, new_revision):
@@ -4,18 +4,24 @@ import logging
 import os
 import shutil
 import subprocess
+from collections import OrderedDict
 from datetime import datetime
 
+import requests
 from cumulusci.core.config import OrgConfig, TaskConfig
 from cumulusci.core.runtime import BaseCumulusCI
 from cumulusci.oauth.client import OAuth2Client, OAuth2ClientConfig
 from cumulusci.oauth.salesforce import jwt_session
 from cumulusci.tasks.salesforce.org_settings import DeployOrgSettings
 from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.translation import gettext_lazy as _
 from django_rq import get_scheduler
 from rq import get_current_job
+from sfdo_template_helpers.crypto import fernet_decrypt, fernet_encrypt
 from simple_salesforce import Salesforce as SimpleSalesforce
+from simple_salesforce.exceptions import SalesforceExpiredSession
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +35,24 @@ SFDX_SIGNUP_INSTANCE = settings.SFDX_SIGNUP_INSTANCE
 
 DURATION_DAYS = 30
 
+# Dev Hub access tokens are reused across calls for the same username; see
+# get_devhub_api:
+DEVHUB_TOKEN_CACHE_TTL = settings.DEVHUB_TOKEN_CACHE_TTL
+# Scratch org access tokens are likewise reused across calls and jobs for the
+# same org; see refresh_access_token. Salesforce expires sessions after a period
+# of inactivity, the shortest an org can be configured with being 15 minutes, so
+# a token is never cached for longer than that:
+SALESFORCE_MIN_SESSION_TIMEOUT = 15 * 60
+ORG_TOKEN_CACHE_TTL = min(settings.ORG_TOKEN_CACHE_TTL, SALESFORCE_MIN_SESSION_TIMEOUT)
+# Only the token itself is cached; everything else the refresh loads onto the
+# org config is loaded again with it:
+ORG_TOKEN_CACHE_KEYS = ("access_token", "instance_url")
+# Process-local pool of HTTP sessions, one per Dev Hub username. Only the most
+# recently used ones are kept, so a worker that sees many users doesn't hold on
+# to a session (and its connections) for each of them:
+DEVHUB_SESSION_POOL_SIZE = 32
+_devhub_sessions = OrderedDict()
+
 # Deploy org settings metadata -- this should get moved into CumulusCI
 SETTINGS_XML_t = """<?xml version="1.0" encoding="UTF-8"?>
 <{settingsName} xmlns="http://soap.sforce.com/2006/04/metadata">
@@ -107,6 +131,54 @@ def is_org_good(org):
         return False
 
 
+def _session_invalidating_on_401(invalidate):
+    def invalidate_on_401(response, *args, **kwargs):
+        if response.status_code == 401:
+            invalidate()
+
+    session = requests.Session()
+    session.hooks["response"].append(invalidate_on_401)
+    return session
+
+
+def _org_token_cache_key(org_id):
+    return f"org_token_{org_id}"
+
+
+def invalidate_org_token(org_id):
+    cache.delete(_org_token_cache_key(org_id))
+
+
+def _is_unauthorized(err):
+    if isinstance(err, SalesforceExpiredSession):
+        return True
+    response = getattr(err, "response", None)
+    return getattr(response, "status_code", None) == 401
+
+
+@contextlib.contextmanager
+def invalidate_org_token_on_401(org_id):
+    """
+    Drop the cached org token if anything in the block is refused with a 401,
+    for clients that CumulusCI builds itself and that we can't hand a session
+    from get_org_session.
+    """
+    try:
+        yield
+    except (requests.HTTPError, SalesforceExpiredSession) as err:
+        if _is_unauthorized(err):
+            invalidate_org_token(org_id)
+        raise
+
+
+def get_org_session(org_id):
+    """
+    Return an HTTP session for talking to a scratch org that drops the cached
+    org token on any 401.
+    """
+    return _session_invalidating_on_401(lambda: invalidate_org_token(org_id))
+
+
 def refresh_access_token(
     *, scratch_org, config, org_name, keychain=None, originating_user_id=None
 ):
@@ -114,15 +186,96 @@ def refresh_access_token(
     Construct a new OrgConfig because ScratchOrgConfig tries to use sfdx
     which we don't want now -- this is a total hack which I'll try to
     smooth over with some improvements in CumulusCI
+
+    The access token and instance URL from the token refresh are cached per
+    org_id for ORG_TOKEN_CACHE_TTL seconds, so later calls for the same org
+    reuse them instead of refreshing again. The user and org info are still
+    loaded each time, which also checks that the cached token is still good.
     """
     with delete_org_on_error(
         scratch_org=scratch_org, originating_user_id=originating_user_id
     ):
         org_config = OrgConfig(config, org_name, keychain=keychain)
+        org_id = config.get("org_id")
+        use_cache = bool(org_id and ORG_TOKEN_CACHE_TTL)
+        key = _org_token_cache_key(org_id)
+
+        cached = cache.get(key) if use_cache else None
+        if cached:
+            org_config.config.update(json.loads(fernet_decrypt(cached)))
+            try:
+                # This is what refresh_oauth_token does once it has a token:
+                org_config.load_userinfo()
+                org_config._load_orginfo()
+                return org_config
+            except (requests.HTTPError, SalesforceExpiredSession) as err:
+                if not _is_unauthorized(err):
+                    raise
+                invalidate_org_token(org_id)
+
         org_config.refresh_oauth_token(keychain)
+        if use_cache:
+            token = {k: org_config.config.get(k) for k in ORG_TOKEN_CACHE_KEYS}
+            cache.set(
+                key,
+                fernet_encrypt(json.dumps(token, cls=DjangoJSONEncoder)),
+                timeout=ORG_TOKEN_CACHE_TTL,
+            )
         return org_config
 
 
+def _devhub_token_cache_key(devhub_username):
+    return f"devhub_token_{devhub_username}"
+
+
+def invalidate_devhub_token(devhub_username):
+    cache.delete(_devhub_token_cache_key(devhub_username))
+
+
+def get_devhub_session(devhub_username):
+    """
+    Return the pooled HTTP session for a dev hub username. Any 401 seen on
+    it drops the cached access token, so the next get_devhub_api call runs
+    a fresh JWT exchange.
+    """
+    session = _devhub_sessions.get(devhub_username)
+    if session is None:
+        session = _session_invalidating_on_401(
+            lambda: invalidate_devhub_token(devhub_username)
+        )
+        _devhub_sessions[devhub_username] = session
+        while len(_devhub_sessions) > DEVHUB_SESSION_POOL_SIZE:
+            _, evicted = _devhub_sessions.popitem(last=False)
+            evicted.close()
+    else:
+        _devhub_sessions.move_to_end(devhub_username)
+    return session
+
+
+def get_devhub_token(devhub_username):
+    """
+    Return `(instance_url, access_token)` for the dev hub username, reusing
+    a cached token for up to DEVHUB_TOKEN_CACHE_TTL seconds. The token is
+    kept encrypted in the cache.
+    """
+    key = _devhub_token_cache_key(devhub_username)
+    cached = cache.get(key)
+    if cached:
+        return cached["instance_url"], fernet_decrypt(cached["access_token"])
+
+    jwt = jwt_session(SF_CLIENT_ID, SF_CLIENT_KEY, devhub_username)
+    if DEVHUB_TOKEN_CACHE_TTL:
+        cache.set(
+            key,
+            {
+                "instance_url": jwt["instance_url"],
+                "access_token": fernet_encrypt(jwt["access_token"]),
+            },
+            timeout=DEVHUB_TOKEN_CACHE_TTL,
+        )
+    return jwt["instance_url"], jwt["access_token"]
+
+
 def get_devhub_api(*, devhub_username, scratch_org=None):
     """
     Get an access token (session) for the specified dev hub username.
@@ -130,12 +283,13 @@ def get_devhub_api(*, devhub_username, scratch_org=None):
     via an interactive login flow, such as the django-allauth login.
     """
     with delete_org_on_error(scratch_org=scratch_org):
-        jwt = jwt_session(SF_CLIENT_ID, SF_CLIENT_KEY, devhub_username)
+        instance_url, access_token = get_devhub_token(devhub_username)
         return SimpleSalesforce(
-            instance_url=jwt["instance_url"],
-            session_id=jwt["access_token"],
+            instance_url=instance_url,
+            session_id=access_token,
             client_id="Metecho",
             version="49.0",
+            session=get_devhub_session(devhub_username),
         )
 
 
@@ -261,7 +415,8 @@ def deploy_org_settings(
     path = os.path.join(cci.project_config.repo_root, scratch_org_config.config_file)
     task_config = TaskConfig({"options": {"definition_file": path}})
     task = DeployOrgSettings(cci.project_config, task_config, org_config)
-    task()
+    with invalidate_org_token_on_401(org_config.org_id):
+        task()
     return org_config
 
 
@@ -359,6 +514,9 @@ def run_flow(*, cci, org_config, flow_name, project_path, user):
     )
     orig_stdout, _ = p.communicate()
     if p.returncode:
+        # The flow runs with token refresh disabled, so it may have failed on
+        # an expired cached token; drop it so the next attempt gets a new one:
+        invalidate_org_token(org_config.org_id)
         p = subprocess.run(
             [command, "error", "info"], capture_output=True, env={"HOME": project_path}
         )
@@ -388,6 +546,7 @@ def delete_org(scratch_org):
     active_scratch_org_id = records.get("Id")
     if active_scratch_org_id:
         devhub_api.ActiveScratchOrg.delete(active_scratch_org_id)
+    invalidate_org_token(org_id)
 
     if scratch_org.expiry_job_id:
         scheduler = get_scheduler("default")
@@ -101,6 +101,12 @@ class TestProjectAdmin:
     def test_save(self, admin_client, mocker, repo_image_url, should_fetch):
         mocker.patch("metecho.api.admin.gh")
         get_social_image_job = mocker.patch("metecho.api.jobs.get_social_image_job")
+        populate_project_repo_ids_job = mocker.patch(
+            "metecho.api.jobs.populate_project_repo_ids_job"
+        )
+        refresh_github_branches_job = mocker.patch(
+            "metecho.api.jobs.refresh_github_branches_job"
+        )
 
         admin_client.post(
             reverse("admin:api_project_add"),
@@ -117,6 +123,8 @@ class TestProjectAdmin:
         )
 
         assert get_social_image_job.delay.called == should_fetch
+        assert populate_project_repo_ids_job.delay.called
+        assert refresh_github_branches_job.delay.called
 
 
 def test_json_widget():
@@ -1,21 +1,35 @@
+import os
+import time
 from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
+from uuid import uuid4
 
 import pytest
 from django.core.cache import cache
 from github3.exceptions import NotFoundError, UnprocessableEntity
+from requests import Request, Response
+from requests.structures import CaseInsensitiveDict
 
 from ..gh import (
+    ConditionalRequestAdapter,
+    GraphQLError,
     NoGitHubTokenError,
     UnsafeZipfileError,
+    evict_checkout_cache,
+    extract_light_checkout,
     extract_zip_file,
     get_all_org_repos,
+    get_cached_checkout,
     get_cached_user,
+    get_collaborators,
+    get_project_config_values,
     get_repo_info,
     get_source_format,
     get_zip_file,
     gh_as_app,
+    gh_given_user,
     is_safe_path,
     local_github_checkout,
     log_unsafe_zipfile_error,
@@ -29,15 +43,21 @@ PATCH_ROOT = "metecho.api.gh"
 
 @pytest.mark.django_db
 class TestGetAllOrgRepos:
-    def test_good_social_auth(self, user_factory):
+    def test_good_social_auth(self, mocker, user_factory):
+        mocker.patch.dict(f"{PATCH_ROOT}._user_sessions", clear=True)
         user = user_factory()
         with patch(f"{PATCH_ROOT}.login") as login:
             repo = MagicMock()
             repo.url = "test"
             gh = MagicMock()
-            gh.repositories.return_value = [repo]
+            gh.repositories.return_value = MagicMock(
+                __iter__=lambda self: iter([repo]),
+                last_response=MagicMock(headers={"ETag": '"abc"'}),
+            )
             login.return_value = gh
-            assert len(get_all_org_repos(user)) == 1
+            repos, etag = get_all_org_repos(user)
+            assert len(repos) == 1
+            assert etag == '"abc"'
 
     def test_bad_social_auth(self, user_factory):
         user = user_factory(socialaccount_set=[])
@@ -45,9 +65,164 @@ class TestGetAllOrgRepos:
             get_all_org_repos(user)
 
 
-def test_gh_as_app():
-    with patch("metecho.api.gh.GitHub"):
-        assert gh_as_app("TestOrg", "TestRepo") is not None
+class TestConditionalRequestAdapter:
+    @pytest.fixture
+    def send(self, mocker):
+        return mocker.patch("requests.adapters.HTTPAdapter.send")
+
+    def make_request(self, url, token="abc"):
+        return Request(
+            "GET", url, headers={"Authorization": f"token {token}"}
+        ).prepare()
+
+    def test_not_modified(self, send):
+        url = f"https://api.github.com/repos/{uuid4()}"
+        ok = Response()
+        ok.status_code = 200
+        ok.headers = CaseInsensitiveDict(
+            {"ETag": '"abc"', "Content-Type": "application/json; charset=utf-8"}
+        )
+        ok._content = b'{"id": 123}'
+        not_modified = Response()
+        not_modified.status_code = 304
+        not_modified.headers = CaseInsensitiveDict({"X-RateLimit-Remaining": "99"})
+        send.side_effect = [ok, not_modified]
+        adapter = ConditionalRequestAdapter("installation_1")
+
+        assert adapter.send(self.make_request(url)) is ok
+        second = self.make_request(url)
+        response = adapter.send(second)
+
+        assert second.headers["If-None-Match"] == '"abc"'
+        assert response.status_code == 200
+        assert response.json() == {"id": 123}
+        assert response.headers["X-RateLimit-Remaining"] == "99"
+
+    def test_token_renewed(self, send):
+        url = f"https://api.github.com/repos/{uuid4()}"
+        ok = Response()
+        ok.status_code = 200
+        ok.headers = CaseInsensitiveDict(
+            {"ETag": '"abc"', "Content-Type": "application/json; charset=utf-8"}
+        )
+        ok._content = b'{"id": 123}'
+        send.return_value = ok
+
+        ConditionalRequestAdapter("installation_1").send(self.make_request(url))
+        # A new token for the same installation still matches:
+        renewed = self.make_request(url, token="def")
+        ConditionalRequestAdapter("installation_1").send(renewed)
+        # Another installation's doesn't:
+        other = self.make_request(url, token="ghi")
+        ConditionalRequestAdapter("installation_2").send(other)
+
+        assert renewed.headers["If-None-Match"] == '"abc"'
+        assert "If-None-Match" not in other.headers
+
+    def test_not_cached(self, send):
+        url = f"https://api.github.com/repos/{uuid4()}"
+        response = Response()
+        response.status_code = 200
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+        response._content = b"{}"
+        send.return_value = response
+        adapter = ConditionalRequestAdapter("installation_1")
+
+        adapter.send(self.make_request(url))
+        request = self.make_request(url)
+        adapter.send(request)
+
+        assert "If-None-Match" not in request.headers
+
+    def test_stream(self, send):
+        adapter = ConditionalRequestAdapter("installation_1")
+        request = self.make_request(f"https://api.github.com/repos/{uuid4()}")
+
+        assert adapter.send(request, stream=True) is send.return_value
+
+
+@pytest.mark.django_db
+class TestGhGivenUser:
+    def test_reused(self, mocker, user_factory):
+        mocker.patch.dict(f"{PATCH_ROOT}._user_sessions", clear=True)
+        login = mocker.patch(f"{PATCH_ROOT}.login")
+        user = user_factory()
+
+        assert gh_given_user(user) is gh_given_user(user)
+        assert login.call_count == 1
+
+    def test_evicted(self, mocker, user_factory):
+        mocker.patch.dict(f"{PATCH_ROOT}._user_sessions", clear=True)
+        mocker.patch(f"{PATCH_ROOT}.USER_SESSION_IDLE_TIMEOUT", 0)
+        login = mocker.patch(f"{PATCH_ROOT}.login")
+        user = user_factory()
+
+        gh_given_user(user)
+        gh_given_user(user)
+        assert login.call_count == 2
+        assert login.return_value.session.close.called
+
+
+class TestGhAsApp:
+    @pytest.fixture
+    def GitHub(self, mocker):
+        GitHub = mocker.patch(f"{PATCH_ROOT}.GitHub")
+        gh = GitHub.return_value
+        gh.app_installation_for_repository.return_value = MagicMock(id=123)
+        gh.session.auth.token = "token"
+        gh.session.auth.expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+        gh.session.auth.expires_at_str = "2030-01-01T00:00:00Z"
+        mocker.patch.dict(f"{PATCH_ROOT}._installation_ids", clear=True)
+        mocker.patch.dict(f"{PATCH_ROOT}._installation_tokens", clear=True)
+        return GitHub
+
+    def test_cached(self, GitHub, mocker):
+        gh = GitHub.return_value
+        gh.app_installation_for_repository.return_value = MagicMock(id=str(uuid4()))
+        repo_name = str(uuid4())
+        assert gh_as_app("TestOrg", repo_name) is not None
+        assert gh_as_app("TestOrg", repo_name) is not None
+
+        assert gh.app_installation_for_repository.call_count == 1
+        assert gh.login_as_app_installation.call_count == 1
+        gh.session.app_installation_token_auth.assert_called_with(
+            {
+                "token": "token",
+                "expires_at": "2030-01-01T00:00:00Z",
+                "refresh_after": ANY,
+            }
+        )
+
+        # Once the cached token has expired, a new one is minted:
+        mocker.patch(f"{PATCH_ROOT}.time.time", return_value=time.time() + 2 * 3600)
+        assert gh_as_app("TestOrg", repo_name) is not None
+
+        assert gh.login_as_app_installation.call_count == 2
+
+    def test_expiring(self, GitHub):
+        gh = GitHub.return_value
+        gh.app_installation_for_repository.return_value = MagicMock(id=str(uuid4()))
+        gh.session.auth.expires_at = datetime.now(timezone.utc) + timedelta(minutes=1)
+        repo_name = str(uuid4())
+
+        gh_as_app("TestOrg", repo_name)
+        gh_as_app("TestOrg", repo_name)
+
+        assert gh.login_as_app_installation.call_count == 2
+
+    def test_reinstalled(self, GitHub):
+        gh = GitHub.return_value
+        gh.app_installation_for_repository.side_effect = [
+            MagicMock(id=str(uuid4())),
+            MagicMock(id=str(uuid4())),
+        ]
+        gh.login_as_app_installation.side_effect = [
+            NotFoundError(MagicMock(status_code=404)),
+            None,
+        ]
+
+        assert gh_as_app("TestOrg", str(uuid4())) is not None
+        assert gh.app_installation_for_repository.call_count == 2
 
 
 def test_is_safe_path():
@@ -114,6 +289,89 @@ def test_get_cached_user(mocker):
     assert gh.user.call_count == 1  # No new calls
 
 
+class TestGetCollaborators:
+    def make_page(self, edges, cursor=None):
+        return {
+            "data": {
+                "repository": {
+                    "collaborators": {
+                        "pageInfo": {"hasNextPage": bool(cursor), "endCursor": cursor},
+                        "edges": edges,
+                    }
+                }
+            }
+        }
+
+    def test_paginated(self):
+        repo = MagicMock()
+        repo._json.side_effect = [
+            self.make_page(
+                [
+                    {
+                        "permission": "WRITE",
+                        "node": {
+                            "databaseId": 123,
+                            "login": "test-user-1",
+                            "avatarUrl": "https://example.com/avatar1.png",
+                            "name": "Test User",
+                        },
+                    }
+                ],
+                cursor="abc",
+            ),
+            self.make_page(
+                [
+                    {
+                        "permission": "READ",
+                        "node": {
+                            "databaseId": 456,
+                            "login": "test-user-2",
+                            "avatarUrl": "https://example.com/avatar2.png",
+                            "name": None,
+                        },
+                    }
+                ]
+            ),
+        ]
+
+        assert get_collaborators(repo) == [
+            {
+                "id": "123",
+                "login": "test-user-1",
+                "name": "Test User",
+                "avatar_url": "https://example.com/avatar1.png",
+                "permissions": {
+                    "pull": True,
+                    "triage": True,
+                    "push": True,
+                    "maintain": False,
+                    "admin": False,
+                },
+            },
+            {
+                "id": "456",
+                "login": "test-user-2",
+                "name": None,
+                "avatar_url": "https://example.com/avatar2.png",
+                "permissions": {
+                    "pull": True,
+                    "triage": False,
+                    "push": False,
+                    "maintain": False,
+                    "admin": False,
+                },
+            },
+        ]
+        assert repo._post.call_args[1]["data"]["variables"]["cursor"] == "abc"
+
+    def test_errors(self):
+        repo = MagicMock()
+        repo._json.return_value = {"errors": [{"message": "Nope"}]}
+
+        with pytest.raises(GraphQLError):
+            get_collaborators(repo)
+
+
 def test_get_zip_file():
     repo = MagicMock()
     with patch(f"{PATCH_ROOT}.zipfile") as zipfile:
@@ -179,6 +437,28 @@ class TestLocalGitHubCheckout:
                 with local_github_checkout(user, repo, "commit-ish"):  # pragma: nocover
                     pass
 
+    def test_checkout_cache(self, mocker, settings, tmp_path):
+        settings.CHECKOUT_CACHE_DIR = str(tmp_path)
+        user = MagicMock()
+        gh_given_user = mocker.patch(f"{PATCH_ROOT}.gh_given_user")
+        get_cached_checkout = mocker.patch(f"{PATCH_ROOT}.get_cached_checkout")
+        cached_tree = tmp_path / "tree"
+        cached_tree.mkdir()
+        (cached_tree / "sfdx-project.json").write_text("{}")
+        get_cached_checkout.return_value = cached_tree
+        repository = MagicMock(default_branch="main")
+        repository.commit.return_value.sha = "abcd1234"
+        repository.file_contents.return_value.decoded.decode.return_value = "Hello"
+        gh_given_user.return_value.repository_with_id.return_value = repository
+
+        with local_github_checkout(user, 123, "feature") as repo_root:
+            assert (Path(repo_root) / "sfdx-project.json").read_text() == "{}"
+            assert (Path(repo_root) / "cumulusci.yml").read_text() == "Hello"
+
+        repository.commit.assert_called_with("feature")
+        get_cached_checkout.assert_called_with(repository, "abcd1234")
+        assert not (cached_tree / "cumulusci.yml").exists()
+
     def test_cumulusci_yml_error(self, mocker):
         user = MagicMock()
         repo_id = 123
@@ -226,10 +506,34 @@ class TestTryCreateBranch:
             try_to_make_branch(repository, new_branch="new-branch", base_sha="123")
 
 
-def test_get_source_format():
+def test_get_source_format(tmp_path):
+    (tmp_path / "cumulusci.yml").write_text(f"# {uuid4()}\n")
     with patch(f"{PATCH_ROOT}.get_project_config") as get_project_config:
-        get_project_config.return_value = MagicMock(project__source_format="sentinel")
-        assert get_source_format() == "sentinel"
+        get_project_config.return_value = MagicMock(
+            project__source_format="sentinel", orgs__scratch={}
+        )
+        assert get_source_format(repo_root=tmp_path) == "sentinel"
+
+
+def test_get_project_config_values(tmp_path):
+    (tmp_path / "cumulusci.yml").write_text(f"# {uuid4()}\n")
+    with patch(f"{PATCH_ROOT}.get_project_config") as get_project_config:
+        get_project_config.return_value = MagicMock(
+            project__git__prefix_feature="feature/",
+            orgs__scratch={"dev": {"config_file": "orgs/dev.json"}},
+        )
+        values = get_project_config_values(repo_root=tmp_path)
+        assert values["prefix_feature"] == "feature/"
+        assert values["scratch_org_configs"] == {
+            "dev": {"config_file": "orgs/dev.json"}
+        }
+
+        assert get_project_config_values(repo_root=tmp_path) == values
+        assert get_project_config.call_count == 1
+
+        (tmp_path / "cumulusci.yml").write_text(f"# {uuid4()}\n")
+        get_project_config_values(repo_root=tmp_path)
+        assert get_project_config.call_count == 2
 
 
 class TestNormalizeCommit:
@@ -265,3 +569,83 @@ class TestNormalizeCommit:
             )
             == expected
         )
+
+
+def test_extract_light_checkout(tmp_path, monkeypatch):
+    def entry(path, type_="blob"):
+        return MagicMock(path=path, type=type_, sha=f"sha-{path}")
+
+    trees = {
+        "feature": [
+            entry("sfdx-project.json"),
+            entry("README.md"),
+            entry("orgs", "tree"),
+            entry("unpackaged", "tree"),
+            entry("force-app", "tree"),
+        ],
+        "sha-orgs": [entry("dev.json"), entry("nested", "tree")],
+        "sha-unpackaged": [entry("pre", "tree")],
+        "sha-pre": [entry("first", "tree"), entry("notes.txt")],
+    }
+    repo = MagicMock()
+    repo.tree.side_effect = lambda sha: MagicMock(tree=trees[sha])
+    repo.blob.side_effect = lambda sha: MagicMock(
+        **{"decode_content.return_value": sha}
+    )
+    monkeypatch.chdir(tmp_path)
+
+    extract_light_checkout(repo, "feature")
+
+    assert (tmp_path / "sfdx-project.json").read_text() == "sha-sfdx-project.json"
+    assert (tmp_path / "orgs" / "dev.json").read_text() == "sha-dev.json"
+    assert (tmp_path / "unpackaged" / "pre" / "first").is_dir()
+    assert not (tmp_path / "README.md").exists()
+    assert not (tmp_path / "orgs" / "nested").exists()
+    assert not (tmp_path / "unpackaged" / "pre" / "notes.txt").exists()
+    assert not (tmp_path / "unpackaged" / "post").exists()
+    assert not (tmp_path / "force-app").exists()
+
+
+class TestCheckoutCache:
+    def test_miss_then_hit(self, mocker, settings, tmp_path):
+        settings.CHECKOUT_CACHE_DIR = str(tmp_path)
+        repo = MagicMock(id=123)
+
+        def extract(*args):
+            Path("README.md").write_text("Hello")
+
+        get_zip_file = mocker.patch(f"{PATCH_ROOT}.get_zip_file")
+        mocker.patch(f"{PATCH_ROOT}.zip_file_is_safe", return_value=True)
+        mocker.patch(f"{PATCH_ROOT}.extract_zip_file", side_effect=extract)
+
+        tree = get_cached_checkout(repo, "abcd1234")
+        assert tree == tmp_path / "123" / "abcd1234" / "tree"
+        assert (tree / "README.md").read_text() == "Hello"
+        assert (tmp_path / "123" / "abcd1234" / "size").read_text() == "5"
+
+        assert get_cached_checkout(repo, "abcd1234") == tree
+        assert get_zip_file.call_count == 1
+
+    def test_unsafe(self, mocker, settings, tmp_path):
+        settings.CHECKOUT_CACHE_DIR = str(tmp_path)
+        mocker.patch(f"{PATCH_ROOT}.get_zip_file")
+        mocker.patch(f"{PATCH_ROOT}.zip_file_is_safe", return_value=False)
+
+        with pytest.raises(UnsafeZipfileError):
+            get_cached_checkout(MagicMock(id=123), "abcd1234")
+        assert list((tmp_path / "123").iterdir()) == []
+
+    def test_evict(self, settings, tmp_path):
+        settings.CHECKOUT_CACHE_DIR = str(tmp_path)
+        settings.CHECKOUT_CACHE_MAX_BYTES = 20
+        for mtime, sha in enumerate(("old", "new", "newest")):
+            entry = tmp_path / "123" / sha
+            (entry / "tree").mkdir(parents=True)
+            (entry / "size").write_text("10")
+            os.utime(entry / "size", (mtime, mtime))
+
+        evict_checkout_cache(keep=tmp_path / "123" / "old")
+
+        assert (tmp_path / "123" / "old").exists()
+        assert not (tmp_path / "123" / "new").exists()
+        assert (tmp_path / "123" / "newest").exists()
@@ -4,6 +4,8 @@ import pytest
 from rest_framework.exceptions import NotFound
 
 from ..hook_serializers import (
+    CreateHookSerializer,
+    DeleteHookSerializer,
     PrHookSerializer,
     PrReviewHookSerializer,
     PushHookSerializer,
@@ -45,6 +47,64 @@ class TestPushHookSerializer:
             serializer.process_hook()
             assert logger.info.called
 
+    def test_process_hook__branch_index(self, mocker, project_factory):
+        mocker.patch("metecho.api.models.Project.add_commits")
+        project = project_factory(repo_id=123)
+        data = {
+            "forced": False,
+            "created": True,
+            "ref": "refs/heads/feature",
+            "commits": [],
+            "repository": {"id": 123},
+            "sender": {},
+        }
+        serializer = PushHookSerializer(data=data)
+        assert serializer.is_valid(), serializer.errors
+        serializer.process_hook()
+        assert list(project.branches.values_list("name", flat=True)) == ["feature"]
+
+        serializer = PushHookSerializer(
+            data={**data, "created": False, "deleted": True}
+        )
+        assert serializer.is_valid(), serializer.errors
+        serializer.process_hook()
+        assert not project.branches.exists()
+
+
+@pytest.mark.django_db
+class TestBranchHookSerializers:
+    def test_process_hook(self, project_factory):
+        project = project_factory(repo_id=123)
+        data = {"ref": "feature", "ref_type": "branch", "repository": {"id": 123}}
+
+        serializer = CreateHookSerializer(data=data)
+        assert serializer.is_valid(), serializer.errors
+        serializer.process_hook()
+        # Redeliveries are harmless:
+        serializer.process_hook()
+        assert list(project.branches.values_list("name", flat=True)) == ["feature"]
+
+        serializer = DeleteHookSerializer(data=data)
+        assert serializer.is_valid(), serializer.errors
+        serializer.process_hook()
+        assert not project.branches.exists()
+
+    def test_process_hook__tag(self, project_factory):
+        project = project_factory(repo_id=123)
+        data = {"ref": "v1.0", "ref_type": "tag", "repository": {"id": 123}}
+
+        serializer = CreateHookSerializer(data=data)
+        assert serializer.is_valid(), serializer.errors
+        serializer.process_hook()
+        assert not project.branches.exists()
+
+    def test_process_hook__no_matching_project(self):
+        data = {"ref": "feature", "ref_type": "branch", "repository": {"id": 123}}
+        serializer = DeleteHookSerializer(data=data)
+        assert serializer.is_valid(), serializer.errors
+        with pytest.raises(NotFound):
+            serializer.process_hook()
+
 
 @pytest.mark.django_db
 class TestPrHookSerializer:
@@ -1,16 +1,19 @@
 import logging
 from collections import namedtuple
 from contextlib import ExitStack
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
+from uuid import uuid4
 
 import pytest
+from django.core.cache import cache
 from django.utils.timezone import now
-from github3.exceptions import NotFoundError
+from github3.exceptions import NotFoundError, ResponseError
 from simple_salesforce.exceptions import SalesforceGeneralError
 
 from ..jobs import (
     TaskReviewIntegrityError,
+    _claim_pooled_scratch_org,
     _create_branches_on_github,
     _create_org_and_run_flow,
     alert_user_about_expiring_org,
@@ -21,9 +24,13 @@ from ..jobs import (
     create_gh_branch_for_new_epic,
     create_pr,
     delete_scratch_org,
+    fill_scratch_org_pool,
     get_social_image,
     get_unsaved_changes,
+    populate_project_repo_ids,
+    process_github_webhooks,
     refresh_commits,
+    refresh_github_branches,
     refresh_github_issues,
     refresh_github_repositories_for_user,
     refresh_github_users,
@@ -31,7 +38,7 @@ from ..jobs import (
     submit_review,
     user_reassign,
 )
-from ..models import ScratchOrgType
+from ..models import GitHubWebhook, GitHubWebhookStatus, ScratchOrg, ScratchOrgType
 
 Author = namedtuple("Author", ("avatar_url", "login"))
 Commit = namedtuple(
@@ -304,6 +311,49 @@ class TestRefreshGitHubIssues:
         refresh_github_issues(project, originating_user_id=None)
         assert issue == project.issues.get()
 
+    def test_incremental(
+        self, mocker, project_factory, git_hub_issue_factory, short_issue_factory
+    ):
+        project = project_factory(
+            currently_fetching_issues=True,
+            has_truncated_issues=True,
+            issues_updated_at=datetime(2021, 1, 1, tzinfo=timezone.utc),
+        )
+        issue = git_hub_issue_factory(project=project, state="open")
+        closed = short_issue_factory(
+            id=issue.github_id,
+            state="closed",
+            pull_request_urls=None,
+            updated_at=datetime(2021, 1, 2, tzinfo=timezone.utc),
+        )
+        opened = short_issue_factory(
+            pull_request_urls=None,
+            updated_at=datetime(2021, 1, 3, tzinfo=timezone.utc),
+        )
+        # Opened and closed since the last refresh; it's never stored:
+        opened_and_closed = short_issue_factory(
+            state="closed",
+            pull_request_urls=None,
+            updated_at=datetime(2021, 1, 4, tzinfo=timezone.utc),
+        )
+        get_repo_info = mocker.patch(f"{PATCH_ROOT}.get_repo_info", autospec=True)
+        issues = get_repo_info.return_value.issues
+        issues.return_value.__next__.side_effect = [closed, opened, opened_and_closed]
+
+        refresh_github_issues(project, originating_user_id=None)
+
+        assert issues.call_args.kwargs["since"] == datetime(
+            2021, 1, 1, tzinfo=timezone.utc
+        )
+        project.refresh_from_db()
+        issue.refresh_from_db()
+        assert issue.state == "closed"
+        assert project.issues.count() == 2
+        assert not project.issues.filter(github_id=opened_and_closed.id).exists()
+        assert project.issues_updated_at == datetime(2021, 1, 4, tzinfo=timezone.utc)
+        # Only the first refresh can tell whether issues were left out
+        assert project.has_truncated_issues
+
     def test_error(self, mocker, caplog, project_factory):
         mocker.patch(f"{PATCH_ROOT}.get_repo_info", side_effect=Exception("Oh no!"))
         project = project_factory(currently_fetching_issues=True)
@@ -313,6 +363,7 @@ class TestRefreshGitHubIssues:
 
         project.refresh_from_db()
         assert project.issues.count() == 0
+        assert project.issues_updated_at is None
         assert not project.currently_fetching_issues
         assert "Oh no!" in caplog.text
 
@@ -429,12 +480,10 @@ def test_get_unsaved_changes(scratch_org_factory):
         latest_revision_numbers={"TypeOne": {"NameOne": 10}}
     )
     with ExitStack() as stack:
-        stack.enter_context(patch(f"{PATCH_ROOT}.local_github_checkout"))
-        stack.enter_context(patch("metecho.api.sf_org_changes.get_repo_info"))
-        get_valid_target_directories = stack.enter_context(
-            patch(f"{PATCH_ROOT}.get_valid_target_directories")
+        get_cached_valid_target_directories = stack.enter_context(
+            patch(f"{PATCH_ROOT}.get_cached_valid_target_directories")
         )
-        get_valid_target_directories.return_value = (
+        get_cached_valid_target_directories.return_value = (
             {"source": ["src"], "config": [], "post": [], "pre": []},
             False,
         )
@@ -485,6 +534,196 @@ def test_create_branches_on_github_then_create_scratch_org():
         assert _create_org_and_run_flow.called
 
 
+def test_create_branches_on_github_then_create_scratch_org__claimed():
+    with ExitStack() as stack:
+        local_github_checkout = stack.enter_context(
+            patch(f"{PATCH_ROOT}.local_github_checkout")
+        )
+        _create_org_and_run_flow = stack.enter_context(
+            patch(f"{PATCH_ROOT}._create_org_and_run_flow")
+        )
+        _claim_pooled_scratch_org = stack.enter_context(
+            patch(f"{PATCH_ROOT}._claim_pooled_scratch_org")
+        )
+        _claim_pooled_scratch_org.return_value = True
+
+        org = MagicMock(task=None, epic=None, pool_id=None)
+        org.parent = MagicMock(branch_name="main", latest_sha="abcd1234")
+        create_branches_on_github_then_create_scratch_org(
+            scratch_org=org, originating_user_id=None
+        )
+
+        assert not local_github_checkout.called
+        assert not _create_org_and_run_flow.called
+        org.finalize_provision.assert_called_once_with(originating_user_id=None)
+
+
+@pytest.mark.django_db
+class TestScratchOrgPool:
+    @pytest.fixture
+    def pool(self, scratch_org_pool_factory):
+        return scratch_org_pool_factory()
+
+    @pytest.fixture
+    def pooled_org(self, pool, scratch_org_factory):
+        return scratch_org_factory(
+            pool=pool,
+            task=None,
+            project=pool.project,
+            owner=pool.owner,
+            org_type=ScratchOrgType.PLAYGROUND,
+            is_created=True,
+            last_modified_at=now(),
+            latest_commit="abc123",
+            url="https://pooled.example.com",
+            config={"org_id": "00D000000000001"},
+            owner_sf_username="devhub@example.com",
+            expiry_job_id="old-job",
+            latest_revision_numbers={"TypeOne": {"NameOne": 1}},
+        )
+
+    @pytest.fixture
+    def scratch_org(self, pool, scratch_org_factory, user_factory):
+        return scratch_org_factory(
+            task=None,
+            project=pool.project,
+            owner=user_factory(),
+            org_type=ScratchOrgType.PLAYGROUND,
+            org_config_name="dev",
+        )
+
+    def test_claim(self, mocker, pool, pooled_org, scratch_org):
+        get_repo_info = mocker.patch(f"{PATCH_ROOT}.get_repo_info")
+        get_repo_info.return_value.branch.return_value.commit.sha = "abc123"
+        get_scheduler = mocker.patch(f"{PATCH_ROOT}.get_scheduler")
+        _reassign_org_user = mocker.patch(f"{PATCH_ROOT}._reassign_org_user")
+        fill_scratch_org_pool_job = mocker.patch(
+            f"{PATCH_ROOT}.fill_scratch_org_pool_job"
+        )
+
+        assert _claim_pooled_scratch_org(
+            scratch_org, user=scratch_org.owner, repo_id=123, commit_ish="main"
+        )
+
+        scratch_org.refresh_from_db()
+        pool.refresh_from_db()
+        assert scratch_org.url == "https://pooled.example.com"
+        assert scratch_org.config == {"org_id": "00D000000000001"}
+        assert scratch_org.owner_sf_username == "devhub@example.com"
+        assert scratch_org.is_created
+        assert scratch_org.latest_revision_numbers == {"TypeOne": {"NameOne": 1}}
+        assert not ScratchOrg.objects.filter(pk=pooled_org.pk).exists()
+        assert pool.hits == 1
+        get_scheduler.return_value.cancel.assert_called_once_with("old-job")
+        _reassign_org_user.assert_called_once_with(
+            scratch_org, new_user=scratch_org.owner
+        )
+        fill_scratch_org_pool_job.delay.assert_called_once_with(pool)
+
+    def test_claim__other_commit(self, mocker, pool, pooled_org, scratch_org):
+        get_repo_info = mocker.patch(f"{PATCH_ROOT}.get_repo_info")
+        get_repo_info.return_value.branch.return_value.commit.sha = "def456"
+
+        assert not _claim_pooled_scratch_org(
+            scratch_org, user=scratch_org.owner, repo_id=123, commit_ish="main"
+        )
+
+        pool.refresh_from_db()
+        assert pool.misses == 1
+        assert ScratchOrg.objects.filter(pk=pooled_org.pk).exists()
+
+    def test_claim__github_error(self, mocker, pool, pooled_org, scratch_org):
+        mocker.patch(f"{PATCH_ROOT}.get_repo_info", side_effect=Exception("Oh no!"))
+
+        assert not _claim_pooled_scratch_org(
+            scratch_org, user=scratch_org.owner, repo_id=123, commit_ish="main"
+        )
+
+        pool.refresh_from_db()
+        assert pool.misses == 1
+        assert ScratchOrg.objects.filter(pk=pooled_org.pk).exists()
+
+    def test_claim__reassign_error(self, mocker, pool, pooled_org, scratch_org):
+        get_repo_info = mocker.patch(f"{PATCH_ROOT}.get_repo_info")
+        get_repo_info.return_value.branch.return_value.commit.sha = "abc123"
+        mocker.patch(f"{PATCH_ROOT}.get_scheduler")
+        mocker.patch(
+            f"{PATCH_ROOT}._reassign_org_user", side_effect=Exception("Oh no!")
+        )
+        delete_org = mocker.patch(f"{PATCH_ROOT}.delete_org")
+        fill_scratch_org_pool_job = mocker.patch(
+            f"{PATCH_ROOT}.fill_scratch_org_pool_job"
+        )
+
+        assert not _claim_pooled_scratch_org(
+            scratch_org, user=scratch_org.owner, repo_id=123, commit_ish="main"
+        )
+
+        scratch_org.refresh_from_db()
+        pool.refresh_from_db()
+        assert delete_org.called
+        assert scratch_org.url == ""
+        assert scratch_org.config == {}
+        assert not scratch_org.is_created
+        assert pool.hits == 0
+        assert pool.misses == 1
+        assert not fill_scratch_org_pool_job.delay.called
+
+    def test_claim__empty(self, mocker, pool, scratch_org):
+        get_repo_info = mocker.patch(f"{PATCH_ROOT}.get_repo_info")
+
+        assert not _claim_pooled_scratch_org(
+            scratch_org, user=scratch_org.owner, repo_id=123, commit_ish="main"
+        )
+
+        pool.refresh_from_db()
+        assert pool.misses == 1
+        assert not get_repo_info.called
+
+    def test_claim__no_pool(self, mocker, scratch_org_factory):
+        get_repo_info = mocker.patch(f"{PATCH_ROOT}.get_repo_info")
+        scratch_org = scratch_org_factory(org_config_name="qa")
+
+        assert not _claim_pooled_scratch_org(
+            scratch_org, user=scratch_org.owner, repo_id=123, commit_ish="main"
+        )
+        assert not get_repo_info.called
+
+    def test_fill(self, mocker, pool, pooled_org):
+        get_repo_info = mocker.patch(f"{PATCH_ROOT}.get_repo_info")
+        get_repo_info.return_value.branch.return_value.commit.sha = "def456"
+        delete_scratch_org_job = mocker.patch(f"{PATCH_ROOT}.delete_scratch_org_job")
+        provision_job = mocker.patch(
+            f"{PATCH_ROOT}.create_branches_on_github_then_create_scratch_org_job"
+        )
+
+        fill_scratch_org_pool(pool)
+
+        pool.refresh_from_db()
+        pooled_org.refresh_from_db()
+        assert pooled_org.delete_queued_at is not None
+        assert delete_scratch_org_job.delay.called
+        assert pool.recycled == 1
+        assert pool.last_filled_at is not None
+        assert pool.orgs.active().filter(delete_queued_at__isnull=True).count() == 2
+        assert provision_job.delay.call_count == 2
+
+    def test_fill__full(self, mocker, pool, pooled_org):
+        pool.size = 1
+        pool.save()
+        get_repo_info = mocker.patch(f"{PATCH_ROOT}.get_repo_info")
+        get_repo_info.return_value.branch.return_value.commit.sha = "abc123"
+        provision_job = mocker.patch(
+            f"{PATCH_ROOT}.create_branches_on_github_then_create_scratch_org_job"
+        )
+
+        fill_scratch_org_pool(pool)
+
+        pool.refresh_from_db()
+        assert pool.recycled == 0
+        assert not provision_job.delay.called
+
+
 @pytest.mark.django_db
 class TestRefreshScratchOrg:
     def test_refresh_scratch_org(self, scratch_org_factory):
@@ -601,6 +840,84 @@ def test_delete_scratch_org__exception(scratch_org_factory):
         assert get_latest_revision_numbers.called
 
 
+@pytest.mark.django_db
+class TestProcessGitHubWebhooks:
+    def test_in_order(self, mocker):
+        serializer_class = MagicMock()
+        serializer_class.return_value.process_hook.side_effect = [
+            Exception("Oh no!"),
+            None,
+        ]
+        mocker.patch.dict(
+            "metecho.api.hook_serializers.HOOK_SERIALIZERS", {"push": serializer_class}
+        )
+        first = GitHubWebhook.objects.create(
+            event="push", repo_id=123, payload={"n": 1}
+        )
+        second = GitHubWebhook.objects.create(
+            event="push", repo_id=123, payload={"n": 2}
+        )
+        other = GitHubWebhook.objects.create(
+            event="push", repo_id=456, payload={"n": 3}
+        )
+
+        process_github_webhooks(repo_id=123)
+
+        assert [call.kwargs["data"] for call in serializer_class.call_args_list] == [
+            {"n": 1},
+            {"n": 2},
+        ]
+        first.refresh_from_db()
+        second.refresh_from_db()
+        other.refresh_from_db()
+        assert first.status == GitHubWebhookStatus.FAILED
+        assert first.error == "Oh no!"
+        assert second.status == GitHubWebhookStatus.PROCESSED
+        assert other.status == GitHubWebhookStatus.PENDING
+
+    def test_retries_processing(self, mocker):
+        serializer_class = MagicMock()
+        mocker.patch.dict(
+            "metecho.api.hook_serializers.HOOK_SERIALIZERS", {"push": serializer_class}
+        )
+        # Left behind by a job that died while processing it
+        stale = GitHubWebhook.objects.create(
+            event="push",
+            repo_id=123,
+            payload={"n": 1},
+            status=GitHubWebhookStatus.PROCESSING,
+        )
+        GitHubWebhook.objects.create(event="push", repo_id=123, payload={"n": 2})
+
+        process_github_webhooks(repo_id=123)
+
+        assert [call.kwargs["data"] for call in serializer_class.call_args_list] == [
+            {"n": 1},
+            {"n": 2},
+        ]
+        stale.refresh_from_db()
+        assert stale.status == GitHubWebhookStatus.PROCESSED
+
+    def test_locked(self, mocker):
+        serializer_class = MagicMock()
+        mocker.patch.dict(
+            "metecho.api.hook_serializers.HOOK_SERIALIZERS", {"push": serializer_class}
+        )
+        webhook = GitHubWebhook.objects.create(
+            event="push", repo_id=123, payload={"n": 1}
+        )
+        # Another job is processing this repository's deliveries:
+        _advisory_lock = mocker.patch(f"{PATCH_ROOT}._advisory_lock")
+        _advisory_lock.return_value.__enter__.return_value = False
+
+        process_github_webhooks(repo_id=123)
+
+        _advisory_lock.assert_called_once_with(123)
+        assert not serializer_class.called
+        webhook.refresh_from_db()
+        assert webhook.status == GitHubWebhookStatus.PENDING
+
+
 @pytest.mark.django_db
 class TestRefreshGitHubRepositoriesForUser:
     def test_success(self, mocker, user_factory):
@@ -608,10 +925,13 @@ class TestRefreshGitHubRepositoriesForUser:
         async_to_sync = mocker.patch("metecho.api.models.async_to_sync")
         mocker.patch(
             "metecho.api.jobs.get_all_org_repos",
-            return_value=[
-                MagicMock(id=123, html_url="https://example.com/", permissions={}),
-                MagicMock(id=456, html_url="https://example.com/", permissions={}),
-            ],
+            return_value=(
+                [
+                    MagicMock(id=123, html_url="https://example.com/", permissions={}),
+                    MagicMock(id=456, html_url="https://example.com/", permissions={}),
+                ],
+                None,
+            ),
         )
 
         refresh_github_repositories_for_user(user)
@@ -621,6 +941,62 @@ class TestRefreshGitHubRepositoriesForUser:
         assert user.repositories.count() == 2
         assert async_to_sync.called
 
+    def test_diff(self, mocker, user_factory, git_hub_repository_factory):
+        user = user_factory(currently_fetching_repos=True)
+        unchanged = git_hub_repository_factory(
+            user=user, repo_id=1, repo_url="https://example.com/1", permissions={}
+        )
+        changed = git_hub_repository_factory(
+            user=user, repo_id=2, repo_url="https://example.com/2", permissions={}
+        )
+        git_hub_repository_factory(user=user, repo_id=3)
+        mocker.patch("metecho.api.models.async_to_sync")
+        mocker.patch(
+            "metecho.api.jobs.get_all_org_repos",
+            return_value=(
+                [
+                    MagicMock(id=1, html_url="https://example.com/1", permissions={}),
+                    MagicMock(
+                        id=2,
+                        html_url="https://example.com/2",
+                        permissions={"push": True},
+                    ),
+                    MagicMock(id=4, html_url="https://example.com/4", permissions={}),
+                ],
+                None,
+            ),
+        )
+
+        refresh_github_repositories_for_user(user)
+
+        assert set(user.repositories.values_list("repo_id", flat=True)) == {1, 2, 4}
+        assert user.repositories.get(repo_id=1).id == unchanged.id
+        changed = user.repositories.get(id=changed.id)
+        assert changed.permissions == {"push": True}
+
+    def test_etag_unchanged(self, mocker, user_factory):
+        user = user_factory(currently_fetching_repos=True)
+        mocker.patch("metecho.api.models.async_to_sync")
+        get_all_org_repos = mocker.patch(
+            "metecho.api.jobs.get_all_org_repos",
+            return_value=(
+                [MagicMock(id=123, html_url="https://example.com/", permissions={})],
+                str(uuid4()),
+            ),
+        )
+
+        refresh_github_repositories_for_user(user)
+        user.repositories.all().delete()
+        refresh_github_repositories_for_user(user)
+        assert user.repositories.count() == 0
+
+        get_all_org_repos.return_value = (
+            get_all_org_repos.return_value[0],
+            str(uuid4()),
+        )
+        refresh_github_repositories_for_user(user)
+        assert user.repositories.count() == 1
+
     def test_error(self, mocker, caplog, user_factory, git_hub_repository_factory):
         user = user_factory(currently_fetching_repos=True)
         git_hub_repository_factory(user=user)
@@ -749,6 +1125,70 @@ class TestErrorHandling:
             assert async_to_sync.called
 
 
+@pytest.mark.django_db
+def test_refresh_github_branches(mocker, project_factory):
+    Branch = namedtuple("Branch", ("name",))
+    get_repo_info = mocker.patch(f"{PATCH_ROOT}.get_repo_info")
+    get_repo_info.return_value = MagicMock(
+        default_branch="main",
+        **{"branches.return_value": [Branch("main"), Branch("kept"), Branch("new")]},
+    )
+    project = project_factory(repo_id=123)
+    project.add_branch("kept")
+    project.add_branch("deleted")
+
+    refresh_github_branches(project)
+
+    project.refresh_from_db()
+    assert list(project.branches.values_list("name", flat=True)) == ["kept", "new"]
+    assert project.branches_updated_at is not None
+
+
+@pytest.mark.django_db
+class TestPopulateProjectRepoIds:
+    def test_success(self, mocker, project_factory):
+        get_repo_info = mocker.patch("metecho.api.model_mixins.get_repo_info")
+        get_repo_info.return_value = MagicMock(id=789)
+        project = project_factory(repo_id=None)
+
+        populate_project_repo_ids()
+
+        project.refresh_from_db()
+        assert project.repo_id == 789
+
+    def test_backoff(self, mocker, project_factory):
+        get_repo_info = mocker.patch("metecho.api.model_mixins.get_repo_info")
+        get_repo_info.side_effect = ResponseError(MagicMock())
+        project = project_factory(repo_id=None)
+        cache.delete(f"gh_repo_id_backoff_{project.id}")
+
+        populate_project_repo_ids()
+        populate_project_repo_ids()
+        assert get_repo_info.call_count == 1
+
+        backoff = cache.get(f"gh_repo_id_backoff_{project.id}")
+        assert backoff["failures"] == 1
+        mocker.patch(
+            f"{PATCH_ROOT}.now",
+            return_value=backoff["retry_at"] + timedelta(seconds=1),
+        )
+        populate_project_repo_ids()
+        assert get_repo_info.call_count == 2
+        backoff = cache.get(f"gh_repo_id_backoff_{project.id}")
+        assert backoff["failures"] == 2
+
+        get_repo_info.side_effect = None
+        get_repo_info.return_value = MagicMock(id=789)
+        mocker.patch(
+            f"{PATCH_ROOT}.now",
+            return_value=backoff["retry_at"] + timedelta(seconds=1),
+        )
+        populate_project_repo_ids()
+        project.refresh_from_db()
+        assert project.repo_id == 789
+        assert cache.get(f"gh_repo_id_backoff_{project.id}") is None
+
+
 @pytest.mark.django_db
 class TestRefreshCommits:
     def test_refreshes_commits(
@@ -790,8 +1230,10 @@ class TestRefreshCommits:
             )
             repo = MagicMock(
                 **{
-                    "compare_commits.return_value": MagicMock(ahead_by=0),
-                    "branch.return_value": MagicMock(commit=MagicMock(sha="bleep")),
+                    "compare_commits.return_value": MagicMock(
+                        ahead_by=0, total_commits=1, commits=[commit1]
+                    ),
+                    "branch.return_value": MagicMock(commit=MagicMock(sha="abcd1234")),
                     "commits.return_value": [commit1, commit2],
                 }
             )
@@ -806,7 +1248,28 @@ class TestRefreshCommits:
                 project=project, branch_name="task", originating_user_id=None
             )
             task.refresh_from_db()
-            assert len(task.commits) == 1
+            assert task.commit_count == 1
+            assert task.commits.get().author.username == "test_user"
+            assert not repo.commits.called
+
+            # Comparisons of more than 250 commits come back truncated. All the
+            # truncated Tasks share one listing of the branch history:
+            other_task = task_factory(
+                epic=epic, branch_name="task", origin_sha="1234abcd"
+            )
+            repo.compare_commits.return_value = MagicMock(
+                ahead_by=0, total_commits=2, commits=[]
+            )
+            refresh_commits(
+                project=project, branch_name="task", originating_user_id=None
+            )
+            task.refresh_from_db()
+            other_task.refresh_from_db()
+            assert list(task.commits.values_list("sha", flat=True)) == ["abcd1234"]
+            assert list(other_task.commits.values_list("sha", flat=True)) == [
+                "abcd1234"
+            ]
+            repo.commits.assert_called_once_with("abcd1234", number=3)
 
             refresh_commits(
                 project=project, branch_name="epic", originating_user_id=None
@@ -908,6 +1371,9 @@ class TestRefreshGitHubUsers:
         )
         repo = MagicMock(**{"collaborators.return_value": [collab1, collab2]})
         mocker.patch(f"{PATCH_ROOT}.get_repo_info", return_value=repo)
+        mocker.patch(
+            f"{PATCH_ROOT}.get_collaborators", side_effect=Exception("No GraphQL")
+        )
         get_cached_user = mocker.patch(f"{PATCH_ROOT}.get_cached_user")
         get_cached_user.return_value.name = "FULL NAME"
         async_to_sync = mocker.patch("metecho.api.model_mixins.async_to_sync")
@@ -934,6 +1400,33 @@ class TestRefreshGitHubUsers:
         assert not project.currently_fetching_github_users
         assert async_to_sync.called
 
+    def test_graphql(
+        self,
+        mocker,
+        user_factory,
+        project_factory,
+        git_hub_repository_factory,
+    ):
+        user = user_factory()
+        project = project_factory(repo_id=123, currently_fetching_github_users=True)
+        git_hub_repository_factory(repo_id=123, user=user)
+        mocker.patch(f"{PATCH_ROOT}.get_repo_info")
+        mocker.patch(
+            f"{PATCH_ROOT}.get_collaborators",
+            return_value=[{"id": "456", "login": "b"}, {"id": "123", "login": "A"}],
+        )
+        get_cached_user = mocker.patch(f"{PATCH_ROOT}.get_cached_user")
+        mocker.patch("metecho.api.model_mixins.async_to_sync")
+
+        refresh_github_users(project, originating_user_id=None)
+
+        project.refresh_from_db()
+        assert project.github_users == [
+            {"id": "123", "login": "A"},
+            {"id": "456", "login": "b"},
+        ]
+        assert not get_cached_user.called
+
     def test_expand_user_error(
         self,
         caplog,
@@ -956,6 +1449,9 @@ class TestRefreshGitHubUsers:
         )
         repo = MagicMock(**{"collaborators.return_value": [collab1]})
         mocker.patch(f"{PATCH_ROOT}.get_repo_info", return_value=repo)
+        mocker.patch(
+            f"{PATCH_ROOT}.get_collaborators", side_effect=Exception("No GraphQL")
+        )
         mocker.patch(
             f"{PATCH_ROOT}.get_cached_user", side_effect=Exception("GITHUB ERROR")
         )
@@ -1204,17 +1700,19 @@ class TestAvailableTaskOrgConfigNames:
                     ),
                 }
             )
-            stack.enter_context(patch(f"{PATCH_ROOT}.get_project_config"))
-            BaseCumulusCI = stack.enter_context(
-                patch("metecho.api.sf_org_changes.BaseCumulusCI")
-            )
-            BaseCumulusCI.return_value = MagicMock(
-                **{"project_config.orgs__scratch": {}}
+            get_project_config_values = stack.enter_context(
+                patch(f"{PATCH_ROOT}.get_project_config_values")
             )
+            get_project_config_values.return_value = {
+                "scratch_org_configs": {"dev": {"config_file": "orgs/dev.json"}}
+            }
 
             available_org_config_names(project, user=user)
 
             assert project.finalize_available_org_config_names.called
+            assert project.org_config_names == [
+                {"key": "dev", "config_file": "orgs/dev.json"}
+            ]
 
     def test_available_org_config_names__error(self, project_factory, user_factory):
         project = project_factory()
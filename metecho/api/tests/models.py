@@ -5,11 +5,15 @@ from unittest.mock import MagicMock, patch
 import pytest
 from django.core.exceptions import ValidationError
 from django.utils.timezone import now
+from github3.exceptions import NotFoundError
 from simple_salesforce.exceptions import SalesforceError
 
 from ..models import (
     Epic,
     EpicStatus,
+    GitHubCommitAuthor,
+    ScratchOrg,
+    ScratchOrgRevisionSnapshot,
     ScratchOrgType,
     Task,
     TaskStatus,
@@ -99,6 +103,116 @@ class TestProject:
             assert project.branch_name == "main"
             assert project.latest_sha == "abcd1234"
 
+    def test_add_commits__unmerged(
+        self, mocker, project_factory, epic_factory, task_factory
+    ):
+        project = project_factory(branch_name="main")
+        epic = epic_factory(project=project, branch_name="epic")
+        merged = task_factory(epic=epic, branch_name="feature")
+        unmerged = task_factory(epic=None, project=project, branch_name="feature")
+        other = task_factory(epic=epic, branch_name="other")
+        gh = mocker.patch("metecho.api.models.gh")
+        gh.normalize_commit.side_effect = lambda commit, sender: commit
+        repo = gh.get_repo_info.return_value
+        repo.branch.side_effect = lambda name: MagicMock(commit=MagicMock(sha=name))
+        repo.compare_commits.side_effect = lambda base, head: MagicMock(
+            ahead_by=int(base == "main")
+        )
+        mocker.patch("metecho.api.model_mixins.async_to_sync")
+
+        project.add_commits(commits=[{"id": "123"}], ref="feature", sender={})
+
+        merged.refresh_from_db()
+        unmerged.refresh_from_db()
+        other.refresh_from_db()
+        assert not merged.has_unmerged_commits
+        assert unmerged.has_unmerged_commits
+        assert merged.commit_count == unmerged.commit_count == 1
+        assert other.commit_count == 0
+        # The pushed branch is only looked up once:
+        assert repo.branch.call_count == 3
+
+    def test_add_commits__based_tasks(
+        self, mocker, project_factory, epic_factory, task_factory
+    ):
+        project = project_factory(branch_name="main")
+        epic = epic_factory(project=project, branch_name="epic")
+        merged = task_factory(
+            epic=epic,
+            branch_name="merged",
+            status=TaskStatus.IN_PROGRESS,
+            has_unmerged_commits=True,
+        )
+        planned = task_factory(
+            epic=epic,
+            branch_name="planned",
+            status=TaskStatus.PLANNED,
+            has_unmerged_commits=True,
+        )
+        gh = mocker.patch("metecho.api.models.gh")
+        gh.normalize_commit.side_effect = lambda commit, sender: commit
+        repo = gh.get_repo_info.return_value
+        repo.branch.side_effect = lambda name: MagicMock(commit=MagicMock(sha=name))
+        repo.compare_commits.return_value = MagicMock(ahead_by=0)
+        async_to_sync = mocker.patch("metecho.api.model_mixins.async_to_sync")
+
+        project.add_commits(commits=[{"id": "123"}], ref="epic", sender={})
+
+        merged.refresh_from_db()
+        planned.refresh_from_db()
+        assert not merged.has_unmerged_commits
+        assert planned.has_unmerged_commits
+        repo.compare_commits.assert_called_once_with("epic", "merged")
+        assert async_to_sync.called
+
+    def test_add_commits__branch_not_found(
+        self, mocker, project_factory, epic_factory, task_factory
+    ):
+        project = project_factory(branch_name="main")
+        epic = epic_factory(project=project, branch_name="epic")
+        task = task_factory(epic=epic, branch_name="feature", has_unmerged_commits=True)
+        gh = mocker.patch("metecho.api.models.gh")
+        gh.normalize_commit.side_effect = lambda commit, sender: commit
+        repo = gh.get_repo_info.return_value
+        repo.branch.side_effect = NotFoundError(MagicMock(status_code=404))
+        mocker.patch("metecho.api.model_mixins.async_to_sync")
+
+        project.add_commits(commits=[{"id": "123"}], ref="feature", sender={})
+
+        task.refresh_from_db()
+        assert task.has_unmerged_commits
+        assert task.commit_count == 1
+        assert not repo.compare_commits.called
+
+    def test_add_commits__deleted(
+        self, mocker, project_factory, epic_factory, task_factory
+    ):
+        project = project_factory(branch_name="main")
+        epic = epic_factory(project=project, branch_name="epic")
+        task_factory(epic=epic, branch_name="feature")
+        gh = mocker.patch("metecho.api.models.gh")
+        mocker.patch("metecho.api.model_mixins.async_to_sync")
+
+        project.add_commits(commits=[], ref="feature", sender={})
+
+        assert not gh.get_repo_info.called
+
+    def test_has_push_permission(
+        self,
+        django_assert_num_queries,
+        user_factory,
+        project_factory,
+        git_hub_repository_factory,
+    ):
+        user = user_factory()
+        project = project_factory(repo_id=123)
+        git_hub_repository_factory(user=user, repo_id=123, permissions={"push": True})
+
+        with django_assert_num_queries(1):
+            assert project.has_push_permission(user)
+            assert project.has_push_permission(user)
+        assert not project.has_push_permission(user_factory())
+
     def test_queue_available_org_config_names(self, user_factory, project_factory):
         user = user_factory()
         project = project_factory()
@@ -433,6 +547,37 @@ class TestTask:
         ]
 
         assert task.get_all_users_in_commits == expected
+        assert GitHubCommitAuthor.objects.count() == 2
+
+    def test_append_commits(self, task_factory):
+        author = {
+            "name": "Name 1",
+            "email": "name1@example.com",
+            "username": "name1",
+            "avatar_url": "",
+        }
+        task = task_factory(commits=[{"id": "456", "author": author}, {"id": "123"}])
+
+        task.append_commits([{"id": "abc", "author": author}])
+        task.save()
+        task.refresh_from_db()
+
+        assert task.commit_count == 3
+        assert task.latest_sha == "abc"
+        assert list(task.commits.values_list("sha", "position")) == [
+            ("abc", 2),
+            ("456", 1),
+            ("123", 0),
+        ]
+        assert task.commits.first().as_dict()["author"] == author
+        assert GitHubCommitAuthor.objects.filter(username="name1").count() == 1
+
+        task.set_commits([{"id": "def"}])
+        task.save()
+        task.refresh_from_db()
+
+        assert task.commit_count == 1
+        assert list(task.commits.values_list("sha", "position")) == [("def", 0)]
 
     def test_add_reviewer(self, task_factory):
         task = task_factory()
@@ -863,6 +1008,64 @@ class TestScratchOrg:
 
             assert not get_unsaved_changes_job.delay.called
 
+    def test_notify_changed__pooled(
+        self, scratch_org_factory, scratch_org_pool_factory
+    ):
+        pool = scratch_org_pool_factory()
+        with ExitStack() as stack:
+            stack.enter_context(
+                patch(
+                    "metecho.api.jobs."
+                    "create_branches_on_github_then_create_scratch_org_job"
+                )
+            )
+            async_to_sync = stack.enter_context(
+                patch("metecho.api.model_mixins.async_to_sync")
+            )
+            scratch_org = scratch_org_factory(
+                pool=pool, task=None, project=pool.project, owner=pool.owner
+            )
+            scratch_org.notify_changed(originating_user_id=None)
+
+            assert not async_to_sync.called
+
+    def test_revision_snapshot(self, scratch_org_factory):
+        scratch_org = scratch_org_factory(
+            latest_revision_numbers={"TypeOne": {"NameOne": 1}}
+        )
+        scratch_org.refresh_from_db()
+
+        assert scratch_org.latest_revision_numbers == {"TypeOne": {"NameOne": 1}}
+        assert scratch_org.org_revision_numbers == {}
+        assert ScratchOrgRevisionSnapshot.objects.filter(
+            scratch_org=scratch_org
+        ).exists()
+
+    def test_revision_snapshot__not_created_until_needed(self, scratch_org_factory):
+        scratch_org = scratch_org_factory()
+
+        assert scratch_org.latest_revision_numbers == {}
+        assert not ScratchOrgRevisionSnapshot.objects.filter(
+            scratch_org=scratch_org
+        ).exists()
+
+    def test_revision_snapshot__flag_saves_skip_it(self, scratch_org_factory):
+        with ExitStack() as stack:
+            stack.enter_context(patch("metecho.api.jobs.get_unsaved_changes_job"))
+            scratch_org = scratch_org_factory(
+                latest_revision_numbers={"TypeOne": {"NameOne": 1}}
+            )
+            scratch_org = ScratchOrg.objects.get(pk=scratch_org.pk)
+            scratch_org.latest_revision_numbers["TypeOne"]["NameOne"] = 2
+
+            scratch_org.queue_get_unsaved_changes(
+                force_get=True, originating_user_id=None
+            )
+
+            scratch_org.refresh_from_db()
+            assert scratch_org.currently_refreshing_changes
+            assert scratch_org.latest_revision_numbers == {"TypeOne": {"NameOne": 1}}
+
     def test_finalize_provision(self, scratch_org_factory):
         with ExitStack() as stack:
             async_to_sync = stack.enter_context(
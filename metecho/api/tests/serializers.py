@@ -826,7 +826,7 @@ class TestTaskAssigneeSerializer:
         task = task_factory(
             assigned_dev=user.github_id,
             assigned_qa=user.github_id,
-            commits=["abc123"],
+            commits=[{"id": "abc123"}],
             epic__project__repo_id=repo.repo_id,
             epic__project__github_users=[
                 {"id": user.github_id, "permissions": {"push": True}},
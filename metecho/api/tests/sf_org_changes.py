@@ -1,11 +1,13 @@
 from contextlib import ExitStack
 from unittest.mock import MagicMock, patch
+from uuid import uuid4
 
 import pytest
 
 from ..sf_org_changes import (
     commit_changes_to_github,
     compare_revisions,
+    get_cached_valid_target_directories,
     get_latest_revision_numbers,
     get_valid_target_directories,
     run_retrieve_task,
@@ -22,7 +24,7 @@ class TestRunRetrieveTask:
             scratch_org = scratch_org_factory()
 
             stack.enter_context(patch(f"{PATCH_ROOT}.refresh_access_token"))
-            stack.enter_context(patch(f"{PATCH_ROOT}.BaseCumulusCI"))
+            stack.enter_context(patch(f"{PATCH_ROOT}.get_project_config_values"))
             stack.enter_context(patch(f"{PATCH_ROOT}.get_repo_info"))
             get_valid_target_directories = stack.enter_context(
                 patch(f"{PATCH_ROOT}.get_valid_target_directories")
@@ -46,7 +48,7 @@ class TestRunRetrieveTask:
             scratch_org = scratch_org_factory()
 
             stack.enter_context(patch(f"{PATCH_ROOT}.refresh_access_token"))
-            stack.enter_context(patch(f"{PATCH_ROOT}.BaseCumulusCI"))
+            stack.enter_context(patch(f"{PATCH_ROOT}.get_project_config_values"))
             stack.enter_context(patch(f"{PATCH_ROOT}.get_repo_info"))
             get_valid_target_directories = stack.enter_context(
                 patch(f"{PATCH_ROOT}.get_valid_target_directories")
@@ -70,7 +72,7 @@ class TestRunRetrieveTask:
             scratch_org = scratch_org_factory()
 
             stack.enter_context(patch(f"{PATCH_ROOT}.refresh_access_token"))
-            stack.enter_context(patch(f"{PATCH_ROOT}.BaseCumulusCI"))
+            stack.enter_context(patch(f"{PATCH_ROOT}.get_project_config_values"))
             stack.enter_context(patch(f"{PATCH_ROOT}.get_repo_info"))
             get_valid_target_directories = stack.enter_context(
                 patch(f"{PATCH_ROOT}.get_valid_target_directories")
@@ -154,14 +156,74 @@ def test_get_latest_revision_numbers():
         }
         Salesforce.return_value = conn
 
-        scratch_org = MagicMock()
+        scratch_org = MagicMock(max_revision_counter=None)
 
-        get_latest_revision_numbers(
+        result = get_latest_revision_numbers(
             scratch_org=scratch_org,
             originating_user_id=None,
         )
 
-        assert conn.query_all.called
+        assert "IsNameObsolete=false" in conn.query_all.call_args.args[0]
+        assert result == {
+            "some-type-1": {"some-name-1": 3, "some-name-2": 3},
+            "some-type-2": {"some-name-1": 3, "some-name-2": 3},
+        }
+        assert scratch_org.org_revision_numbers == result
+        assert scratch_org.max_revision_counter == 3
+
+
+def test_get_latest_revision_numbers__incremental():
+    with ExitStack() as stack:
+        Salesforce = stack.enter_context(
+            patch(f"{PATCH_ROOT}.simple_salesforce.Salesforce")
+        )
+        stack.enter_context(patch(f"{PATCH_ROOT}.refresh_access_token"))
+
+        conn = MagicMock()
+        conn.query_all.return_value = {
+            "records": [
+                {
+                    "MemberType": "some-type-1",
+                    "MemberName": "some-name-1",
+                    "RevisionCounter": 5,
+                    "IsNameObsolete": False,
+                },
+                {
+                    "MemberType": "some-type-2",
+                    "MemberName": "some-name-1",
+                    "RevisionCounter": 6,
+                    "IsNameObsolete": True,
+                },
+                {
+                    "MemberType": "some-type-3",
+                    "MemberName": "some-name-1",
+                    "RevisionCounter": 4,
+                    "IsNameObsolete": False,
+                },
+            ]
+        }
+        Salesforce.return_value = conn
+
+        scratch_org = MagicMock(
+            max_revision_counter=3,
+            org_revision_numbers={
+                "some-type-1": {"some-name-1": 3, "some-name-2": 2},
+                "some-type-2": {"some-name-1": 1},
+            },
+        )
+
+        result = get_latest_revision_numbers(
+            scratch_org=scratch_org,
+            originating_user_id=None,
+        )
+
+        assert "RevisionCounter > 3" in conn.query_all.call_args.args[0]
+        assert result == {
+            "some-type-1": {"some-name-1": 5, "some-name-2": 2},
+            "some-type-3": {"some-name-1": 4},
+        }
+        assert scratch_org.org_revision_numbers == result
+        assert scratch_org.max_revision_counter == 6
 
 
 def test_compare_revisions__true():
@@ -238,3 +300,44 @@ class TestGetValidTargetDirectories:
             actual, _ = get_valid_target_directories(user, scratch_org, repo_root)
 
             assert actual == {"source": ["src"], "pre": [], "post": [], "config": []}
+
+
+@pytest.mark.django_db
+class TestGetCachedValidTargetDirectories:
+    def test_cached(self, mocker, user_factory, scratch_org_factory, task_factory):
+        task = task_factory(commits=[{"id": str(uuid4())}])
+        scratch_org = scratch_org_factory(task=task)
+        mocker.patch(f"{PATCH_ROOT}.local_github_checkout")
+        get_valid_target_directories = mocker.patch(
+            f"{PATCH_ROOT}.get_valid_target_directories",
+            return_value=({"source": ["src"]}, False),
+        )
+        user = user_factory()
+
+        assert get_cached_valid_target_directories(user, scratch_org) == (
+            {"source": ["src"]},
+            False,
+        )
+        assert get_cached_valid_target_directories(user, scratch_org) == (
+            {"source": ["src"]},
+            False,
+        )
+        assert get_valid_target_directories.call_count == 1
+
+        # A push to the branch gives it a new head:
+        task.append_commits([{"id": str(uuid4())}])
+        get_cached_valid_target_directories(user, scratch_org)
+        assert get_valid_target_directories.call_count == 2
+
+    def test_no_head(self, mocker, user_factory, scratch_org_factory, task_factory):
+        scratch_org = scratch_org_factory(task=task_factory(origin_sha=""))
+        mocker.patch(f"{PATCH_ROOT}.local_github_checkout")
+        get_valid_target_directories = mocker.patch(
+            f"{PATCH_ROOT}.get_valid_target_directories",
+            return_value=({"source": ["src"]}, False),
+        )
+        user = user_factory()
+
+        get_cached_valid_target_directories(user, scratch_org)
+        get_cached_valid_target_directories(user, scratch_org)
+        assert get_valid_target_directories.call_count == 2
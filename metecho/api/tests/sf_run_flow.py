@@ -4,11 +4,16 @@ to change substantially, and as it stands, it's full of implicit
 external calls, so this would be mock-heavy anyway.
 """
 
+import json
+from collections import OrderedDict
 from contextlib import ExitStack
 from unittest.mock import MagicMock, patch
 
 import pytest
+from cumulusci.core.config import OrgConfig as RealOrgConfig
+from django.core.cache import cache
 from requests.exceptions import HTTPError
+from sfdo_template_helpers.crypto import fernet_decrypt, fernet_encrypt
 
 from ..sf_run_flow import (
     ScratchOrgError,
@@ -18,8 +23,10 @@ from ..sf_run_flow import (
     deploy_org_settings,
     get_access_token,
     get_devhub_api,
+    get_devhub_session,
     get_org_details,
     get_org_result,
+    invalidate_org_token_on_401,
     is_org_good,
     mutate_scratch_org,
     refresh_access_token,
@@ -46,7 +53,7 @@ class TestRefreshAccessToken:
             OrgConfig = stack.enter_context(patch(f"{PATCH_ROOT}.OrgConfig"))
 
             refresh_access_token(
-                config=MagicMock(),
+                config={},
                 org_name=MagicMock(),
                 scratch_org=MagicMock(),
                 originating_user_id=None,
@@ -54,6 +61,146 @@ class TestRefreshAccessToken:
 
             assert OrgConfig.called
 
+    def test_cached(self):
+        cache.delete("org_token_00D000000000001")
+
+        def org_config_factory(config, org_name, keychain=None):
+            org_config = MagicMock(config=config)
+            org_config.refresh_oauth_token.side_effect = lambda keychain: config.update(
+                {
+                    "access_token": "token",
+                    "instance_url": "https://example.com",
+                    "userinfo": {"preferred_username": "test@example.com"},
+                }
+            )
+            return org_config
+
+        with ExitStack() as stack:
+            OrgConfig = stack.enter_context(patch(f"{PATCH_ROOT}.OrgConfig"))
+            OrgConfig.side_effect = org_config_factory
+
+            first = refresh_access_token(
+                config={"org_id": "00D000000000001", "access_token": "old"},
+                org_name="dev",
+                scratch_org=MagicMock(),
+            )
+            second = refresh_access_token(
+                config={"org_id": "00D000000000001", "access_token": "old"},
+                org_name="dev",
+                scratch_org=MagicMock(),
+            )
+
+            assert first.refresh_oauth_token.called
+            assert not second.refresh_oauth_token.called
+            assert second.load_userinfo.called
+            assert second._load_orginfo.called
+            assert second.config == {
+                "org_id": "00D000000000001",
+                "access_token": "token",
+                "instance_url": "https://example.com",
+            }
+
+        cache.delete("org_token_00D000000000001")
+
+    def test_cached__401(self):
+        cache.set(
+            "org_token_00D000000000001",
+            fernet_encrypt(
+                json.dumps(
+                    {"access_token": "expired", "instance_url": "https://example.com"}
+                )
+            ),
+        )
+
+        with ExitStack() as stack:
+            OrgConfig = stack.enter_context(patch(f"{PATCH_ROOT}.OrgConfig"))
+            org_config = OrgConfig.return_value
+            org_config.config = {}
+            org_config.load_userinfo.side_effect = HTTPError(
+                "Unauthorized", response=MagicMock(status_code=401)
+            )
+            org_config.refresh_oauth_token.side_effect = (
+                lambda keychain: org_config.config.update({"access_token": "new"})
+            )
+
+            refresh_access_token(
+                config={"org_id": "00D000000000001"},
+                org_name="dev",
+                scratch_org=MagicMock(),
+            )
+
+            assert org_config.refresh_oauth_token.called
+            cached = json.loads(fernet_decrypt(cache.get("org_token_00D000000000001")))
+            assert cached["access_token"] == "new"
+
+        cache.delete("org_token_00D000000000001")
+
+    @pytest.mark.django_db
+    def test_cached__run_flow(self, user_factory):
+        cache.set(
+            "org_token_00D000000000001",
+            fernet_encrypt(
+                json.dumps(
+                    {"access_token": "token", "instance_url": "https://example.com"}
+                )
+            ),
+        )
+        config = {
+            "org_id": "00D000000000001",
+            "id": "https://test.salesforce.com/id/00D000000000001/005000000000001",
+        }
+
+        with ExitStack() as stack:
+            load_userinfo = stack.enter_context(
+                patch.object(RealOrgConfig, "load_userinfo")
+            )
+            load_orginfo = stack.enter_context(
+                patch.object(RealOrgConfig, "_load_orginfo")
+            )
+            refresh_oauth_token = stack.enter_context(
+                patch.object(RealOrgConfig, "refresh_oauth_token")
+            )
+            stack.enter_context(patch(f"{PATCH_ROOT}.shutil"))
+            subprocess = stack.enter_context(patch(f"{PATCH_ROOT}.subprocess"))
+            subprocess.Popen.return_value.communicate.return_value = (b"", b"")
+            subprocess.Popen.return_value.returncode = 1
+            subprocess.run.return_value.stdout = b"INVALID_SESSION_ID"
+
+            org_config = refresh_access_token(
+                config=config, org_name="dev", scratch_org=MagicMock()
+            )
+            assert load_userinfo.called
+            assert load_orginfo.called
+            assert not refresh_oauth_token.called
+
+            with pytest.raises(Exception, match="INVALID_SESSION_ID"):
+                run_flow(
+                    cci=MagicMock(),
+                    org_config=org_config,
+                    flow_name="dev_org",
+                    project_path="/tmp",
+                    user=user_factory(),
+                )
+
+            env = subprocess.Popen.call_args[1]["env"]
+            assert json.loads(env["CUMULUSCI_ORG_dev"]) == {
+                "org_id": "00D000000000001",
+                "id": "https://test.salesforce.com/id/00D000000000001/005000000000001",
+                "instance_url": "https://example.com",
+                "access_token": "token",
+                "scratch": True,
+            }
+            assert cache.get("org_token_00D000000000001") is None
+
+    def test_no_org_id(self):
+        with ExitStack() as stack:
+            OrgConfig = stack.enter_context(patch(f"{PATCH_ROOT}.OrgConfig"))
+
+            refresh_access_token(config={}, org_name="dev", scratch_org=MagicMock())
+            refresh_access_token(config={}, org_name="dev", scratch_org=MagicMock())
+
+            assert OrgConfig.return_value.refresh_oauth_token.call_count == 2
+
     def test_bad(self):
         with ExitStack() as stack:
             get_current_job = stack.enter_context(
@@ -96,16 +243,98 @@ class TestRefreshAccessToken:
 
 
 class TestGetDevhubApi:
+    @pytest.fixture(autouse=True)
+    def clear_token_cache(self):
+        cache.delete("devhub_token_devhub_username")
+        yield
+        cache.delete("devhub_token_devhub_username")
+
     def test_good(self):
         with ExitStack() as stack:
-            stack.enter_context(patch(f"{PATCH_ROOT}.jwt_session"))
+            jwt_session = stack.enter_context(patch(f"{PATCH_ROOT}.jwt_session"))
+            jwt_session.return_value = {
+                "instance_url": "https://example.com",
+                "access_token": "token",
+            }
             SimpleSalesforce = stack.enter_context(
                 patch(f"{PATCH_ROOT}.SimpleSalesforce")
             )
 
             get_devhub_api(devhub_username="devhub_username")
 
-            assert SimpleSalesforce.called
+            SimpleSalesforce.assert_called_once_with(
+                instance_url="https://example.com",
+                session_id="token",
+                client_id="Metecho",
+                version="49.0",
+                session=get_devhub_session("devhub_username"),
+            )
+
+    def test_cached(self):
+        with ExitStack() as stack:
+            jwt_session = stack.enter_context(patch(f"{PATCH_ROOT}.jwt_session"))
+            jwt_session.return_value = {
+                "instance_url": "https://example.com",
+                "access_token": "token",
+            }
+            SimpleSalesforce = stack.enter_context(
+                patch(f"{PATCH_ROOT}.SimpleSalesforce")
+            )
+
+            get_devhub_api(devhub_username="devhub_username")
+            get_devhub_api(devhub_username="devhub_username")
+
+            assert jwt_session.call_count == 1
+            assert SimpleSalesforce.call_count == 2
+            assert SimpleSalesforce.call_args.kwargs["session_id"] == "token"
+
+    def test_cache_disabled(self):
+        with ExitStack() as stack:
+            stack.enter_context(patch(f"{PATCH_ROOT}.DEVHUB_TOKEN_CACHE_TTL", 0))
+            jwt_session = stack.enter_context(patch(f"{PATCH_ROOT}.jwt_session"))
+            jwt_session.return_value = {
+                "instance_url": "https://example.com",
+                "access_token": "token",
+            }
+            stack.enter_context(patch(f"{PATCH_ROOT}.SimpleSalesforce"))
+
+            get_devhub_api(devhub_username="devhub_username")
+            get_devhub_api(devhub_username="devhub_username")
+
+            assert jwt_session.call_count == 2
+
+    def test_invalidated_on_401(self):
+        with ExitStack() as stack:
+            jwt_session = stack.enter_context(patch(f"{PATCH_ROOT}.jwt_session"))
+            jwt_session.return_value = {
+                "instance_url": "https://example.com",
+                "access_token": "token",
+            }
+            stack.enter_context(patch(f"{PATCH_ROOT}.SimpleSalesforce"))
+            get_devhub_api(devhub_username="devhub_username")
+            session = get_devhub_session("devhub_username")
+
+            for hook in session.hooks["response"]:
+                hook(MagicMock(status_code=200))
+            get_devhub_api(devhub_username="devhub_username")
+            assert jwt_session.call_count == 1
+
+            for hook in session.hooks["response"]:
+                hook(MagicMock(status_code=401))
+            get_devhub_api(devhub_username="devhub_username")
+            assert jwt_session.call_count == 2
+
+    def test_session_pool_is_bounded(self, mocker):
+        mocker.patch(f"{PATCH_ROOT}.DEVHUB_SESSION_POOL_SIZE", 2)
+        mocker.patch(f"{PATCH_ROOT}._devhub_sessions", OrderedDict())
+        first = get_devhub_session("first")
+        second = get_devhub_session("second")
+        assert get_devhub_session("first") is first
+
+        # "second" is now the least recently used:
+        get_devhub_session("third")
+        assert get_devhub_session("first") is first
+        assert get_devhub_session("second") is not second
 
     def test_bad(self):
         with ExitStack() as stack:
@@ -260,6 +489,25 @@ class TestRunFlow:
                 )
 
 
+class TestInvalidateOrgTokenOn401:
+    def test_401(self):
+        cache.set("org_token_00D000000000001", "token")
+        with pytest.raises(HTTPError):
+            with invalidate_org_token_on_401("00D000000000001"):
+                raise HTTPError("Unauthorized", response=MagicMock(status_code=401))
+
+        assert cache.get("org_token_00D000000000001") is None
+
+    def test_other_error(self):
+        cache.set("org_token_00D000000000001", "token")
+        with pytest.raises(HTTPError):
+            with invalidate_org_token_on_401("00D000000000001"):
+                raise HTTPError("Server Error", response=MagicMock(status_code=500))
+
+        assert cache.get("org_token_00D000000000001") == "token"
+        cache.delete("org_token_00D000000000001")
+
+
 @pytest.mark.django_db
 def test_delete_org(scratch_org_factory):
     scratch_org = scratch_org_factory(
@@ -273,6 +521,9 @@ def test_delete_org(scratch_org_factory):
         get_devhub_api.return_value = devhub_api
         devhub_api.query.return_value = {"records": [{"Id": "some-id"}]}
 
+        cache.set("org_token_some-id", "token")
+
         delete_org(scratch_org)
 
         assert devhub_api.ActiveScratchOrg.delete.called
+        assert cache.get("org_token_some-id") is None
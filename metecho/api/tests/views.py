@@ -1,18 +1,22 @@
+import hmac
 import json
 from collections import namedtuple
 from contextlib import ExitStack
 from pathlib import Path
 from unittest.mock import MagicMock, patch
+from uuid import uuid4
 
 import pytest
 from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from github3.exceptions import ResponseError
+from django.utils import timezone
 from rest_framework import status
 
 from metecho.api.serializers import EpicSerializer, TaskSerializer
 
-from ..models import ScratchOrgType
+from ..models import Epic, GitHubWebhook, GitHubWebhookStatus, ScratchOrgType
 
 Branch = namedtuple("Branch", ["name"])
 
@@ -161,6 +165,17 @@ class TestGitHubIssueViewset:
         assert len(results) == 1
         assert results[0]["id"] == js, results
 
+    def test_filters__search__ranking(self, client, git_hub_issue_factory):
+        prefix = str(git_hub_issue_factory(title="Unrelated", number=420).id)
+        exact = str(git_hub_issue_factory(title="Unrelated", number=42).id)
+        in_title = str(git_hub_issue_factory(title="Answer is 42", number=1).id)
+        git_hub_issue_factory(title="Unrelated", number=142)
+
+        response = client.get(reverse("issue-list"), data={"search": "42"})
+        results = [issue["id"] for issue in response.json()["results"]]
+        assert results[0] == exact, results
+        assert set(results) == {exact, prefix, in_title}, results
+
     def test_filters__is_attached(
         self, client, git_hub_issue_factory, task_factory, epic_factory
     ):
@@ -237,25 +252,41 @@ class TestProjectViewset:
         assert project.currently_fetching_issues
 
     def test_feature_branches(
-        self, client, project_factory, git_hub_repository_factory
+        self, client, project_factory, epic_factory, git_hub_repository_factory
     ):
         git_hub_repository_factory(user=client.user, repo_id=123)
-        project = project_factory(repo_id=123)
-        with patch("metecho.api.views.gh.get_repo_info") as get_repo_info:
+        project = project_factory(repo_id=123, branch_name="main")
+        epic_factory(project=project, branch_name="epic")
+        # Epics of other Projects don't hide branches:
+        epic_factory(branch_name="other-epic")
+        url = reverse("project-feature-branches", kwargs={"pk": str(project.id)})
+        with patch("metecho.api.jobs.get_repo_info") as get_repo_info:
             repo = MagicMock(
+                default_branch="main",
                 **{
                     "branches.return_value": [
+                        Branch(name="main"),
                         Branch(name="include_me"),
                         Branch(name="omit__me"),
+                        Branch(name="epic"),
+                        Branch(name="other-epic"),
                     ]
-                }
+                },
             )
             get_repo_info.return_value = repo
 
-            response = client.get(
-                reverse("project-feature-branches", kwargs={"pk": str(project.id)})
-            )
-            assert response.json() == ["include_me"], response.json()
+            response = client.get(url)
+            assert response.json() == ["include_me", "other-epic"], response.json()
+
+            # Later requests are answered from the branch index
+            project.add_branch("added-by-hook")
+            response = client.get(url)
+            assert response.json() == [
+                "added-by-hook",
+                "include_me",
+                "other-epic",
+            ], response.json()
+            assert repo.branches.call_count == 1
 
     def test_get_queryset(self, client, project_factory, git_hub_repository_factory):
         git_hub_repository_factory(
@@ -265,9 +296,10 @@ class TestProjectViewset:
         project_factory(repo_name="repo2", repo_id=456)
         project_factory(repo_name="repo3", repo_id=None)
         with patch("metecho.api.model_mixins.get_repo_info") as get_repo_info:
-            get_repo_info.return_value = MagicMock(id=789)
             response = client.get(reverse("project-list"))
 
+        # Missing repo IDs are filled in by populate_project_repo_ids instead
+        assert not get_repo_info.called
         assert response.status_code == 200
         assert response.json() == {
             "count": 1,
@@ -301,52 +333,6 @@ class TestProjectViewset:
             ],
         }, response.json()
 
-    def test_get_queryset__bad(
-        self, client, project_factory, git_hub_repository_factory
-    ):
-        git_hub_repository_factory(
-            user=client.user, repo_id=123, repo_url="https://example.com/test-repo.git"
-        )
-        project = project_factory(repo_name="repo", repo_id=123)
-        project_factory(repo_name="repo2", repo_id=456)
-        project_factory(repo_name="repo3", repo_id=None)
-        with patch("metecho.api.model_mixins.get_repo_info") as get_repo_info:
-            get_repo_info.side_effect = ResponseError(MagicMock())
-            response = client.get(reverse("project-list"))
-
-        assert response.status_code == 200
-        assert response.json() == {
-            "count": 1,
-            "previous": None,
-            "next": None,
-            "results": [
-                {
-                    "id": str(project.id),
-                    "name": str(project.name),
-                    "description": "",
-                    "description_rendered": "",
-                    "has_truncated_issues": False,
-                    "is_managed": False,
-                    "slug": str(project.slug),
-                    "old_slugs": [],
-                    "repo_url": (
-                        f"https://github.com/{project.repo_owner}/{project.repo_name}"
-                    ),
-                    "repo_owner": str(project.repo_owner),
-                    "repo_name": str(project.repo_name),
-                    "has_push_permission": False,
-                    "branch_prefix": "",
-                    "github_users": [],
-                    "repo_image_url": "",
-                    "org_config_names": [],
-                    "currently_fetching_org_config_names": False,
-                    "currently_fetching_github_users": False,
-                    "latest_sha": "abcd1234",
-                    "currently_fetching_issues": False,
-                }
-            ],
-        }, response.json()
-
     def test_get_queryset__superuser(self, admin_client, project_factory):
         """
         Superuser should be able to access all projects even if they don't have a
@@ -360,6 +346,30 @@ class TestProjectViewset:
         data = response.json()
         assert data["count"] == 3, data
 
+    def test_get_queryset__push_permission(
+        self, mocker, client, project_factory, git_hub_repository_factory
+    ):
+        has_push_permission = mocker.patch(
+            "metecho.api.models.Project.has_push_permission"
+        )
+        git_hub_repository_factory(
+            user=client.user, repo_id=123, permissions={"push": True}
+        )
+        git_hub_repository_factory(
+            user=client.user, repo_id=456, permissions={"push": False}
+        )
+        project_factory(repo_name="repo", repo_id=123)
+        project_factory(repo_name="repo2", repo_id=456)
+
+        response = client.get(reverse("project-list"))
+
+        results = {
+            project["repo_name"]: project["has_push_permission"]
+            for project in response.json()["results"]
+        }
+        assert results == {"repo": True, "repo2": False}, results
+        assert not has_push_permission.called
+
 
 @pytest.mark.django_db
 class TestHookView:
@@ -402,10 +412,15 @@ class TestHookView:
                     "compare_commits.return_value": MagicMock(ahead_by=0),
                 }
             )
-            gh.normalize_commit.return_value = "1234abcd"
+            gh.normalize_commit.side_effect = lambda commit, sender: {
+                **commit,
+                "author": {**commit["author"], "avatar_url": sender["avatar_url"]},
+            }
 
             git_hub_repository_factory(repo_id=123)
-            task = _task_factory(**task_data, branch_name="test-task")
+            task = _task_factory(
+                **task_data, branch_name="test-task", commits=[{"id": "012"}]
+            )
 
             refresh_commits_job = stack.enter_context(
                 patch("metecho.api.jobs.refresh_commits_job")
@@ -445,7 +460,16 @@ class TestHookView:
             assert response.status_code == 202, response.content
             assert not refresh_commits_job.delay.called
             task.refresh_from_db()
-            assert len(task.commits) == 1
+            assert task.commit_count == 2
+            assert task.latest_sha == "123"
+            assert task.get_all_users_in_commits == [
+                {
+                    "name": "Test",
+                    "email": "test@example.com",
+                    "username": "test123",
+                    "avatar_url": "https://avatar_url/",
+                }
+            ]
 
     def test_202__push_epic_commits(
         self,
@@ -553,6 +577,76 @@ class TestHookView:
             project.refresh_from_db()
             assert project.latest_sha == "123"
 
+    def test_202__queued(self, settings, client, mocker):
+        settings.GITHUB_HOOK_SECRET = b""
+        settings.GITHUB_HOOK_QUEUE = True
+        process_github_webhooks_job = mocker.patch(
+            "metecho.api.jobs.process_github_webhooks_job"
+        )
+        body = json.dumps({"ref": "refs/heads/test", "repository": {"id": 123}})
+
+        response = client.post(
+            reverse("hook"),
+            body,
+            content_type="application/json",
+            HTTP_X_HUB_SIGNATURE="sha1="
+            + hmac.new(b"", body.encode(), digestmod="sha1").hexdigest(),
+            HTTP_X_GITHUB_EVENT="push",
+            HTTP_X_GITHUB_DELIVERY=str(uuid4()),
+        )
+
+        assert response.status_code == 202, response.content
+        webhook = GitHubWebhook.objects.get()
+        assert webhook.event == "push"
+        assert webhook.delivery_id
+        assert webhook.repo_id == 123
+        assert webhook.status == GitHubWebhookStatus.PENDING
+        process_github_webhooks_job.delay.assert_called_once_with(repo_id=123)
+
+    def test_202__duplicate_delivery(self, settings, client, mocker):
+        settings.GITHUB_HOOK_SECRET = b""
+        process_hook = mocker.patch(
+            "metecho.api.hook_serializers.PushHookSerializer.process_hook"
+        )
+        mocker.patch(
+            "metecho.api.hook_serializers.PushHookSerializer.is_valid",
+            return_value=True,
+        )
+        body = json.dumps({"ref": "refs/heads/test", "repository": {"id": 123}})
+        signature = "sha1=" + hmac.new(b"", body.encode(), digestmod="sha1").hexdigest()
+        delivery_id = str(uuid4())
+
+        for _ in range(2):
+            response = client.post(
+                reverse("hook"),
+                body,
+                content_type="application/json",
+                HTTP_X_HUB_SIGNATURE=signature,
+                HTTP_X_GITHUB_EVENT="push",
+                HTTP_X_GITHUB_DELIVERY=delivery_id,
+            )
+            assert response.status_code == 202, response.content
+
+        assert process_hook.call_count == 1
+
+    def test_redelivery_after_error(self, settings, client):
+        settings.GITHUB_HOOK_SECRET = b""
+        # The payload is incomplete, so the hook fails validation:
+        body = json.dumps({"ref": "refs/heads/test", "repository": {"id": 123}})
+        signature = "sha1=" + hmac.new(b"", body.encode(), digestmod="sha1").hexdigest()
+        delivery_id = str(uuid4())
+
+        for _ in range(2):
+            response = client.post(
+                reverse("hook"),
+                body,
+                content_type="application/json",
+                HTTP_X_HUB_SIGNATURE=signature,
+                HTTP_X_GITHUB_EVENT="push",
+                HTTP_X_GITHUB_DELIVERY=delivery_id,
+            )
+            assert response.status_code == 400, response.content
+
     def test_400__no_handler(
         self,
         settings,
@@ -762,6 +856,22 @@ class TestScratchOrgViewSet:
         assert response.status_code == 200
         assert not response.json(), response.json()
 
+    def test_list__pooled(self, client, scratch_org_factory, scratch_org_pool_factory):
+        pool = scratch_org_pool_factory(owner=client.user)
+        scratch_org_factory(
+            pool=pool,
+            task=None,
+            project=pool.project,
+            org_type=ScratchOrgType.PLAYGROUND,
+            owner=client.user,
+        )
+
+        url = reverse("scratch-org-list")
+        response = client.get(url)
+
+        assert response.status_code == 200
+        assert not response.json(), response.json()
+
     def test_retrieve__not_playground_owner(
         self, client, user_factory, scratch_org_factory
     ):
@@ -988,6 +1098,42 @@ class TestTaskViewSet:
         response = client.get(url, data={"project": str(project.pk)})
         assert len(response.json()) == 2
 
+    def test_get__commits_query_count(self, client, project_factory, task_factory):
+        project = project_factory()
+        url = reverse("task-list")
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url, data={"project": str(project.pk)})
+            assert response.status_code == 200, response.content
+            return len(context.captured_queries)
+
+        task_factory(epic=None, project=project, commits=[{"id": "123"}])
+        queries = count_queries()
+        for sha in ("456", "789"):
+            task_factory(epic=None, project=project, commits=[{"id": sha}])
+
+        assert count_queries() == queries
+
+    def test_commits(self, client, mocker, task_factory):
+        mocker.patch("metecho.api.paginators.CustomPaginator.page_size", 2)
+        task = task_factory(commits=[{"id": sha} for sha in ("789", "456", "123")])
+
+        response = client.get(reverse("task-detail", args=[task.id]))
+        data = response.json()
+        assert data["commit_count"] == 3
+        assert [commit["id"] for commit in data["commits"]] == ["789", "456"]
+
+        response = client.get(reverse("task-list"))
+        (data,) = response.json()
+        assert [commit["id"] for commit in data["commits"]] == ["789", "456"]
+
+        response = client.get(reverse("task-commits", args=[task.id]), data={"page": 2})
+        data = response.json()
+        assert response.status_code == 200, data
+        assert data["count"] == 3
+        assert [commit["id"] for commit in data["results"]] == ["123"]
+
     def test_create__dev_org(
         self, client, git_hub_repository_factory, scratch_org_factory, epic_factory
     ):
@@ -1216,6 +1362,42 @@ class TestEpicViewSet:
         assert response.status_code == 200, response.content
         assert len(response.json()["results"]) == 1, response.json()
 
+    def test_get__query_count(
+        self, client, project_factory, epic_factory, task_factory
+    ):
+        project = project_factory()
+        url = reverse("epic-list")
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url, data={"project": str(project.pk)})
+            assert response.status_code == 200, response.content
+            return len(context.captured_queries)
+
+        task_factory(epic=epic_factory(project=project))
+        queries = count_queries()
+        for _ in range(4):
+            epic = epic_factory(project=project)
+            task_factory(epic=epic)
+            task_factory(epic=epic, deleted_at=timezone.now())
+
+        assert count_queries() == queries
+
+    def test_get__annotations(self, client, epic_factory, task_factory):
+        epic = epic_factory(name="Old name")
+        epic.name = "New name"
+        epic.save()
+        task_factory(epic=epic)
+        task_factory(epic=epic, deleted_at=timezone.now())
+
+        response = client.get(reverse("epic-list"))
+
+        result = response.json()["results"][0]
+        epic = Epic.objects.get(pk=epic.pk)
+        assert result["task_count"] == 1
+        assert result["slug"] == epic.slug == "new-name"
+        assert result["old_slugs"] == epic.old_slugs
+
     @pytest.mark.parametrize(
         "repo_perms, check",
         (
@@ -1,12 +1,16 @@
+import logging
+import time
+
 from allauth.socialaccount.models import SocialAccount
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Case, IntegerField, Q, When
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Q, When
 from django.http import HttpResponseRedirect
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import OpenApiResponse, extend_schema
-from github3.exceptions import ConnectionError, ResponseError
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied, ValidationError
@@ -15,7 +19,6 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
-from . import gh
 from .authentication import GitHubHookAuthentication
 from .filters import (
     EpicFilter,
@@ -24,19 +27,22 @@ from .filters import (
     ScratchOrgFilter,
     TaskFilter,
 )
-from .hook_serializers import (
-    PrHookSerializer,
-    PrReviewHookSerializer,
-    PushHookSerializer,
-)
+from .hook_serializers import HOOK_SERIALIZERS, log_hook_latency
+from .jobs import refresh_github_branches
+from .model_mixins import prefetch_active_slugs
 from .models import (
     Epic,
+    EpicSlug,
     EpicStatus,
     GitHubIssue,
+    GitHubWebhook,
     Project,
+    ProjectSlug,
     ScratchOrg,
     ScratchOrgType,
     Task,
+    TaskCommit,
+    TaskSlug,
 )
 from .paginators import CustomPaginator
 from .serializers import (
@@ -53,10 +59,12 @@ from .serializers import (
     ReviewSerializer,
     ScratchOrgSerializer,
     TaskAssigneeSerializer,
+    TaskCommitSerializer,
     TaskSerializer,
 )
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 class RepoPushPermissionMixin:
@@ -120,18 +128,46 @@ class HookView(APIView):
     @extend_schema(exclude=True)
     def post(self, request):
         """Intendend to respond to several GitHubs webhooks. Not consumed by the frontend."""
-        serializers = {
-            "push": PushHookSerializer,
-            "pull_request": PrHookSerializer,
-            "pull_request_review": PrReviewHookSerializer,
-        }
-        serializer_class = serializers.get(request.META.get("HTTP_X_GITHUB_EVENT"))
+        event = request.META.get("HTTP_X_GITHUB_EVENT")
+        serializer_class = HOOK_SERIALIZERS.get(event)
         if serializer_class is None:
             return Response(status=status.HTTP_400_BAD_REQUEST)
-        serializer = serializer_class(data=request.data)
-        serializer.is_valid(raise_exception=True)
 
-        serializer.process_hook()
+        # GitHub redelivers hooks it thinks timed out; only handle each once:
+        delivery_id = request.META.get("HTTP_X_GITHUB_DELIVERY", "")
+        delivery_key = f"gh_hook_delivery_{delivery_id}"
+        if delivery_id and not cache.add(
+            delivery_key, True, timeout=settings.GITHUB_HOOK_DELIVERY_TTL
+        ):
+            logger.info(f"Ignoring duplicate GitHub webhook delivery {delivery_id}")
+            return Response(status=status.HTTP_202_ACCEPTED)
+
+        if settings.GITHUB_HOOK_QUEUE:
+            webhook = GitHubWebhook.objects.create(
+                event=event,
+                delivery_id=delivery_id,
+                repo_id=(request.data.get("repository") or {}).get("id"),
+                payload=request.data,
+            )
+            webhook.queue_process()
+            return Response(status=status.HTTP_202_ACCEPTED)
+
+        start = time.monotonic()
+        try:
+            serializer = serializer_class(data=request.data)
+            serializer.is_valid(raise_exception=True)
+
+            serializer.process_hook()
+        except Exception:
+            # Let GitHub's redelivery try again
+            cache.delete(delivery_key)
+            raise
+        finally:
+            log_hook_latency(
+                event=event,
+                delivery_id=delivery_id,
+                processing_time=time.monotonic() - start,
+            )
         return Response(status=status.HTTP_202_ACCEPTED)
 
 
@@ -220,17 +256,14 @@ class ProjectViewSet(mixins.RetrieveModelMixin, mixins.ListModelMixin, GenericVi
     queryset = Project.objects.filter(repo_id__isnull=False)
 
     def get_queryset(self):
-        for project in Project.objects.filter(repo_id__isnull=True):
-            try:
-                project.get_repo_id()
-            except (ResponseError, ConnectionError):
-                pass
-
+        queryset = self.queryset.prefetch_related(
+            prefetch_active_slugs(ProjectSlug)
+        ).with_push_permission(self.request.user)
         if self.request.user.is_superuser:
-            return self.queryset
+            return queryset
 
         repo_ids = self.request.user.repositories.values_list("repo_id", flat=True)
-        return self.queryset.filter(repo_id__in=repo_ids)
+        return queryset.filter(repo_id__in=repo_ids)
 
     @extend_schema(request=None, responses={202: None})
     @action(detail=True, methods=["POST"])
@@ -268,23 +301,23 @@ class ProjectViewSet(mixins.RetrieveModelMixin, mixins.ListModelMixin, GenericVi
     def feature_branches(self, request, pk=None):
         """Get a list of feature branch names for a Project."""
         instance = self.get_object()
-        repo = gh.get_repo_info(
-            None, repo_owner=instance.repo_owner, repo_name=instance.repo_name
-        )
-        existing_branches = set(
+        if instance.branches_updated_at is None:
+            # Build the branch index if the refresh queued when the Project was
+            # created hasn't run yet; webhooks and the scheduled
+            # refresh_github_branches command keep it current after that
+            refresh_github_branches(instance)
+        existing_branches = (
             Epic.objects.active()
+            .filter(project=instance)
             .exclude(branch_name="")
-            .values_list("branch_name", flat=True)
+            .values("branch_name")
+        )
+        data = list(
+            instance.branches.exclude(name__contains="__")
+            .exclude(name=instance.branch_name)
+            .exclude(name__in=existing_branches)
+            .values_list("name", flat=True)
         )
-        data = [
-            branch.name
-            for branch in repo.branches()
-            if (
-                "__" not in branch.name
-                and branch.name != repo.default_branch
-                and branch.name not in existing_branches
-            )
-        ]
         return Response(data)
 
 
@@ -307,8 +340,14 @@ class EpicViewSet(RepoPushPermissionMixin, CreatePrMixin, ModelViewSet):
             When(status=EpicStatus.PLANNED, then=2),
             When(status=EpicStatus.MERGED, then=3),
         ]
-        return qs.annotate(ordering=Case(*whens, output_field=IntegerField())).order_by(
-            "ordering", "-created_at", "name"
+        return (
+            qs.select_related("project")
+            .prefetch_related(prefetch_active_slugs(EpicSlug))
+            .annotate(
+                ordering=Case(*whens, output_field=IntegerField()),
+                task_count=Count("tasks", filter=Q(tasks__deleted_at__isnull=True)),
+            )
+            .order_by("ordering", "-created_at", "name")
         )
 
     @extend_schema(request=EpicCollaboratorsSerializer)
@@ -332,11 +371,26 @@ class TaskViewSet(RepoPushPermissionMixin, CreatePrMixin, ModelViewSet):
 
     permission_classes = (IsAuthenticated,)
     serializer_class = TaskSerializer
-    queryset = Task.objects.select_related("epic", "epic__project").active()
+    queryset = (
+        Task.objects.select_related("epic", "epic__project", "project")
+        .prefetch_related(
+            prefetch_active_slugs(TaskSlug),
+            prefetch_active_slugs(EpicSlug, "epic__slugs"),
+        )
+        .active()
+    )
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TaskFilter
     error_pr_exists = _("Task has already been submitted for testing.")
 
+    def get_queryset(self):
+        # Only the first page of each Task's commits goes out with the Task:
+        return (
+            super()
+            .get_queryset()
+            .prefetch_related(TaskCommit.prefetch_first_page(CustomPaginator.page_size))
+        )
+
     @extend_schema(request=ReviewSerializer)
     @action(detail=True, methods=["POST"])
     def review(self, request, pk=None):
@@ -382,9 +436,7 @@ class TaskViewSet(RepoPushPermissionMixin, CreatePrMixin, ModelViewSet):
             "user",
             None,
         )
-        valid_commit = org and org.latest_commit == (
-            task.commits[0] if task.commits else task.origin_sha
-        )
+        valid_commit = org and org.latest_commit == task.latest_sha
         return Response(
             {
                 "can_reassign": bool(
@@ -411,6 +463,14 @@ class TaskViewSet(RepoPushPermissionMixin, CreatePrMixin, ModelViewSet):
         serializer.update(task, serializer.validated_data)
         return Response(self.get_serializer(task).data)
 
+    @extend_schema(request=None, responses=TaskCommitSerializer(many=True))
+    @action(detail=True, methods=["GET"], pagination_class=CustomPaginator)
+    def commits(self, request, pk=None):
+        """Get the commits on a Task branch, newest first."""
+        task = self.get_object()
+        page = self.paginate_queryset(task.commits.select_related("author"))
+        return self.get_paginated_response(TaskCommitSerializer(page, many=True).data)
+
 
 class ScratchOrgViewSet(
     mixins.CreateModelMixin,
@@ -424,7 +484,8 @@ class ScratchOrgViewSet(
 
     permission_classes = (IsAuthenticated,)
     serializer_class = ScratchOrgSerializer
-    queryset = ScratchOrg.objects.active()
+    # Pooled orgs belong to no one until they're claimed:
+    queryset = ScratchOrg.objects.active().filter(pool__isnull=True)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = ScratchOrgFilter
 
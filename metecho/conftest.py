@@ -1,3 +1,5 @@
+from datetime import timezone
+
 import factory
 import pytest
 from allauth.socialaccount.models import SocialAccount, SocialApp, SocialToken
@@ -7,7 +9,15 @@ from pytest_factoryboy import register
 from rest_framework.test import APIClient
 from sfdo_template_helpers.crypto import fernet_encrypt
 
-from .api.models import Epic, GitHubIssue, GitHubRepository, Project, ScratchOrg, Task
+from .api.models import (
+    Epic,
+    GitHubIssue,
+    GitHubRepository,
+    Project,
+    ScratchOrg,
+    ScratchOrgPool,
+    Task,
+)
 
 User = get_user_model()
 
@@ -119,6 +129,12 @@ class TaskFactory(factory.django.DjangoModelFactory):
     org_config_name = "dev"
     issue = factory.SubFactory(GitHubIssueFactory)
 
+    @factory.post_generation
+    def commits(obj, create, extracted, **kwargs):
+        if create and extracted:
+            obj.set_commits(extracted)
+            obj.save()
+
 
 @register
 class TaskWithProjectFactory(TaskFactory):
@@ -141,6 +157,17 @@ class ScratchOrgFactory(factory.django.DjangoModelFactory):
     valid_target_directories = {"source": []}
 
 
+@register
+class ScratchOrgPoolFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = ScratchOrgPool
+
+    project = factory.SubFactory(ProjectFactory)
+    owner = factory.SubFactory(UserFactory)
+    org_config_name = "dev"
+    size = 2
+
+
 @register
 class ShortIssueFactory(factory.StubFactory):
     """
@@ -152,8 +179,8 @@ class ShortIssueFactory(factory.StubFactory):
     number = factory.Sequence(lambda n: 100 + n)
     state = "open"
     html_url = factory.Faker("url")
-    created_at = factory.Faker("date_time_this_year")
-    updated_at = factory.Faker("date_time_this_year")
+    created_at = factory.Faker("date_time_this_year", tzinfo=timezone.utc)
+    updated_at = factory.Faker("date_time_this_year", tzinfo=timezone.utc)
     pull_request_urls = ["http://a.com", "http://b.com"]
 
 
@@ -1,16 +1,25 @@
 import Avatar from '@salesforce/design-system-react/components/avatar';
+import Button from '@salesforce/design-system-react/components/button';
 import DataTable from '@salesforce/design-system-react/components/data-table';
 import DataTableCell from '@salesforce/design-system-react/components/data-table/cell';
 import DataTableColumn from '@salesforce/design-system-react/components/data-table/column';
 import classNames from 'classnames';
 import { format, formatDistanceToNow } from 'date-fns';
 import { t } from 'i18next';
-import React, { ReactNode } from 'react';
+import { unionBy } from 'lodash';
+import React, { ReactNode, useCallback, useEffect, useState } from 'react';
 import { Trans } from 'react-i18next';
+import { useDispatch } from 'react-redux';
 
 import TourPopover from '@/js/components/tour/popover';
-import { ExternalLink } from '@/js/components/utils';
+import {
+  ExternalLink,
+  LabelWithSpinner,
+  useIsMounted,
+} from '@/js/components/utils';
+import { ThunkDispatch } from '@/js/store';
 import { Commit } from '@/js/store/tasks/reducer';
+import apiFetch, { addUrlParams } from '@/js/utils/api';
 
 interface TableCellProps {
   [key: string]: any;
@@ -97,8 +106,52 @@ const TimestampTableCell = ({ item, className, ...props }: TableCellProps) => {
 };
 TimestampTableCell.displayName = DataTableCell.displayName;
 
-const CommitList = ({ commits }: { commits: Commit[] }) =>
-  commits.length ? (
+const CommitList = ({
+  taskId,
+  commits: firstPage,
+  commitCount,
+}: {
+  taskId: string;
+  // The first page of commits, as included with the Task
+  commits: Commit[];
+  commitCount: number;
+}) => {
+  const dispatch = useDispatch<ThunkDispatch>();
+  const isMounted = useIsMounted();
+  const [fetched, setFetched] = useState<Commit[]>([]);
+  const [next, setNext] = useState<string | null>(null);
+  const [fetching, setFetching] = useState(false);
+
+  // A push changes the first page (and shifts every later one), so start over:
+  const headSha = firstPage[0]?.id;
+  useEffect(() => {
+    setFetched([]);
+    setNext(null);
+  }, [headSha]);
+
+  const commits = unionBy(firstPage, fetched, 'id');
+  const hasMore = commits.length < commitCount;
+
+  const fetchMore = useCallback(async () => {
+    setFetching(true);
+    const url =
+      next || addUrlParams(window.api_urls.task_commits(taskId), { page: 2 });
+    try {
+      const payload = await apiFetch({ url, dispatch });
+      /* istanbul ignore else */
+      if (isMounted.current) {
+        setFetched((prev) => [...prev, ...(payload?.results || [])]);
+        setNext(payload?.next || null);
+      }
+    } finally {
+      /* istanbul ignore else */
+      if (isMounted.current) {
+        setFetching(false);
+      }
+    }
+  }, [dispatch, isMounted, next, taskId]);
+
+  return commits.length ? (
     <>
       <div className="slds-is-relative heading">
         <TourPopover
@@ -162,7 +215,17 @@ const CommitList = ({ commits }: { commits: Commit[] }) =>
           <TimestampTableCell />
         </DataTableColumn>
       </DataTable>
+      {hasMore ? (
+        <div className="slds-m-top_large">
+          <Button
+            label={fetching ? <LabelWithSpinner /> : t('Load More')}
+            onClick={fetchMore}
+            disabled={fetching}
+          />
+        </div>
+      ) : null}
     </>
   ) : null;
+};
 
 export default CommitList;
@@ -1162,7 +1162,11 @@ const TaskDetail = (
           attachingToTask={task}
           currentlyResyncing={project.currently_fetching_issues}
         />
-        <CommitList commits={task.commits} />
+        <CommitList
+          taskId={task.id}
+          commits={task.commits}
+          commitCount={task.commit_count}
+        />
       </DetailPageLayout>
     </DocumentTitle>
   );
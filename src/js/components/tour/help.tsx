@@ -37,6 +37,7 @@ export const getDemoTask = ({
     root_project: project,
     branch_url: null,
     commits: [],
+    commit_count: 0,
     origin_sha: '',
     branch_diff_url: null,
     pr_url: null,
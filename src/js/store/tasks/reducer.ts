@@ -47,7 +47,9 @@ export interface Task {
   branch_diff_url: string | null;
   pr_url: string | null;
   pr_is_open: boolean;
+  // Only the first page of commits; see `commit_count` for the total
   commits: Commit[];
+  commit_count: number;
   origin_sha: string;
   assigned_dev: string | null;
   assigned_qa: string | null;
@@ -18,9 +18,12 @@ const Template: Story<ComponentProps<typeof CommitListComponent>> = (args) => (
 
 export const CommitList = Template.bind({});
 CommitList.args = {
+  taskId: 'task-id',
   commits: [sampleCommit1, sampleCommit2],
+  commitCount: 2,
 };
 CommitList.argTypes = {
+  taskId: { control: { disable: true } },
   commits: { control: { disable: true } },
 };
 CommitList.storyName = 'Example';
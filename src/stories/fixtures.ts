@@ -33,6 +33,7 @@ export const api_urls = {
   task_review: (id: string) => `/api/tasks/${id}/review/`,
   task_can_reassign: (id: string) => `/api/tasks/${id}/can_reassign/`,
   task_assignees: (id: string) => `/api/tasks/${id}/assignees/`,
+  task_commits: (id: string) => `/api/tasks/${id}/commits/`,
   epic_detail: (id: string) => `/api/epics/${id}/`,
   epic_create_pr: (id: string) => `/api/epics/${id}/create_pr/`,
   epic_collaborators: (id: string) => `/api/epics/${id}/collaborators/`,
@@ -284,6 +285,7 @@ export const sampleTask1 = {
   pr_url: 'https://github.com/test/test-repo/pull/1357',
   pr_is_open: true,
   commits: [sampleCommit1],
+  commit_count: 1,
   origin_sha: '723b342',
   assigned_dev: sampleGitHubUser1.id,
   assigned_qa: null,
@@ -323,6 +325,7 @@ export const sampleTask2 = {
   pr_url: null,
   pr_is_open: false,
   commits: [],
+  commit_count: 0,
   origin_sha: '',
   assigned_dev: null,
   assigned_qa: null,
@@ -363,6 +366,7 @@ export const sampleTask3 = {
   pr_url: 'https://github.com/test/test-repo/pull/1357',
   pr_is_open: false,
   commits: [sampleCommit1],
+  commit_count: 1,
   origin_sha: '723b342',
   assigned_dev: sampleGitHubUser3.id,
   assigned_qa: sampleGitHubUser1.id,
@@ -403,6 +407,7 @@ export const sampleTask4 = {
   pr_url: 'https://github.com/test/test-repo/pull/9999',
   pr_is_open: true,
   commits: [sampleCommit1],
+  commit_count: 1,
   origin_sha: '723b342',
   assigned_dev: sampleGitHubUser2.id,
   assigned_qa: sampleGitHubUser3.id,
@@ -442,6 +447,7 @@ export const sampleTask5 = {
   pr_url: '',
   pr_is_open: false,
   commits: [sampleCommit2],
+  commit_count: 1,
   origin_sha: '723b342',
   assigned_dev: sampleGitHubUser1.id,
   assigned_qa: null,
@@ -481,6 +487,7 @@ export const sampleTask6 = {
   pr_url: 'https://github.com/test/test-repo/pull/8888',
   pr_is_open: true,
   commits: [sampleCommit2],
+  commit_count: 1,
   origin_sha: '723b342',
   assigned_dev: sampleGitHubUser2.id,
   assigned_qa: sampleGitHubUser3.id,
@@ -1,3 +1,5 @@
+import { fireEvent, waitFor } from '@testing-library/react';
+import fetchMock from 'fetch-mock';
 import React from 'react';
 
 import CommitList from '@/js/components/commits/list';
@@ -21,7 +23,7 @@ describe('<CommitList/>', () => {
       },
     ];
     const { getByText, getAllByTitle } = renderWithRedux(
-      <CommitList commits={commits} />,
+      <CommitList taskId="task-id" commits={commits} commitCount={1} />,
     );
 
     expect(getByText('abc123d')).toBeVisible();
@@ -43,14 +45,55 @@ describe('<CommitList/>', () => {
         url: 'https://example.com/commit/abc123def456',
       },
     ];
-    const { getByTitle } = renderWithRedux(<CommitList commits={commits} />);
+    const { getByTitle } = renderWithRedux(
+      <CommitList taskId="task-id" commits={commits} commitCount={1} />,
+    );
 
     expect(getByTitle('author123')).toBeVisible();
   });
 
   test('does not render if list is empty', () => {
-    const { container } = renderWithRedux(<CommitList commits={[]} />);
+    const { container } = renderWithRedux(
+      <CommitList taskId="task-id" commits={[]} commitCount={0} />,
+    );
 
     expect(container).toBeEmptyDOMElement();
   });
+
+  describe('more commits than the first page', () => {
+    const commit = (id) => ({
+      id,
+      timestamp: '2019-12-09 12:24',
+      message: `Commit ${id}`,
+      author: { name: 'Author', email: 'author@example.com', username: 'a' },
+      url: `https://example.com/commit/${id}`,
+    });
+
+    test('pages through the commits endpoint', async () => {
+      const url = window.api_urls.task_commits('task-id');
+      fetchMock.getOnce(`${url}?page=2`, {
+        count: 3,
+        next: `${url}?page=3`,
+        results: [commit('page2')],
+      });
+      fetchMock.getOnce(`${url}?page=3`, {
+        count: 3,
+        next: null,
+        results: [commit('page3')],
+      });
+      const { getByText, queryByText, findByText } = renderWithRedux(
+        <CommitList
+          taskId="task-id"
+          commits={[commit('head')]}
+          commitCount={3}
+        />,
+      );
+
+      fireEvent.click(getByText('Load More'));
+      expect(await findByText('Commit page2')).toBeVisible();
+      fireEvent.click(getByText('Load More'));
+      expect(await findByText('Commit page3')).toBeVisible();
+      await waitFor(() => expect(queryByText('Load More')).toBeNull());
+    });
+  });
 });